@@ -4,14 +4,25 @@ import json
 import logging
 import re
 import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
 from typing import Dict, List, Optional, Any
 from uuid import UUID
 
 import google.generativeai as genai
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from .config import settings
-from .database import User, Plan, Task, AIInteraction, async_session
+from . import context_stats
+from .database import User, Plan, Task, AIInteraction, UserContextStats, async_session
+from .interaction_writer import interaction_writer
+from .metrics import AI_CALL_SECONDS, AI_FALLBACKS, AI_PARSE_FAILURES, AI_RETRIES, AI_TOKENS
+from .prompts import PromptTemplate, prompt_registry
+from .tracing import current_span, current_trace_id, span
+from .timings import timed
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -19,6 +30,31 @@ logger = logging.getLogger(__name__)
 # Configure Gemini
 genai.configure(api_key=settings.google_api_key)
 
+# Tokens reported by the last Gemini call in the current context
+last_token_count: ContextVar[int] = ContextVar("last_token_count", default=0)
+
+# Tokens of the Gemini calls made in the current context since the last recorded interaction
+interaction_tokens: ContextVar[int] = ContextVar("interaction_tokens", default=0)
+
+# Prompt template id of the Gemini call in progress in the current context, for metrics
+current_operation: ContextVar[str] = ContextVar("current_operation", default="unknown")
+
+
+def _record_retry(retry_state) -> None:
+    """Count a retried Gemini attempt in the metrics and the current span."""
+    AI_RETRIES.inc(current_operation.get())
+    call = current_span()
+    if call is not None:
+        call.add("ai.retries")
+
+
+def _record_fallback(operation: str) -> None:
+    """Count an AI operation answered without the model."""
+    AI_FALLBACKS.inc(operation)
+    stage = current_span()
+    if stage is not None:
+        stage.set_attribute("ai.fallback", True)
+
 
 class GeminiAIService:
     """Service for integrating with Google Gemini AI."""
@@ -53,20 +89,67 @@ class GeminiAIService:
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        before_sleep=_record_retry
     )
     async def _generate_content(self, prompt: str) -> str:
         """Generate content using Gemini with retry logic."""
         try:
-            response = self.model.generate_content(
-                prompt,
-                safety_settings=self.safety_settings
-            )
+            with timed("ai"):
+                response = self.model.generate_content(
+                    prompt,
+                    safety_settings=self.safety_settings
+                )
+            total_tokens = getattr(getattr(response, "usage_metadata", None), "total_token_count", 0)
+            last_token_count.set(total_tokens if isinstance(total_tokens, int) else 0)
             return response.text
         except Exception as e:
             logger.error(f"Gemini API error: {str(e)}")
             raise
 
+    async def _generate_json(self, template: PromptTemplate, prompt: str) -> Dict[str, Any]:
+        """Generate and parse a JSON response, recording prompt template statistics."""
+        start_time, end_time = time.time(), None
+        last_token_count.set(0)
+        current_operation.set(template.template_id)
+        outcome = "error"
+        try:
+            with span(
+                "gemini.generate",
+                **{
+                    "ai.operation": template.template_id,
+                    "ai.template_version": template.version,
+                    "ai.prompt_chars": len(prompt),
+                    "ai.retries": 0
+                }
+            ) as call:
+                try:
+                    response = await self._generate_content(prompt)
+                finally:
+                    end_time = time.time()
+                call.set_attribute("ai.tokens", last_token_count.get())
+            interaction_tokens.set(interaction_tokens.get() + last_token_count.get())
+
+            try:
+                with span("ai.extract_json", **{"ai.operation": template.template_id, "ai.response_chars": len(response)}):
+                    result = json.loads(self._extract_json_from_response(response))
+            except json.JSONDecodeError:
+                outcome = "parse_failure"
+                AI_PARSE_FAILURES.inc(template.template_id)
+                raise
+
+            outcome = "ok"
+            return result
+        finally:
+            # Failed and cancelled calls are measured too, so outages show up in the latency and token series
+            latency_ms = ((end_time or time.time()) - start_time) * 1000
+            AI_CALL_SECONDS.observe(latency_ms / 1000, template.template_id, outcome)
+            AI_TOKENS.inc(template.template_id, amount=last_token_count.get())
+            prompt_registry.record(
+                template, latency_ms, last_token_count.get(),
+                parse_failed=outcome == "parse_failure", errored=outcome == "error"
+            )
+
     def _extract_json_from_response(self, response: str) -> str:
         """Extract JSON from Gemini response (removes markdown code blocks)."""
         import re
@@ -125,67 +208,20 @@ class GeminiAIService:
         return response.strip()
 
     async def analyze_user_context(self, user_id: str) -> Dict[str, Any]:
-        """Analyze user's historical patterns and preferences."""
+        """Get user's historical patterns and preferences from their context aggregate."""
         async with async_session() as session:
-            # Get user's plans and tasks
-            result = await session.execute(
-                """
-                SELECT p.title, p.description, p.status, p.created_at,
-                       t.title as task_title, t.description as task_desc,
-                       t.priority, t.status as task_status, t.ai_category
-                FROM plans p
-                LEFT JOIN tasks t ON p.id = t.plan_id
-                WHERE p.user_id = :user_id
-                ORDER BY p.created_at DESC, t.created_at DESC
-                """,
-                {"user_id": user_id}
-            )
-
-            data = result.fetchall()
-
-            # Analyze patterns
-            plans = {}
-            task_categories = set()
-            priority_patterns = []
-
-            for row in data:
-                plan_key = row.title
-                if plan_key not in plans:
-                    plans[plan_key] = {
-                        "title": row.title,
-                        "description": row.description,
-                        "status": row.status,
-                        "tasks": []
-                    }
-
-                if row.task_title:
-                    task_info = {
-                        "title": row.task_title,
-                        "description": row.task_desc,
-                        "priority": row.priority,
-                        "status": row.task_status,
-                        "category": row.ai_category
-                    }
-                    plans[plan_key]["tasks"].append(task_info)
-
-                    if row.ai_category:
-                        task_categories.add(row.ai_category)
-                    priority_patterns.append(row.priority)
-
-            # Generate context summary
-            context = {
-                "total_plans": len(plans),
-                "plan_data": list(plans.values()),
-                "task_categories": list(task_categories),
-                "priority_distribution": {
-                    "high": priority_patterns.count(5),
-                    "medium_high": priority_patterns.count(4),
-                    "medium": priority_patterns.count(3),
-                    "medium_low": priority_patterns.count(2),
-                    "low": priority_patterns.count(1)
-                }
-            }
+            stats = await session.get(UserContextStats, UUID(str(user_id)))
+            if stats is not None:
+                return context_stats.to_context(stats)
 
+            # First read for this user: build the aggregate once from their history
+            stats = await context_stats.rebuild(session, user_id)
+            context = context_stats.to_context(stats)
+            try:
+                await session.commit()
+            except IntegrityError:
+                # A concurrent write built it first
+                await session.rollback()
             return context
 
     async def categorize_tasks(self, tasks: List[Dict[str, Any]], context: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -203,41 +239,14 @@ class GeminiAIService:
         # Get user's preferred categories from context
         existing_categories = context.get("task_categories", [])
 
-        prompt = f"""
-        Analyze the following tasks and group them into logical categories.
-        Consider the user's historical preferences: {existing_categories}
-
-        Tasks to categorize:
-
-        {chr(10).join(task_info)}
-
-        Provide a JSON response with this structure:
-        {{
-            "categories": [
-                {{
-                    "name": "Category Name",
-                    "description": "Brief description of what this category includes",
-                    "tasks": [task_indices],
-                    "priority_ranking": 1-5
-                }}
-            ],
-            "reasoning": "Explanation of the categorization logic"
-        }}
-
-        Guidelines:
-        - Create 3-7 meaningful categories
-        - Each task should belong to exactly one category
-        - Categories should be logical and actionable
-        - Consider task types, complexity, and goals
-        - Priority ranking: 1 (lowest priority) to 5 (highest priority category)
-        """
+        template = prompt_registry.select("categorize_tasks")
+        prompt = template.render(
+            existing_categories=existing_categories,
+            task_list=chr(10).join(task_info)
+        )
 
         try:
-            response = await self._generate_content(prompt)
-
-            # Parse JSON response with extraction
-            json_response = self._extract_json_from_response(response)
-            ai_result = json.loads(json_response)
+            ai_result = await self._generate_json(template, prompt)
 
             # Map categories back to tasks
             categorized_tasks = []
@@ -254,17 +263,20 @@ class GeminiAIService:
                 "categorized_tasks": categorized_tasks,
                 "categories": ai_result.get("categories", []),
                 "reasoning": ai_result.get("reasoning", ""),
-                "uncategorized_tasks": [task for task in tasks if task not in categorized_tasks]
+                "uncategorized_tasks": [task for task in tasks if task not in categorized_tasks],
+                "prompt_template": template.ref()
             }
 
         except Exception as e:
             logger.error(f"Error in task categorization: {str(e)}")
+            _record_fallback(template.template_id)
             # Fallback to basic categorization
             return {
                 "categorized_tasks": tasks,
                 "categories": [{"name": "General", "description": "Uncategorized tasks", "tasks": list(range(len(tasks))), "priority_ranking": 3}],
                 "reasoning": "AI categorization failed, using default grouping",
-                "uncategorized_tasks": []
+                "uncategorized_tasks": [],
+                "prompt_template": template.ref()
             }
 
     async def score_priorities(self, tasks: List[Dict[str, Any]], context: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -279,43 +291,14 @@ class GeminiAIService:
                 f"Current Priority: {task.get('priority', 3)}"
             )
 
-        prompt = f"""
-        Analyze and rank the following tasks by priority. Consider:
-        - User's historical priority patterns: {context.get('priority_distribution', {})}
-        - Task dependencies and logical flow
-        - Estimated effort vs. impact
-        - Urgency and importance
-
-        Tasks to prioritize:
-
-        {chr(10).join(task_info)}
-
-        Provide a JSON response with this structure:
-        {{
-            "ranked_tasks": [
-                {{
-                    "task_index": 0,
-                    "ai_priority_score": 1-10,
-                    "reasoning": "Specific reason for this priority",
-                    "estimated_effort": "Low/Medium/High",
-                    "dependencies": ["task_indices"],
-                    "impact_level": "Low/Medium/High"
-                }}
-            ],
-            "recommendations": ["List of priority recommendations"]
-        }}
-
-        Scoring guidelines:
-        - 1-3: Low priority (can be deferred)
-        - 4-6: Medium priority (important but not urgent)
-        - 7-8: High priority (important and somewhat urgent)
-        - 9-10: Critical priority (urgent and critical)
-        """
+        template = prompt_registry.select("score_priorities")
+        prompt = template.render(
+            priority_distribution=context.get('priority_distribution', {}),
+            task_list=chr(10).join(task_info)
+        )
 
         try:
-            response = await self._generate_content(prompt)
-            json_response = self._extract_json_from_response(response)
-            ai_result = json.loads(json_response)
+            ai_result = await self._generate_json(template, prompt)
 
             # Apply priority scores to tasks
             scored_tasks = []
@@ -335,11 +318,13 @@ class GeminiAIService:
             return {
                 "scored_tasks": scored_tasks,
                 "recommendations": ai_result.get("recommendations", []),
-                "unscored_tasks": [task for task in tasks if task not in scored_tasks]
+                "unscored_tasks": [task for task in tasks if task not in scored_tasks],
+                "prompt_template": template.ref()
             }
 
         except Exception as e:
             logger.error(f"Error in priority scoring: {str(e)}")
+            _record_fallback(template.template_id)
             # Fallback to basic priority scoring
             for task in tasks:
                 task["ai_priority_score"] = task.get("priority", 3) * 2
@@ -347,137 +332,141 @@ class GeminiAIService:
             return {
                 "scored_tasks": tasks,
                 "recommendations": ["AI scoring failed, using original priorities"],
-                "unscored_tasks": []
+                "unscored_tasks": [],
+                "prompt_template": template.ref()
             }
 
     async def generate_dashboard_suggestion(self, plan_id: str, user_context: Dict[str, Any]) -> Dict[str, Any]:
         """Generate complete dashboard with categories and ranked priorities."""
         start_time = time.time()
 
-        async with async_session() as session:
-            # Get plan and tasks
-            plan_result = await session.execute(
-                "SELECT * FROM plans WHERE id = :plan_id",
-                {"plan_id": plan_id}
-            )
-            plan = plan_result.fetchone()
-
-            tasks_result = await session.execute(
-                "SELECT * FROM tasks WHERE plan_id = :plan_id",
-                {"plan_id": plan_id}
+        with span("ai.generate_dashboard", plan_id=str(plan_id)) as pipeline:
+            with span("db.load_plan", plan_id=str(plan_id)) as load:
+                async with async_session() as session:
+                    # Get plan and tasks
+                    plan = await session.get(Plan, UUID(str(plan_id)))
+                    tasks_result = await session.execute(
+                        select(Task)
+                        .where(Task.plan_id == UUID(str(plan_id)))
+                        .order_by(Task.created_at, Task.id)
+                    )
+                    tasks = tasks_result.scalars().all()
+                load.set_attribute("ai.task_count", len(tasks))
+
+            if not plan:
+                raise ValueError(f"Plan with ID {plan_id} not found")
+
+            # Convert tasks to dict format
+            task_dicts = []
+            for task in tasks:
+                task_dicts.append({
+                    "id": task.id,
+                    "title": task.title,
+                    "description": task.description,
+                    "priority": task.priority,
+                    "status": task.status
+                })
+            pipeline.set_attribute("ai.task_count", len(task_dicts))
+
+            # Step 1: Categorize tasks
+            with span("ai.categorize", **{"ai.task_count": len(task_dicts)}) as stage:
+                categorization_result = await self.categorize_tasks(task_dicts, user_context)
+                stage.set_attribute("ai.category_count", len(categorization_result["categories"]))
+
+            # Step 2: Score priorities for categorized tasks
+            with span("ai.score_priorities", **{"ai.task_count": len(categorization_result["categorized_tasks"])}) as stage:
+                priority_result = await self.score_priorities(
+                    categorization_result["categorized_tasks"],
+                    user_context
+                )
+                stage.set_attribute("ai.scored_count", len(priority_result["scored_tasks"]))
+
+            # Step 3: Generate final dashboard suggestion
+            template = prompt_registry.select("dashboard_summary")
+            dashboard_prompt = template.render(
+                plan_title=plan.title,
+                plan_description=plan.description,
+                categorized_count=len(categorization_result['categorized_tasks']),
+                category_count=len(categorization_result['categories']),
+                scored_count=len(priority_result['scored_tasks'])
             )
-            tasks = [dict(row) for row in tasks_result.fetchall()]
-
-        if not plan:
-            raise ValueError(f"Plan with ID {plan_id} not found")
-
-        # Convert tasks to dict format
-        task_dicts = []
-        for task in tasks:
-            task_dicts.append({
-                "id": task["id"],
-                "title": task["title"],
-                "description": task["description"],
-                "priority": task["priority"],
-                "status": task["status"]
-            })
-
-        # Step 1: Categorize tasks
-        categorization_result = await self.categorize_tasks(task_dicts, user_context)
-
-        # Step 2: Score priorities for categorized tasks
-        priority_result = await self.score_priorities(
-            categorization_result["categorized_tasks"],
-            user_context
-        )
 
-        # Step 3: Generate final dashboard suggestion
-        dashboard_prompt = f"""
-        Create a comprehensive dashboard suggestion based on this analysis:
-
-        Plan: {plan.title}
-        Description: {plan.description}
-
-        Categorized Tasks: {len(categorization_result['categorized_tasks'])}
-        Categories: {len(categorization_result['categories'])}
-
-        Priority Analysis: {len(priority_result['scored_tasks'])} tasks scored
-
-        Provide a JSON response:
-        {{
-            "dashboard_title": "Suggested Dashboard Title",
-            "summary": "Brief summary of the analysis",
-            "categories": [...],
-            "priority_groups": {{
-                "critical": [],
-                "high": [],
-                "medium": [],
-                "low": []
-            }},
-            "recommendations": [],
-            "estimated_completion_time": "Time estimate",
-            "next_steps": ["Immediate next steps"]
-        }}
-        """
-
-        try:
-            response = await self._generate_content(dashboard_prompt)
-            json_response = self._extract_json_from_response(response)
-            dashboard_data = json.loads(json_response)
-
-            # Calculate response time
-            response_time_ms = int((time.time() - start_time) * 1000)
-
-            # Prepare final suggestion
-            suggestion = {
-                "plan_id": plan_id,
-                "plan_title": plan.title,
-                "dashboard_data": dashboard_data,
-                "categorization": categorization_result,
-                "priority_analysis": priority_result,
-                "metadata": {
-                    "total_tasks": len(task_dicts),
-                    "categorized_tasks": len(categorization_result["categorized_tasks"]),
-                    "response_time_ms": response_time_ms,
-                    "model_used": settings.gemini_model
+            try:
+                with span("ai.dashboard_synthesis"):
+                    dashboard_data = await self._generate_json(template, dashboard_prompt)
+
+                # Calculate response time
+                response_time_ms = int((time.time() - start_time) * 1000)
+
+                # Prepare final suggestion
+                suggestion = {
+                    "plan_id": plan_id,
+                    "plan_title": plan.title,
+                    "dashboard_data": dashboard_data,
+                    "categorization": categorization_result,
+                    "priority_analysis": priority_result,
+                    "metadata": {
+                        "total_tasks": len(task_dicts),
+                        "categorized_tasks": len(categorization_result["categorized_tasks"]),
+                        "response_time_ms": response_time_ms,
+                        "model_used": settings.gemini_model,
+                        "prompt_template": template.ref(),
+                        "trace_id": pipeline.trace_id
+                    }
                 }
-            }
 
-            return suggestion
+                return suggestion
 
-        except Exception as e:
-            logger.error(f"Error generating dashboard: {str(e)}")
-            raise
+            except Exception as e:
+                logger.error(f"Error generating dashboard: {str(e)}")
+                raise
 
     async def record_ai_interaction(
         self,
         user_id: str,
-        plan_id: str,
+        plan_id: Optional[str],
         interaction_type: str,
         request_data: Dict[str, Any],
         response_data: Dict[str, Any],
-        tokens_used: int = 0,
-        response_time_ms: int = 0
+        tokens_used: Optional[int] = None,
+        response_time_ms: int = 0,
+        model_used: Optional[str] = None
     ) -> AIInteraction:
-        """Record AI interaction for analytics and tracking."""
-        async with async_session() as session:
-            interaction = AIInteraction(
-                user_id=user_id,
-                plan_id=plan_id,
-                interaction_type=interaction_type,
-                request_data=json.dumps(request_data),
-                response_data=json.dumps(response_data),
-                tokens_used=tokens_used,
-                model_used=settings.gemini_model,
-                response_time_ms=response_time_ms,
-                cost_estimate=self._estimate_cost(tokens_used)
-            )
+        """Record AI interaction for analytics and tracking.
+
+        tokens_used defaults to the tokens of the Gemini calls made in this context since the
+        last recorded interaction. The row is written behind by the interaction writer; the
+        returned interaction carries its client-side id and is not attached to a session.
+        """
+        if tokens_used is None:
+            tokens_used = interaction_tokens.get()
+        interaction_tokens.set(0)
+
+        template_ref = (
+            response_data.get("prompt_template")
+            or response_data.get("metadata", {}).get("prompt_template")
+            or {}
+        )
 
-            session.add(interaction)
-            await session.commit()
-            await session.refresh(interaction)
+        row = {
+            "id": uuid.uuid4(),
+            "user_id": UUID(str(user_id)),
+            "plan_id": UUID(str(plan_id)) if plan_id else None,
+            "interaction_type": interaction_type,
+            "request_data": request_data,
+            "response_data": response_data,
+            "tokens_used": tokens_used,
+            "model_used": model_used or settings.gemini_model,
+            "response_time_ms": response_time_ms,
+            "cost_estimate": self._estimate_cost(tokens_used),
+            "template_id": template_ref.get("id"),
+            "template_version": template_ref.get("version"),
+            "trace_id": current_trace_id(),
+            "created_at": datetime.utcnow()
+        }
+        await interaction_writer.enqueue(row)
 
-            return interaction
+        return AIInteraction(**row)
 
     def _estimate_cost(self, tokens_used: int) -> float:
         """Estimate cost based on token usage."""
@@ -493,73 +482,11 @@ class GeminiAIService:
     async def organize_into_categories(self, messy_prompt: str, user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Convert messy user prompt into organized categories with todo/doing/upcoming blocks."""
 
-        prompt = f"""
-        You are a task organization expert. The user will give you a messy, unorganized prompt about their goals, ideas, or thoughts.
-        Your job is to:
-        1. Extract clear, actionable tasks from their messy input
-        2. Group tasks into logical categories (3-7 categories)
-        3. Assign each task to a status: "todo" (not started), "doing" (in progress), or "upcoming" (blocked/future)
-
-        User's messy input:
-        {messy_prompt}
-
-        Provide a JSON response with this structure:
-        {{
-            "categories": [
-                {{
-                    "name": "Category Name",
-                    "description": "Brief description of this category's focus",
-                    "icon": "emoji-or-icon-name",
-                    "color": "blue|green|purple|orange|red|yellow|pink",
-                    "tasks": {{
-                        "todo": [
-                            {{
-                                "title": "Clear task title",
-                                "description": "Detailed description",
-                                "priority": 1-10,
-                                "reasoning": "Why this task matters and why it's in todo"
-                            }}
-                        ],
-                        "doing": [
-                            {{
-                                "title": "Task currently in progress",
-                                "description": "Detailed description",
-                                "priority": 1-10,
-                                "reasoning": "Why this task is actively being worked on"
-                            }}
-                        ],
-                        "upcoming": [
-                            {{
-                                "title": "Future task",
-                                "description": "Detailed description",
-                                "priority": 1-10,
-                                "reasoning": "Why this task is upcoming (dependencies, timing, etc.)"
-                            }}
-                        ]
-                    }}
-                }}
-            ],
-            "summary": "Brief summary of what you organized",
-            "total_tasks": count,
-            "suggested_next_steps": ["Immediate action items"]
-        }}
-
-        Guidelines:
-        - Extract 5-20 actionable tasks total
-        - Create 3-7 logical categories based on themes (e.g., Development, Design, Marketing, Research, etc.)
-        - Assign statuses based on task nature:
-          * "todo" - Tasks ready to start now, clear next steps
-          * "doing" - Tasks that seem to be in progress or actively happening
-          * "upcoming" - Tasks blocked by dependencies, future phases, or lower priority
-        - Priority 1-10: 1-3 (low), 4-6 (medium), 7-8 (high), 9-10 (critical)
-        - Be specific and actionable in task titles
-        - Provide clear reasoning for status assignments
-        """
+        template = prompt_registry.select("organize_prompt")
+        prompt = template.render(messy_prompt=messy_prompt)
 
         try:
-            response = await self._generate_content(prompt)
-            json_response = self._extract_json_from_response(response)
-            result = json.loads(json_response)
+            result = await self._generate_json(template, prompt)
 
             # Validate and enhance the response
             if "categories" not in result:
@@ -584,10 +511,12 @@ class GeminiAIService:
                 if "color" not in category or not category["color"]:
                     category["color"] = self._get_default_color(category["name"])
 
+            result["prompt_template"] = template.ref()
             return result
 
         except Exception as e:
             logger.error(f"Error organizing prompt: {str(e)}")
+            _record_fallback(template.template_id)
             # Fallback to basic organization
             return {
                 "categories": [
@@ -612,7 +541,8 @@ class GeminiAIService:
                 ],
                 "summary": "AI organization encountered an error. Please manually organize your tasks.",
                 "total_tasks": 1,
-                "suggested_next_steps": ["Try breaking down your input into smaller chunks", "Be more specific with your goals"]
+                "suggested_next_steps": ["Try breaking down your input into smaller chunks", "Be more specific with your goals"],
+                "prompt_template": template.ref()
             }
 
     def _get_default_icon(self, category_name: str) -> str:
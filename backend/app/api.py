@@ -1,29 +1,124 @@
 """Minimal API routes for Mindmesh backend."""
 
-import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Response
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, func, inspect as sa_inspect
+from sqlalchemy.orm import contains_eager, defer
+from pydantic import TypeAdapter
 
-from .database import get_db, User, Plan, Task, AIInteraction
+from .database import get_db, User, Plan, Task, AIInteraction, AIInteractionDaily
 from .schemas import (
     Plan as PlanSchema, PlanCreate, Task as TaskSchema, TaskCreate,
     AIAnalysisRequest, AIAnalysisResponse, AIDashboardSuggestion,
-    UserApprovalRequest, UserApprovalResponse, EnhancedPlan, EnhancedTask
+    UserApprovalRequest, UserApprovalResponse, EnhancedPlan, EnhancedTask,
+    AIInteraction as AIInteractionSchema, OrganizedPlanCreate, PlanWithTasks, PlanDetail,
+    AIUsageDay
 )
 from .auth import get_current_user
 from .ai_service import ai_service
+from . import auth_cache, context_stats, etags, writes
+from .categories import category_normalizer
+from .calibration import priority_calibrator, LOCAL_MODEL_NAME
+from .interaction_rollups import template_usage
+from .prompts import prompt_registry
+from .replicas import get_read_db, replica_router
+from .interaction_writer import interaction_writer
+from .read_cache import PLANS, TASKS, read_cache
+from .pagination import NEXT_CURSOR_HEADER, keyset, page
+from .bulk import apply_scored_tasks, insert_tasks, organized_task_rows
+from .dashboard_cache import dashboard_cache, plan_fingerprint, FRESH, STALE, MISS, DEGRADED
+from .serialization import FastJSONResponse
+from .timings import timed
+from .metrics import AI_FALLBACKS
+from .query_log import query_stats
+from .profiling import aggregates, profile_store, require_profiling_token
 
 logger = logging.getLogger(__name__)
 
 # Create router
 api_router = APIRouter(prefix="/api", tags=["api"])
 
+# Large JSON columns left out of list responses unless requested
+PLAN_BLOBS = {"ai_generated_data": Plan.ai_generated_data, "ai_metadata": Plan.ai_metadata}
+INTERACTION_BLOBS = {"request_data": AIInteraction.request_data, "response_data": AIInteraction.response_data}
+
+# Sections of the plan detail response
+PLAN_DETAIL_SECTIONS = ("plan", "tasks", "latest_interaction")
+
+# Built once, validating and serializing a whole list in one call
+PLAN_LIST = TypeAdapter(List[PlanSchema])
+TASK_LIST = TypeAdapter(List[TaskSchema])
+
+
+def _defer_blobs(blobs: dict, include: Optional[str]) -> list:
+    """Build loader options deferring every blob column not named in include."""
+    requested = {name.strip() for name in include.split(",")} if include else set()
+    unknown = requested - blobs.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include field(s): {', '.join(sorted(unknown))}"
+        )
+    return [defer(column, raiseload=True) for name, column in blobs.items() if name not in requested]
+
+
+def _loaded(instance) -> dict:
+    """Get the loaded column values of an ORM instance, skipping deferred ones."""
+    state = sa_inspect(instance)
+    return {
+        prop.key: state.attrs[prop.key].loaded_value
+        for prop in state.mapper.column_attrs
+        if prop.key not in state.unloaded
+    }
+
+
+def _dump(adapter: TypeAdapter, rows, **options) -> List[dict]:
+    """Serialize rows to JSON-compatible dicts for the read cache."""
+    with timed("serialize"):
+        return adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json", **options)
+
+
+async def _cached_list(
+    response: Response,
+    if_none_match: Optional[str],
+    db: AsyncSession,
+    user_id,
+    scope: str,
+    params: str,
+    versions,
+    load
+) -> Response:
+    """Serve a list from the per-user read cache with a weak ETag, restoring its next page cursor header.
+
+    The ETag hashes the versions aggregate of the whole list, read before the page so a
+    concurrent write can only make it older than the data. A matching If-None-Match is
+    answered with 304 before the page is loaded. Cached items were validated when loaded,
+    so they are encoded directly instead of going through the response model again.
+    """
+    async def load_page():
+        row = (await db.execute(versions)).first()
+        if row is None:
+            # Nothing to compare against, the load answers 404
+            return {"items": await load(), "next_cursor": None, "etag": None}
+        etag = etags.weak_etag(scope, params, *row)
+        etags.conditional(response, etag, if_none_match)
+        items = await load()
+        return {"items": items, "next_cursor": response.headers.get(NEXT_CURSOR_HEADER), "etag": etag}
+
+    cached = await read_cache.get_or_load(user_id, scope, params, load_page, from_replica=replica_router.is_replica(db))
+    if cached["etag"]:
+        etags.conditional(response, cached["etag"], if_none_match)
+    if cached["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = cached["next_cursor"]
+    headers = {name: response.headers[name] for name in ("ETag", "Cache-Control", NEXT_CURSOR_HEADER) if name in response.headers}
+    return FastJSONResponse(cached["items"], headers=headers)
+
 # Health endpoint
 @api_router.get("/health")
 async def health_check():
@@ -46,43 +141,157 @@ async def create_plan(
         status=plan.status or "draft"
     )
     db.add(db_plan)
+    await db.flush()
+    await context_stats.apply_plan_change(db, current_user.id, None, context_stats.plan_summary(db_plan))
+
+    # Serialize before commit expires the instance, instead of refreshing it afterwards
+    response = PlanSchema.model_validate(db_plan)
     await db.commit()
-    await db.refresh(db_plan)
-    return db_plan
+    await read_cache.invalidate(current_user.id, PLANS)
+    return response
 
-@api_router.get("/plans", response_model=List[PlanSchema])
+@api_router.get("/plans", response_model=List[PlanSchema], response_model_exclude_unset=True)
 async def get_plans(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    include: Optional[str] = Query(None, description="Comma-separated AI fields to include"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get user's plans."""
-    result = await db.execute(
-        select(Plan)
-        .where(Plan.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-        .order_by(Plan.created_at.desc())
+    """Get user's plans, newest first; the next page cursor is in the X-Next-Cursor header.
+
+    AI blobs are left out unless requested with include=ai_generated_data,ai_metadata.
+    """
+    query = select(Plan).where(Plan.user_id == current_user.id)
+    query = query.options(*_defer_blobs(PLAN_BLOBS, include))
+
+    async def load():
+        result = await db.execute(keyset(query, Plan, cursor, limit))
+        plans = page(result.scalars().all(), limit, response)
+        return _dump(PLAN_LIST, [_loaded(plan) for plan in plans], exclude_unset=True)
+
+    versions = select(func.count(Plan.id), func.max(Plan.updated_at)).where(Plan.user_id == current_user.id)
+    return await _cached_list(
+        response, if_none_match, db, current_user.id, PLANS, f"list|{cursor}|{limit}|{include}", versions, load
     )
-    return result.scalars().all()
 
 @api_router.get("/plans/{plan_id}", response_model=PlanSchema)
 async def get_plan(
     plan_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific plan."""
-    result = await db.execute(
-        select(Plan)
-        .where(Plan.id == plan_id, Plan.user_id == current_user.id)
-    )
+    owned = (Plan.id == plan_id, Plan.user_id == current_user.id)
+    if if_none_match:
+        updated_at = await db.scalar(select(Plan.updated_at).where(*owned))
+        if updated_at is not None:
+            etags.conditional(response, etags.weak_etag("plan", plan_id, updated_at), if_none_match)
+
+    result = await db.execute(select(Plan).where(*owned))
     plan = result.scalar_one_or_none()
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
+    etags.conditional(response, etags.weak_etag("plan", plan_id, plan.updated_at))
     return plan
 
+def _plan_detail_versions(plan_id: UUID, user_id):
+    """Select the plan's updated_at, its task count and latest task update, and its latest interaction."""
+    def latest_interaction(column):
+        return (
+            select(column)
+            .where(AIInteraction.plan_id == Plan.id)
+            .order_by(AIInteraction.created_at.desc(), AIInteraction.id.desc())
+            .limit(1)
+            .correlate(Plan)
+            .scalar_subquery()
+        )
+
+    def task_aggregate(aggregate):
+        return select(aggregate).where(Task.plan_id == Plan.id).correlate(Plan).scalar_subquery()
+
+    return select(
+        Plan.updated_at,
+        task_aggregate(func.count(Task.id)),
+        task_aggregate(func.max(Task.updated_at)),
+        latest_interaction(AIInteraction.id),
+        latest_interaction(AIInteraction.user_feedback)
+    ).where(Plan.id == plan_id, Plan.user_id == user_id)
+
+
+@api_router.get("/plans/{plan_id}/detail", response_model=PlanDetail, response_model_exclude_unset=True)
+async def get_plan_detail(
+    plan_id: UUID,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated sections: plan, tasks, latest_interaction"),
+    include: Optional[str] = Query(None, description="Comma-separated AI fields to include in the plan"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a plan with its tasks and latest AI interaction in one ownership-checked query.
+
+    A cheap versions query runs first for the ETag, so If-None-Match can be answered with 304.
+    """
+    sections = {name.strip() for name in fields.split(",")} if fields else set(PLAN_DETAIL_SECTIONS)
+    unknown = sections - set(PLAN_DETAIL_SECTIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(sorted(unknown))}")
+
+    query = (
+        select(Plan)
+        .where(Plan.id == plan_id, Plan.user_id == current_user.id)
+        .options(*_defer_blobs(PLAN_BLOBS, include))
+    )
+
+    # Versions of every section, read before the detail itself
+    versions = (await db.execute(_plan_detail_versions(plan_id, current_user.id))).first()
+    if versions is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    etags.conditional(
+        response, etags.weak_etag("detail", plan_id, sorted(sections), include, *versions), if_none_match
+    )
+
+    if "tasks" in sections:
+        query = (
+            query.outerjoin(Plan.tasks)
+            .options(contains_eager(Plan.tasks))
+            .order_by(Task.created_at, Task.id)
+        )
+
+    if "latest_interaction" in sections:
+        latest_id = (
+            select(AIInteraction.id)
+            .where(AIInteraction.plan_id == Plan.id)
+            .order_by(AIInteraction.created_at.desc(), AIInteraction.id.desc())
+            .limit(1)
+            .correlate(Plan)
+            .scalar_subquery()
+        )
+        query = (
+            query.add_columns(AIInteraction)
+            .outerjoin(AIInteraction, AIInteraction.id == latest_id)
+            .options(*_defer_blobs(INTERACTION_BLOBS, None))
+        )
+
+    rows = (await db.execute(query)).unique().all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Plan not found")
+
+    plan = rows[0][0]
+    detail = {}
+    if "plan" in sections:
+        detail["plan"] = _loaded(plan)
+    if "tasks" in sections:
+        detail["tasks"] = plan.tasks
+    if "latest_interaction" in sections:
+        detail["latest_interaction"] = rows[0][1]
+    return detail
+
 @api_router.put("/plans/{plan_id}", response_model=PlanSchema)
 async def update_plan(
     plan_id: UUID,
@@ -91,21 +300,18 @@ async def update_plan(
     current_user: User = Depends(get_current_user)
 ):
     """Update a plan."""
-    result = await db.execute(
-        select(Plan)
-        .where(Plan.id == plan_id, Plan.user_id == current_user.id)
-    )
-    plan = result.scalar_one_or_none()
+    values = writes.changes(plan_update, writes.PLAN_FIELDS)
+    plan = await writes.update_plan(db, current_user.id, plan_id, values)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
 
-    # Update fields if provided
-    for key, value in plan_update.items():
-        if hasattr(plan, key) and value is not None:
-            setattr(plan, key, value)
+    # Only the summary fields appear in the context aggregate
+    if values.keys() & {"title", "description", "status"}:
+        summary = context_stats.plan_summary(plan)
+        await context_stats.apply_plan_change(db, current_user.id, summary, summary)
 
     await db.commit()
-    await db.refresh(plan)
+    await read_cache.invalidate(current_user.id, PLANS)
     return plan
 
 @api_router.delete("/plans/{plan_id}")
@@ -115,35 +321,47 @@ async def delete_plan(
     current_user: User = Depends(get_current_user)
 ):
     """Delete a plan."""
-    result = await db.execute(
-        select(Plan)
-        .where(Plan.id == plan_id, Plan.user_id == current_user.id)
-    )
-    plan = result.scalar_one_or_none()
-    if not plan:
+    deleted = await writes.delete_plan(db, current_user.id, plan_id)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Plan not found")
 
-    await db.delete(plan)
+    before, removed_tasks = deleted
+    await context_stats.apply_plan_change(db, current_user.id, before, None, removed_tasks)
     await db.commit()
+    await read_cache.invalidate(current_user.id, PLANS, TASKS)
     return {"message": "Plan deleted"}
 
 # Tasks endpoints
 @api_router.get("/tasks", response_model=List[TaskSchema])
 async def get_all_tasks(
+    response: Response,
     plan_id: Optional[UUID] = Query(None),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all user's tasks, optionally filtered by plan."""
+    """Get user's tasks, newest first, optionally filtered by plan."""
     query = select(Task).join(Plan).where(Plan.user_id == current_user.id)
+    versions = (
+        select(func.count(Task.id), func.max(Task.updated_at))
+        .select_from(Task)
+        .join(Plan)
+        .where(Plan.user_id == current_user.id)
+    )
 
     if plan_id:
         query = query.where(Task.plan_id == plan_id)
+        versions = versions.where(Task.plan_id == plan_id)
 
-    query = query.order_by(Task.created_at.desc())
+    async def load():
+        result = await db.execute(keyset(query, Task, cursor, limit))
+        return _dump(TASK_LIST, page(result.scalars().all(), limit, response))
 
-    result = await db.execute(query)
-    return result.scalars().all()
+    return await _cached_list(
+        response, if_none_match, db, current_user.id, TASKS, f"list|{plan_id}|{cursor}|{limit}", versions, load
+    )
 
 @api_router.post("/tasks", response_model=TaskSchema)
 async def create_task(
@@ -152,63 +370,78 @@ async def create_task(
     current_user: User = Depends(get_current_user)
 ):
     """Create a new task."""
-    # Verify plan ownership
-    plan_result = await db.execute(
-        select(Plan)
-        .where(Plan.id == task.plan_id, Plan.user_id == current_user.id)
-    )
-    if not plan_result.scalar_one_or_none():
+    # Inserted only if the plan is the user's
+    db_task = await writes.insert_task(db, current_user.id, {
+        "plan_id": task.plan_id,
+        "title": task.title,
+        "description": task.description,
+        "priority": task.priority,
+        "status": "pending"
+    })
+    if not db_task:
         raise HTTPException(status_code=404, detail="Plan not found")
 
-    db_task = Task(
-        plan_id=task.plan_id,
-        title=task.title,
-        description=task.description,
-        priority=task.priority,
-        status="pending"
-    )
-    db.add(db_task)
+    await context_stats.apply_task_changes(db, current_user.id, added=[context_stats.task_facts(db_task)])
     await db.commit()
-    await db.refresh(db_task)
+    await read_cache.invalidate(current_user.id, TASKS)
     return db_task
 
 @api_router.get("/plans/{plan_id}/tasks", response_model=List[TaskSchema])
 async def get_plan_tasks(
     plan_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get tasks for a plan."""
-    # Verify plan ownership
-    plan_result = await db.execute(
-        select(Plan)
+    async def load():
+        # Verify plan ownership
+        plan_result = await db.execute(
+            select(Plan)
+            .where(Plan.id == plan_id, Plan.user_id == current_user.id)
+        )
+        if not plan_result.scalar_one_or_none():
+            raise HTTPException(status_code=404, detail="Plan not found")
+
+        result = await db.execute(
+            keyset(select(Task).where(Task.plan_id == plan_id), Task, cursor, limit, descending=False)
+        )
+        return _dump(TASK_LIST, page(result.scalars().all(), limit, response))
+
+    # No row when the plan is not the user's
+    versions = (
+        select(Plan.id, func.count(Task.id), func.max(Task.updated_at))
+        .outerjoin(Task, Task.plan_id == Plan.id)
         .where(Plan.id == plan_id, Plan.user_id == current_user.id)
+        .group_by(Plan.id)
     )
-    if not plan_result.scalar_one_or_none():
-        raise HTTPException(status_code=404, detail="Plan not found")
-
-    result = await db.execute(
-        select(Task)
-        .where(Task.plan_id == plan_id)
-        .order_by(Task.created_at)
+    return await _cached_list(
+        response, if_none_match, db, current_user.id, TASKS, f"plan|{plan_id}|{cursor}|{limit}", versions, load
     )
-    return result.scalars().all()
 
 @api_router.get("/tasks/{task_id}", response_model=TaskSchema)
 async def get_task(
     task_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific task."""
-    result = await db.execute(
-        select(Task)
-        .join(Plan)
-        .where(Task.id == task_id, Plan.user_id == current_user.id)
-    )
+    owned = (Task.id == task_id, Plan.user_id == current_user.id)
+    if if_none_match:
+        updated_at = await db.scalar(select(Task.updated_at).join(Plan).where(*owned))
+        if updated_at is not None:
+            etags.conditional(response, etags.weak_etag("task", task_id, updated_at), if_none_match)
+
+    result = await db.execute(select(Task).join(Plan).where(*owned))
     task = result.scalar_one_or_none()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    etags.conditional(response, etags.weak_etag("task", task_id, task.updated_at))
     return task
 
 @api_router.put("/tasks/{task_id}", response_model=TaskSchema)
@@ -219,22 +452,33 @@ async def update_task(
     current_user: User = Depends(get_current_user)
 ):
     """Update a task."""
-    result = await db.execute(
-        select(Task)
-        .join(Plan)
-        .where(Task.id == task_id, Plan.user_id == current_user.id)
-    )
-    task = result.scalar_one_or_none()
-    if not task:
+    values = writes.changes(task_update, writes.TASK_FIELDS)
+    if values.get("ai_category"):
+        canonical_categories = await category_normalizer.canonicalize(current_user.id, [values["ai_category"]])
+        values["ai_category"] = canonical_categories[values["ai_category"]]
+
+    updated = await writes.update_task(db, current_user.id, task_id, values)
+    if not updated:
         raise HTTPException(status_code=404, detail="Task not found")
+    previous, task = updated
+
+    before = context_stats.TaskFacts(previous["ai_category"], previous["priority"], previous["status"])
+    after = context_stats.task_facts(task)
+    if after != before:
+        await context_stats.apply_task_changes(db, current_user.id, removed=[before], added=[after])
 
-    # Update fields if provided
-    for key, value in task_update.items():
-        if hasattr(task, key) and value is not None:
-            setattr(task, key, value)
+    # A manual priority override of an AI-scored task is a calibration signal, kept for warm starts
+    edited = None
+    if task.priority != previous["priority"]:
+        edited = {**previous, "status": task.status}
+        priority_calibrator.record_edit(db, current_user.id, task_id, edited, task.priority, previous["status"])
 
     await db.commit()
-    await db.refresh(task)
+    await read_cache.invalidate(current_user.id, TASKS)
+
+    if edited is not None:
+        priority_calibrator.learn_from_edit(current_user.id, edited, task.priority, previous_status=previous["status"])
+
     return task
 
 @api_router.delete("/tasks/{task_id}")
@@ -244,17 +488,13 @@ async def delete_task(
     current_user: User = Depends(get_current_user)
 ):
     """Delete a task."""
-    result = await db.execute(
-        select(Task)
-        .join(Plan)
-        .where(Task.id == task_id, Plan.user_id == current_user.id)
-    )
-    task = result.scalar_one_or_none()
-    if not task:
+    removed = await writes.delete_task(db, current_user.id, task_id)
+    if not removed:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    await db.delete(task)
+    await context_stats.apply_task_changes(db, current_user.id, removed=[removed])
     await db.commit()
+    await read_cache.invalidate(current_user.id, TASKS)
     return {"message": "Task deleted"}
 
 # AI endpoints
@@ -412,9 +652,6 @@ async def rank_priorities(
                 error="No tasks found for priority ranking"
             )
 
-        # Get user context
-        user_context = await ai_service.analyze_user_context(current_user.id)
-
         # Convert tasks to dict format
         task_dicts = []
         for task in tasks:
@@ -424,11 +661,22 @@ async def rank_priorities(
                 "description": task.description,
                 "priority": task.priority,
                 "status": task.status,
-                "ai_category": task.ai_category
+                "ai_category": task.ai_category,
+                "ai_priority_score": task.ai_priority_score
             })
 
-        # Score priorities
-        priority_result = await ai_service.score_priorities(task_dicts, user_context)
+        # Re-rank locally when every task resembles ones the calibration model learned from
+        priority_result = priority_calibrator.rerank(current_user.id, task_dicts)
+        model_used = LOCAL_MODEL_NAME
+
+        if priority_result is None:
+            # Get user context
+            user_context = await ai_service.analyze_user_context(current_user.id)
+
+            # Score priorities
+            priority_result = await ai_service.score_priorities(task_dicts, user_context)
+            priority_calibrator.calibrate_scored(current_user.id, priority_result["scored_tasks"])
+            model_used = None
 
         # Record interaction
         interaction = await ai_service.record_ai_interaction(
@@ -436,7 +684,8 @@ async def rank_priorities(
             plan_id=str(plan_id),
             interaction_type="ranking",
             request_data={"plan_id": str(plan_id)},
-            response_data=priority_result
+            response_data=priority_result,
+            model_used=model_used
         )
 
         return AIAnalysisResponse(
@@ -453,6 +702,30 @@ async def rank_priorities(
         )
 
 
+async def _compute_dashboard(user_id, plan_id: UUID, fingerprint: str) -> dict:
+    """Generate, record and cache a fresh dashboard suggestion."""
+    # Get user context
+    user_context = await ai_service.analyze_user_context(user_id)
+
+    # Generate dashboard suggestion
+    suggestion = await ai_service.generate_dashboard_suggestion(str(plan_id), user_context)
+
+    # Record interaction
+    interaction = await ai_service.record_ai_interaction(
+        user_id=user_id,
+        plan_id=str(plan_id),
+        interaction_type="dashboard",
+        request_data={"plan_id": str(plan_id)},
+        response_data=suggestion,
+        response_time_ms=suggestion.get("metadata", {}).get("response_time_ms", 0)
+    )
+
+    # Keep it as the last good suggestion for this plan content
+    await dashboard_cache.store(plan_id, fingerprint, suggestion, interaction.id)
+
+    return {"suggestion": suggestion, "interaction_id": interaction.id}
+
+
 @api_router.post("/ai/generate-dashboard", response_model=AIAnalysisResponse)
 async def generate_dashboard(
     plan_id: UUID,
@@ -460,6 +733,7 @@ async def generate_dashboard(
     current_user: User = Depends(get_current_user)
 ):
     """Generate complete organized dashboard for user approval."""
+    snapshot = None
     try:
         # Verify plan ownership
         plan_result = await db.execute(
@@ -470,30 +744,51 @@ async def generate_dashboard(
         if not plan:
             raise HTTPException(status_code=404, detail="Plan not found")
 
-        # Get user context
-        user_context = await ai_service.analyze_user_context(current_user.id)
+        tasks_result = await db.execute(
+            select(Task).where(Task.plan_id == plan_id)
+        )
+        fingerprint = plan_fingerprint(plan, tasks_result.scalars().all())
 
-        # Generate dashboard suggestion
-        suggestion = await ai_service.generate_dashboard_suggestion(str(plan_id), user_context)
+        # Serve the last good suggestion while it still matches the plan content
+        snapshot = await dashboard_cache.get(plan_id)
+        cache_status = dashboard_cache.classify(snapshot, fingerprint)
 
-        # Record interaction
-        interaction = await ai_service.record_ai_interaction(
-            user_id=current_user.id,
-            plan_id=str(plan_id),
-            interaction_type="dashboard",
-            request_data={"plan_id": str(plan_id)},
-            response_data=suggestion,
-            response_time_ms=suggestion.get("metadata", {}).get("response_time_ms", 0)
-        )
+        if cache_status == STALE:
+            user_id = current_user.id
+            dashboard_cache.schedule_refresh(
+                plan_id, lambda: _compute_dashboard(user_id, plan_id, fingerprint)
+            )
+
+        if cache_status in (FRESH, STALE):
+            return AIAnalysisResponse(
+                success=True,
+                data=dashboard_cache.render(snapshot, cache_status),
+                interaction_id=snapshot.interaction_id
+            )
+
+        result = await _compute_dashboard(current_user.id, plan_id, fingerprint)
+        suggestion = result["suggestion"]
+        suggestion.setdefault("metadata", {})["cache"] = {"status": MISS}
 
         return AIAnalysisResponse(
             success=True,
             data=suggestion,
-            interaction_id=interaction.id
+            interaction_id=result["interaction_id"]
         )
 
     except Exception as e:
         logger.error(f"Error generating dashboard: {str(e)}")
+
+        # Fall back to the last good suggestion, even if the plan changed since
+        if snapshot is not None:
+            AI_FALLBACKS.inc("dashboard_summary")
+            return AIAnalysisResponse(
+                success=True,
+                data=dashboard_cache.render(snapshot, DEGRADED),
+                error=str(e),
+                interaction_id=snapshot.interaction_id
+            )
+
         return AIAnalysisResponse(
             success=False,
             error=str(e)
@@ -503,13 +798,14 @@ async def generate_dashboard(
 @api_router.post("/ai/approve-dashboard", response_model=dict)
 async def approve_dashboard(
     request: UserApprovalResponse,
-    interaction_id: str,
+    interaction_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Process user approval and apply AI suggestions."""
     try:
-        # Get the AI interaction
+        # Get the AI interaction, writing it first if it is still buffered
+        await interaction_writer.ensure_written(interaction_id)
         interaction_result = await db.execute(
             select(AIInteraction)
             .where(
@@ -522,9 +818,10 @@ async def approve_dashboard(
         if not interaction:
             raise HTTPException(status_code=404, detail="AI interaction not found")
 
+        applied_tasks = 0
         if request.approved:
             # Apply AI suggestions to plan and tasks
-            response_data = json.loads(interaction.response_data)
+            response_data = interaction.response_data or {}
             dashboard_data = response_data.get("dashboard_data", {})
 
             # Update plan with AI-generated data
@@ -535,42 +832,52 @@ async def approve_dashboard(
             plan = plan_result.scalar_one_or_none()
 
             if plan:
-                plan.ai_generated_data = json.dumps(dashboard_data)
+                plan_before = context_stats.plan_summary(plan)
+                plan.ai_generated_data = dashboard_data
                 plan.status = "active"  # Activate the plan with AI suggestions
 
                 # Update tasks with AI categorization and priority
                 priority_analysis = response_data.get("priority_analysis", {})
                 scored_tasks = priority_analysis.get("scored_tasks", [])
 
-                for task_data in scored_tasks:
-                    task_id = task_data.get("id")
-                    if task_id:
-                        task_result = await db.execute(
-                            select(Task)
-                            .where(Task.id == task_id, Task.plan_id == plan.id)
-                        )
-                        task = task_result.scalar_one_or_none()
+                # Collapse category name variants onto the user's canonical categories
+                canonical_categories = await category_normalizer.canonicalize(
+                    current_user.id, [task_data.get("ai_category") for task_data in scored_tasks]
+                )
+
+                changes = await apply_scored_tasks(db, plan.id, scored_tasks, canonical_categories)
+                applied_tasks = len(changes)
+                changes = [change for change in changes if change[0] != change[1]]
 
-                        if task:
-                            task.ai_category = task_data.get("ai_category")
-                            task.ai_priority_score = task_data.get("ai_priority_score")
-                            task.ai_reasoning = task_data.get("ai_reasoning")
+                plan_after = context_stats.plan_summary(plan)
+                if plan_after != plan_before or changes:
+                    await context_stats.apply_plan_change(
+                        db, current_user.id, plan_before, plan_after,
+                        removed_tasks=[before for before, _ in changes],
+                        added_tasks=[after for _, after in changes]
+                    )
 
             # Update interaction with user feedback
             interaction.user_feedback = 5 if request.approved else 2
             if request.feedback:
-                # Add feedback to interaction data
-                current_response = json.loads(interaction.response_data or "{}")
-                current_response["user_feedback"] = request.feedback
-                interaction.response_data = json.dumps(current_response)
+                # Add feedback to interaction data (reassigned so the JSON change is tracked)
+                interaction.response_data = {**response_data, "user_feedback": request.feedback}
 
+        plan_id = interaction.plan_id
+        response_data = interaction.response_data or {}
+        user_feedback = interaction.user_feedback
         await db.commit()
 
+        if request.approved:
+            await read_cache.invalidate(current_user.id, PLANS, TASKS)
+            priority_calibrator.learn_from_feedback(current_user.id, response_data, user_feedback)
+
         return {
             "success": True,
             "message": "Dashboard approval processed successfully",
             "approved": request.approved,
-            "plan_id": interaction.plan_id
+            "plan_id": plan_id,
+            "applied_tasks": applied_tasks
         }
 
     except Exception as e:
@@ -580,21 +887,27 @@ async def approve_dashboard(
 
 @api_router.get("/ai/interaction-history")
 async def get_interaction_history(
+    response: Response,
     plan_id: Optional[UUID] = Query(None),
+    cursor: Optional[str] = Query(None),
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get AI interaction history for user or specific plan."""
-    query = select(AIInteraction).where(AIInteraction.user_id == current_user.id)
+    await interaction_writer.flush_user(current_user.id)
 
-    if plan_id:
-        query = query.where(AIInteraction.plan_id == str(plan_id))
+    query = (
+        select(AIInteraction)
+        .where(AIInteraction.user_id == current_user.id)
+        .options(*_defer_blobs(INTERACTION_BLOBS, None))
+    )
 
-    query = query.order_by(AIInteraction.created_at.desc()).limit(limit)
+    if plan_id:
+        query = query.where(AIInteraction.plan_id == plan_id)
 
-    result = await db.execute(query)
-    interactions = result.scalars().all()
+    result = await db.execute(keyset(query, AIInteraction, cursor, limit))
+    interactions = page(result.scalars().all(), limit, response)
 
     # Convert to dict for JSON response
     return [
@@ -614,29 +927,139 @@ async def get_interaction_history(
     ]
 
 
+@api_router.get("/ai/interactions/{interaction_id}", response_model=AIInteractionSchema)
+async def get_interaction(
+    interaction_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a single AI interaction including its request and response documents."""
+    await interaction_writer.ensure_written(interaction_id)
+    result = await db.execute(
+        select(AIInteraction)
+        .where(AIInteraction.id == interaction_id, AIInteraction.user_id == current_user.id)
+    )
+    interaction = result.scalar_one_or_none()
+    if not interaction:
+        raise HTTPException(status_code=404, detail="AI interaction not found")
+    return interaction
+
+
+@api_router.get("/ai/usage", response_model=List[AIUsageDay])
+async def get_ai_usage(
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get daily AI usage per interaction type and model from the rollups, newest day first."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    result = await db.execute(
+        select(AIInteractionDaily)
+        .where(AIInteractionDaily.user_id == current_user.id, AIInteractionDaily.day >= since)
+        .order_by(AIInteractionDaily.day.desc(), AIInteractionDaily.interaction_type, AIInteractionDaily.model_used)
+    )
+    return result.scalars().all()
+
+@api_router.get("/ai/template-stats", dependencies=[Depends(require_profiling_token)])
+async def get_template_stats(
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get interaction, latency, token and feedback statistics per prompt template version.
+
+    Figures cover the interactions stored in the last days, so every worker answers alike
+    and PostgreSQL scans only the recent monthly partitions. Error and parse-failure rates
+    are never stored and come from this process, under "process".
+    """
+    usage = await template_usage(db, datetime.utcnow() - timedelta(days=days))
+
+    stats = []
+    for template_stats in prompt_registry.stats():
+        key = (template_stats["template_id"], template_stats["version"])
+        entry = usage.get(key, {})
+        stats.append({
+            "template_id": template_stats["template_id"],
+            "version": template_stats["version"],
+            "weight": template_stats["weight"],
+            "interactions": entry.get("interactions", 0),
+            "p50_latency_ms": entry.get("p50_latency_ms"),
+            "p95_latency_ms": entry.get("p95_latency_ms"),
+            "tokens_total": entry.get("tokens_total", 0),
+            "avg_tokens": entry.get("avg_tokens"),
+            "feedback_avg": entry.get("feedback_avg"),
+            "feedback_count": entry.get("feedback_count", 0),
+            "process": {
+                "calls": template_stats["calls"],
+                "error_rate": template_stats["error_rate"],
+                "parse_failure_rate": template_stats["parse_failure_rate"]
+            }
+        })
+    return stats
+
+
+@api_router.get("/auth/cache-stats", dependencies=[Depends(require_profiling_token)])
+async def get_auth_cache_stats():
+    """Get the size and hit/miss counters of the verified-token and user caches of this process."""
+    return auth_cache.stats()
+
+
+@api_router.get("/read-cache/stats", dependencies=[Depends(require_profiling_token)])
+async def get_read_cache_stats():
+    """Get hit rates of the plan and task list cache of this process and the database reads it saved."""
+    return read_cache.stats()
+
+
+@api_router.get("/db/query-stats", dependencies=[Depends(require_profiling_token)])
+async def get_query_stats(limit: int = Query(20, ge=1, le=200)):
+    """Get the statement fingerprints of this process with the most database time."""
+    return {"untracked_calls": query_stats.untracked, "statements": query_stats.top(limit)}
+
+
+@api_router.get("/profiles", dependencies=[Depends(require_profiling_token)])
+async def list_profiles():
+    """List the request profiles kept by this process and the routes with aggregated samples."""
+    return {"profiles": profile_store.summaries(), "aggregates": aggregates.summary()}
+
+
+@api_router.get("/profiles/aggregate", response_class=PlainTextResponse, dependencies=[Depends(require_profiling_token)])
+async def get_aggregate_profile(
+    route: Optional[str] = Query(None, description='One route, e.g. "GET /api/tasks"; all routes by default'),
+    reset: bool = False
+):
+    """Get the hot stacks of sampled requests as collapsed stacks, optionally starting a new window."""
+    collapsed = aggregates.collapsed(route)
+    if reset:
+        aggregates.reset()
+    return collapsed
+
+
+@api_router.get("/profiles/{profile_id}", response_class=PlainTextResponse, dependencies=[Depends(require_profiling_token)])
+async def get_profile(profile_id: str):
+    """Get a request profile as collapsed stacks, for flamegraph.pl or speedscope."""
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.collapsed()
+
+
 @api_router.post("/ai/interaction/{interaction_id}/feedback")
 async def provide_feedback(
-    interaction_id: str,
+    interaction_id: UUID,
     feedback: int = Query(..., ge=1, le=5),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Provide feedback on AI interaction."""
-    interaction_result = await db.execute(
-        select(AIInteraction)
-        .where(
-            AIInteraction.id == interaction_id,
-            AIInteraction.user_id == current_user.id
-        )
-    )
-    interaction = interaction_result.scalar_one_or_none()
-
+    await interaction_writer.ensure_written(interaction_id)
+    interaction = await writes.set_feedback(db, current_user.id, interaction_id, feedback)
     if not interaction:
         raise HTTPException(status_code=404, detail="AI interaction not found")
 
-    interaction.user_feedback = feedback
     await db.commit()
 
+    if interaction.interaction_type in ("ranking", "dashboard"):
+        priority_calibrator.learn_from_feedback(current_user.id, interaction.response_data or {}, feedback)
+
     return {"message": "Feedback recorded successfully"}
 
 
@@ -658,19 +1081,79 @@ async def organize_messy_prompt(
         # Organize the prompt into categories
         result = await ai_service.organize_into_categories(prompt, user_context)
 
-        # Record the AI interaction
-        await ai_service.record_ai_interaction(
+        # Record the AI interaction; it is linked to a plan once the result is saved
+        interaction = await ai_service.record_ai_interaction(
             user_id=str(current_user.id),
-            plan_id=str(current_user.id),  # Using user_id as placeholder since no plan exists yet
+            plan_id=None,
             interaction_type="categorization",
             request_data={"prompt": prompt},
             response_data=result,
-            tokens_used=0,  # Gemini doesn't provide token count
             response_time_ms=0
         )
 
-        return result
+        return {**result, "interaction_id": str(interaction.id)}
 
     except Exception as e:
         logger.error(f"Error organizing prompt: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to organize prompt: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to organize prompt: {str(e)}")
+
+@api_router.post("/ai/organize-prompt/plan", response_model=PlanWithTasks)
+async def save_organized_plan(
+    request: OrganizedPlanCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create a plan and all of its tasks from an organize-prompt result in one transaction."""
+    result, original_thought, interaction = request.result, None, None
+
+    if request.interaction_id:
+        await interaction_writer.ensure_written(request.interaction_id)
+        interaction_result = await db.execute(
+            select(AIInteraction)
+            .where(
+                AIInteraction.id == request.interaction_id,
+                AIInteraction.user_id == current_user.id,
+                AIInteraction.interaction_type == "categorization"
+            )
+            # Locked so concurrent saves of one result cannot both create a plan
+            .with_for_update()
+        )
+        interaction = interaction_result.scalar_one_or_none()
+        if not interaction:
+            raise HTTPException(status_code=404, detail="AI interaction not found")
+        if interaction.plan_id:
+            raise HTTPException(status_code=409, detail=f"AI interaction already saved as plan {interaction.plan_id}")
+        result = interaction.response_data or {}
+        original_thought = (interaction.request_data or {}).get("prompt")
+
+    if not result or not result.get("categories"):
+        raise HTTPException(status_code=400, detail="An organize result or interaction_id is required")
+
+    category_names = [category.get("name") for category in result["categories"]]
+    canonical_categories = await category_normalizer.canonicalize(current_user.id, category_names)
+
+    plan = Plan(
+        user_id=current_user.id,
+        title=request.title or ", ".join(name for name in category_names if name)[:200] or "Organized plan",
+        description=request.description or (result.get("summary") or "")[:1000] or None,
+        original_thought=original_thought,
+        ai_generated_data=result,
+        status="draft"
+    )
+    db.add(plan)
+    await db.flush()
+
+    tasks = await insert_tasks(db, organized_task_rows(plan.id, result, canonical_categories))
+    if interaction:
+        interaction.plan_id = plan.id
+
+    await context_stats.apply_plan_change(
+        db, current_user.id, None, context_stats.plan_summary(plan),
+        added_tasks=[context_stats.task_facts(task) for task in tasks]
+    )
+
+    # Serialize before commit expires the loaded rows
+    response = PlanWithTasks.model_validate({"plan": plan, "tasks": tasks}, from_attributes=True)
+    await db.commit()
+    await read_cache.invalidate(current_user.id, PLANS, TASKS)
+    return response
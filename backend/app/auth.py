@@ -1,24 +1,35 @@
 """Simplified authentication."""
 
+import asyncio
 import uuid
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
 
-from .database import get_db, User
+from .database import USER_ID_KEY, async_session, get_db, User
 from .config import settings
+from .auth_cache import cache_user, cached_user, claims_cache, token_key
+from .timings import timed
 
 security = HTTPBearer()
 
+users_table = User.__table__
 
-async def get_user_from_token(token: str, db: AsyncSession) -> Optional[User]:
-    """Get user from JWT token, creating if doesn't exist."""
-    try:
+# In-flight first-sign-in inserts by subject
+_provisioning: Dict[str, "asyncio.Future[Optional[Dict[str, Any]]]"] = {}
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """Verify a JWT, reusing the claims of tokens already verified and not yet expired."""
+    key = token_key(token)
+    payload = claims_cache.get(key)
+    if payload is None:
         # Decode JWT without audience validation (Supabase tokens have specific audience claims)
         payload = jwt.decode(
             token,
@@ -26,29 +37,76 @@ async def get_user_from_token(token: str, db: AsyncSession) -> Optional[User]:
             algorithms=["HS256"],
             options={"verify_aud": False}  # Skip audience validation
         )
-        user_id = payload.get("sub")
-        if not user_id:
+        if "exp" in payload:
+            claims_cache.set(key, payload, float(payload["exp"]))
+    return payload
+
+
+async def _insert_user(user_id: uuid.UUID, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Insert a user from Supabase auth data unless one already exists, returning the stored row."""
+    email = payload["email"]
+    now = datetime.utcnow()
+    values = {
+        "id": user_id,
+        "email": email,
+        "full_name": payload.get("user_metadata", {}).get("full_name") or email.split("@")[0],
+        "created_at": now,
+        "updated_at": now
+    }
+
+    async with async_session() as session:
+        dialect_insert = postgresql.insert if session.bind.dialect.name == "postgresql" else sqlite.insert
+        result = await session.execute(
+            dialect_insert(users_table).values(**values).on_conflict_do_nothing().returning(*users_table.c)
+        )
+        row = result.first()
+        if row is None:
+            # Another request or worker created the user first
+            row = (await session.execute(select(users_table).where(users_table.c.id == user_id))).first()
+        await session.commit()
+    return dict(row._mapping) if row else None
+
+
+async def provision_user(user_id: uuid.UUID, payload: Dict[str, Any]) -> Optional[User]:
+    """Create a user on first sign-in, sharing one insert between concurrent requests of the subject.
+
+    The insert runs in its own session and outlives a cancelled request, so the other waiters
+    still get the row.
+    """
+    key = str(user_id)
+    pending = _provisioning.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(_insert_user(user_id, payload))
+        _provisioning[key] = pending
+        pending.add_done_callback(lambda _: _provisioning.pop(key, None))
+
+    values = await asyncio.shield(pending)
+    return User(**values) if values else None
+
+
+async def get_user_from_token(token: str, db: AsyncSession) -> Optional[User]:
+    """Get user from JWT token, creating if doesn't exist."""
+    try:
+        payload = verify_token(token)
+        subject = payload.get("sub")
+        if not subject:
             return None
+        user_id = uuid.UUID(str(subject))
+
+        user = cached_user(user_id)
+        if user is not None:
+            return user
 
         # Try to get existing user
         result = await db.execute(select(User).where(User.id == user_id))
         user = result.scalar_one_or_none()
 
         # If user doesn't exist, create them from JWT payload
-        if not user:
-            email = payload.get("email")
-            if email:
-                # Create new user from Supabase auth data
-                user = User(
-                    id=user_id,
-                    email=email,
-                    full_name=payload.get("user_metadata", {}).get("full_name") or email.split("@")[0],
-                    created_at=datetime.utcnow()
-                )
-                db.add(user)
-                await db.commit()
-                await db.refresh(user)
+        if not user and payload.get("email"):
+            user = await provision_user(user_id, payload)
 
+        if user:
+            cache_user(user)
         return user
     except (JWTError, Exception) as e:
         print(f"Error decoding token: {e}")
@@ -60,12 +118,15 @@ async def get_current_user(
     db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get current authenticated user."""
-    user = await get_user_from_token(credentials.credentials, db)
+    with timed("auth"):
+        user = await get_user_from_token(credentials.credentials, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
         )
+    # Commits on this session count as the user's writes for read replica routing
+    db.info[USER_ID_KEY] = user.id
     return user
 
 
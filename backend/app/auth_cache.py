@@ -0,0 +1,45 @@
+"""Bounded in-process caches of verified token claims and user rows."""
+
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+from .config import settings
+from .database import User
+from .expiring_cache import ExpiringCache
+from .metrics import register_cache
+
+# User columns kept in the user cache
+USER_FIELDS = ("id", "email", "full_name", "created_at", "updated_at")
+
+
+def token_key(token: str) -> bytes:
+    """Key a bearer token by its digest so raw tokens are not kept in memory."""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def cache_user(user: User) -> None:
+    """Cache the columns of a user row under its subject."""
+    values = {name: getattr(user, name) for name in USER_FIELDS}
+    user_cache.set(str(user.id), values, time.time() + settings.auth_user_cache_seconds)
+
+
+def cached_user(subject: str) -> Optional[User]:
+    """Get a cached user as a new transient row, so requests never share an instance."""
+    values = user_cache.get(str(subject))
+    return User(**values) if values is not None else None
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Get the counters of both caches."""
+    return {"claims": claims_cache.stats(), "users": user_cache.stats()}
+
+
+# Verified claims by token digest, each kept until the token's exp
+claims_cache = ExpiringCache(settings.auth_claims_cache_size)
+
+# User rows by subject, kept for auth_user_cache_seconds
+user_cache = ExpiringCache(settings.auth_user_cache_size)
+
+register_cache("auth_claims", lambda: (claims_cache.hits, claims_cache.misses))
+register_cache("auth_users", lambda: (user_cache.hits, user_cache.misses))
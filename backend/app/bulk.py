@@ -0,0 +1,175 @@
+"""Set-based bulk writes of AI results."""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Integer, String, Text, Update, Uuid, bindparam, cast, column, insert, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .context_stats import TaskFacts
+from .database import Task
+
+tasks_table = Task.__table__
+
+TaskChange = Tuple[TaskFacts, TaskFacts]
+
+# Task statuses of an organize-prompt result, in display order
+ORGANIZED_STATUSES = ("todo", "doing", "upcoming")
+
+
+def scored_rows(scored_tasks: Iterable[Dict[str, Any]], categories: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Build one update row per scored task, mapping categories to their canonical names."""
+    rows: Dict[UUID, Dict[str, Any]] = {}
+    for task_data in scored_tasks:
+        try:
+            task_id = UUID(str(task_data.get("id")))
+        except ValueError:
+            continue
+
+        category = task_data.get("ai_category")
+        # Later entries for the same task win, as they did when applied one by one
+        rows[task_id] = {
+            "task_id": task_id,
+            "ai_category": categories.get(category, category),
+            "ai_priority_score": task_data.get("ai_priority_score"),
+            "ai_reasoning": task_data.get("ai_reasoning"),
+        }
+    return list(rows.values())
+
+
+def _update_from_values_statement(plan_id: UUID, rows: List[Dict[str, Any]]) -> Update:
+    """Build the UPDATE ... FROM (VALUES ...) of scored rows, returning old and new facts."""
+    scored = values(
+        column("task_id", Uuid),
+        column("ai_category", String),
+        column("ai_priority_score", Integer),
+        column("ai_reasoning", Text),
+        name="scored"
+    ).data([
+        (row["task_id"], row["ai_category"], row["ai_priority_score"], row["ai_reasoning"])
+        for row in rows
+    ])
+    # Joined rows are read from the statement snapshot, so they hold the pre-update values
+    old = tasks_table.alias("old")
+
+    return (
+        update(tasks_table)
+        .where(
+            tasks_table.c.id == scored.c.task_id,
+            tasks_table.c.plan_id == plan_id,
+            old.c.id == tasks_table.c.id
+        )
+        .values(
+            ai_category=scored.c.ai_category,
+            # NULLs are rendered inline, so an all-NULL column would otherwise be typed as text
+            ai_priority_score=cast(scored.c.ai_priority_score, Integer),
+            ai_reasoning=scored.c.ai_reasoning
+        )
+        .returning(old.c.ai_category.label("old_category"), tasks_table.c.ai_category,
+                   tasks_table.c.priority, tasks_table.c.status)
+    )
+
+
+async def _update_from_values(session: AsyncSession, plan_id: UUID, rows: List[Dict[str, Any]]) -> List[TaskChange]:
+    """Apply all rows in one UPDATE ... FROM (VALUES ...), returning old and new facts."""
+    result = await session.execute(_update_from_values_statement(plan_id, rows))
+    return [
+        (TaskFacts(row.old_category, row.priority, row.status),
+         TaskFacts(row.ai_category, row.priority, row.status))
+        for row in result.all()
+    ]
+
+
+async def _update_executemany(session: AsyncSession, plan_id: UUID, rows: List[Dict[str, Any]]) -> List[TaskChange]:
+    """Apply all rows with one batched UPDATE for backends without UPDATE ... FROM (VALUES ...)."""
+    result = await session.execute(
+        select(tasks_table.c.id, tasks_table.c.ai_category, tasks_table.c.priority, tasks_table.c.status)
+        .where(tasks_table.c.plan_id == plan_id, tasks_table.c.id.in_([row["task_id"] for row in rows]))
+    )
+    existing = {row.id: row for row in result.all()}
+    rows = [row for row in rows if row["task_id"] in existing]
+    if not rows:
+        return []
+
+    await session.execute(
+        update(tasks_table)
+        .where(tasks_table.c.id == bindparam("task_id"), tasks_table.c.plan_id == plan_id)
+        .values(
+            ai_category=bindparam("ai_category"),
+            ai_priority_score=bindparam("ai_priority_score"),
+            ai_reasoning=bindparam("ai_reasoning")
+        ),
+        rows
+    )
+
+    changes = []
+    for row in rows:
+        old = existing[row["task_id"]]
+        changes.append((
+            TaskFacts(old.ai_category, old.priority, old.status),
+            TaskFacts(row["ai_category"], old.priority, old.status)
+        ))
+    return changes
+
+
+async def apply_scored_tasks(
+    session: AsyncSession,
+    plan_id: UUID,
+    scored_tasks: Iterable[Dict[str, Any]],
+    categories: Dict[str, str]
+) -> List[TaskChange]:
+    """Write AI categories, scores and reasoning onto a plan's tasks in one statement.
+
+    Tasks outside the plan are ignored. Returns the (before, after) facts of every applied task.
+    """
+    rows = scored_rows(scored_tasks, categories)
+    if not rows:
+        return []
+
+    if session.bind.dialect.name == "postgresql":
+        return await _update_from_values(session, plan_id, rows)
+    return await _update_executemany(session, plan_id, rows)
+
+
+def _score(value: Any) -> Optional[int]:
+    """Coerce an AI priority into the 1-10 score range."""
+    try:
+        return min(max(int(value), 1), 10)
+    except (TypeError, ValueError):
+        return None
+
+
+def organized_task_rows(plan_id: UUID, result: Dict[str, Any], categories: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Build task rows from an organize-prompt result, mapping categories to their canonical names."""
+    rows = []
+    for category in result.get("categories", []):
+        name = category.get("name")
+        tasks_by_status = category.get("tasks") or {}
+
+        for status in ORGANIZED_STATUSES:
+            for task_data in tasks_by_status.get(status) or []:
+                title = (task_data.get("title") or "").strip()
+                if not title:
+                    continue
+
+                score = _score(task_data.get("priority"))
+                rows.append({
+                    "plan_id": plan_id,
+                    "title": title[:200],
+                    "description": task_data.get("description"),
+                    "priority": (score + 1) // 2 if score else 3,
+                    "status": status,
+                    "ai_category": categories.get(name, name),
+                    "ai_priority_score": score,
+                    "ai_reasoning": task_data.get("reasoning"),
+                })
+    return rows
+
+
+async def insert_tasks(session: AsyncSession, rows: List[Dict[str, Any]]) -> List[Task]:
+    """Insert tasks with multi-row INSERT ... RETURNING, returning them in input order."""
+    if not rows:
+        return []
+
+    result = await session.scalars(insert(Task).returning(Task, sort_by_parameter_order=True), rows)
+    return list(result.all())
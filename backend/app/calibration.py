@@ -0,0 +1,309 @@
+"""Local priority calibration learned from user feedback and task edits."""
+
+import logging
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .database import AIInteraction, PriorityEdit, async_session
+
+logger = logging.getLogger(__name__)
+
+# Name recorded as the model for locally re-ranked interactions
+LOCAL_MODEL_NAME = "local-calibration"
+
+# Hashed feature space; the first slots hold the dense features
+NUM_FEATURES = 2 ** 12
+BIAS, PRIORITY, AI_SCORE = 0, 1, 2
+DENSE_FEATURES = 3
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+Features = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _bucket(name: str) -> int:
+    """Map a feature name to a stable hashed slot."""
+    return DENSE_FEATURES + zlib.crc32(name.encode("utf-8")) % (NUM_FEATURES - DENSE_FEATURES)
+
+
+def base_score(task: Dict[str, Any]) -> float:
+    """Get the uncalibrated 1-10 score of a task, from before any recalibration."""
+    if task.get("raw_ai_priority_score"):
+        return float(task["raw_ai_priority_score"])
+    if task.get("ai_priority_score"):
+        return float(task["ai_priority_score"])
+    return float(task.get("priority") or 3) * 2
+
+
+def task_features(task: Dict[str, Any], previous_status: Optional[str] = None) -> Features:
+    """Extract sparse features from a task as (indices, values, token indices)."""
+    text = f"{task.get('title') or ''} {task.get('description') or ''}".lower()
+    tokens = set(TOKEN_PATTERN.findall(text))
+    token_indices = np.array(sorted({_bucket(f"tok:{token}") for token in tokens}), dtype=np.int64)
+
+    names = []
+    if task.get("ai_category"):
+        names.append(f"cat:{task['ai_category'].strip().lower()}")
+    if task.get("status"):
+        names.append(f"status:{task['status']}")
+        if previous_status and previous_status != task["status"]:
+            names.append(f"transition:{previous_status}>{task['status']}")
+
+    indices = [BIAS, PRIORITY, AI_SCORE] + [_bucket(name) for name in names]
+    values = [
+        1.0,
+        float(task.get("priority") or 3) / 5,
+        base_score(task) / 10
+    ] + [1.0] * len(names)
+
+    # Token weights are normalized so long descriptions don't dominate
+    if len(token_indices):
+        indices.extend(token_indices.tolist())
+        values.extend([1.0 / np.sqrt(len(token_indices))] * len(token_indices))
+
+    return np.array(indices, dtype=np.int64), np.array(values, dtype=np.float64), token_indices
+
+
+class CalibrationModel:
+    """Linear model over hashed task features, trained online with normalized LMS."""
+
+    def __init__(self, learning_rate: float):
+        """Initialize an untrained model."""
+        self.learning_rate = learning_rate
+        self.weights = np.zeros(NUM_FEATURES)
+        self.seen = np.zeros(NUM_FEATURES, dtype=np.int64)
+        self.samples = 0
+
+    def predict(self, indices: np.ndarray, values: np.ndarray) -> float:
+        """Predict the score correction for a task."""
+        return float(self.weights[indices] @ values)
+
+    def update(self, indices: np.ndarray, values: np.ndarray, target: float, weight: float = 1.0) -> float:
+        """Take one gradient step towards the target correction and return the new prediction."""
+        error = target - self.predict(indices, values)
+        step = self.learning_rate * weight * error / float(values @ values)
+        np.add.at(self.weights, indices, step * values)
+        np.add.at(self.seen, indices, 1)
+        self.samples += 1
+        return self.predict(indices, values)
+
+
+class PriorityCalibrator:
+    """Global and per-user calibration of AI priority scores."""
+
+    def __init__(self, min_samples: int, novelty_threshold: float, learning_rate: float):
+        """Initialize the calibrator."""
+        self.min_samples = min_samples
+        self.novelty_threshold = novelty_threshold
+        self.learning_rate = learning_rate
+        self.global_model = CalibrationModel(learning_rate)
+        self.user_models: Dict[str, CalibrationModel] = {}
+
+    def _user_model(self, user_id: Any) -> CalibrationModel:
+        """Get or create the model for a user."""
+        key = str(user_id)
+        if key not in self.user_models:
+            self.user_models[key] = CalibrationModel(self.learning_rate)
+        return self.user_models[key]
+
+    def _corrections(self, user_id: Any, indices: np.ndarray, values: np.ndarray) -> Tuple[float, float]:
+        """Get the global and per-user score corrections for a task."""
+        global_correction = 0.0
+        if self.global_model.samples >= self.min_samples:
+            global_correction = self.global_model.predict(indices, values)
+
+        user_correction = 0.0
+        user_model = self.user_models.get(str(user_id))
+        if user_model and user_model.samples >= self.min_samples:
+            user_correction = user_model.predict(indices, values)
+
+        return global_correction, user_correction
+
+    def calibrate(self, user_id: Any, task: Dict[str, Any]) -> float:
+        """Get the calibrated 1-10 priority score of a task."""
+        indices, values, _ = task_features(task)
+        global_correction, user_correction = self._corrections(user_id, indices, values)
+        return float(np.clip(base_score(task) + global_correction + user_correction, 1, 10))
+
+    def is_novel(self, task: Dict[str, Any]) -> bool:
+        """Check whether a task is unlike anything the global model was trained on."""
+        if not task.get("ai_priority_score") or self.global_model.samples < self.min_samples:
+            return True
+
+        _, _, token_indices = task_features(task)
+        if not len(token_indices):
+            return True
+
+        coverage = float(np.mean(self.global_model.seen[token_indices] > 0))
+        return coverage < self.novelty_threshold
+
+    def learn(
+        self,
+        user_id: Any,
+        task: Dict[str, Any],
+        target_score: float,
+        weight: float = 1.0,
+        previous_status: Optional[str] = None
+    ) -> None:
+        """Train the global and user models towards a target 1-10 score."""
+        indices, values, _ = task_features(task, previous_status)
+        residual = float(target_score) - base_score(task)
+
+        # The user model learns what the global model gets wrong for this user
+        global_prediction = self.global_model.update(indices, values, residual, weight)
+        self._user_model(user_id).update(indices, values, residual - global_prediction, weight)
+
+    def learn_from_edit(
+        self,
+        user_id: Any,
+        task: Dict[str, Any],
+        new_priority: int,
+        previous_status: Optional[str] = None
+    ) -> None:
+        """Train from a user overriding the priority of an AI-scored task."""
+        if not task.get("ai_priority_score"):
+            return
+        self.learn(user_id, task, new_priority * 2, previous_status=previous_status)
+
+    def record_edit(
+        self,
+        session: AsyncSession,
+        user_id: Any,
+        task_id: Any,
+        task: Dict[str, Any],
+        new_priority: int,
+        previous_status: Optional[str] = None
+    ) -> bool:
+        """Add a priority override to the session so warm starts replay it; False if it teaches nothing."""
+        if not task.get("ai_priority_score"):
+            return False
+        session.add(PriorityEdit(
+            user_id=user_id,
+            task_id=task_id,
+            task=task,
+            new_priority=new_priority,
+            previous_status=previous_status
+        ))
+        return True
+
+    def learn_from_feedback(self, user_id: Any, response_data: Dict[str, Any], feedback: int) -> int:
+        """Train from a feedback rating on a ranking or dashboard interaction."""
+        scored_tasks = response_data.get("scored_tasks")
+        if scored_tasks is None:
+            scored_tasks = response_data.get("priority_analysis", {}).get("scored_tasks", [])
+
+        # Good ratings confirm the scores shown (calibrated where they were), bad ones pull
+        # towards the user's own priorities; both are measured from the raw model score
+        if feedback >= 4:
+            weight = (feedback - 3) / 2
+        elif feedback <= 2:
+            weight = (3 - feedback) / 2
+        else:
+            return 0
+
+        learned = 0
+        for task in scored_tasks:
+            if not task.get("ai_priority_score"):
+                continue
+            target = float(task["ai_priority_score"]) if feedback >= 4 else float(task.get("priority") or 3) * 2
+            self.learn(user_id, task, target, weight)
+            learned += 1
+        return learned
+
+    def calibrate_scored(self, user_id: Any, scored_tasks: List[Dict[str, Any]]) -> None:
+        """Recalibrate AI-scored tasks in place, keeping the raw model score."""
+        for task in scored_tasks:
+            if not task.get("ai_priority_score"):
+                continue
+            calibrated = round(self.calibrate(user_id, task))
+            if calibrated != task["ai_priority_score"]:
+                task["raw_ai_priority_score"] = task["ai_priority_score"]
+                task["ai_priority_score"] = calibrated
+
+    def rerank(self, user_id: Any, tasks: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Re-rank tasks locally, or return None if any of them needs the LLM."""
+        if not tasks or any(self.is_novel(task) for task in tasks):
+            return None
+
+        scored_tasks = []
+        for task in tasks:
+            task_data = task.copy()
+            task_data["raw_ai_priority_score"] = base_score(task)
+            task_data["ai_priority_score"] = round(self.calibrate(user_id, task))
+            task_data["ai_reasoning"] = task.get("ai_reasoning") or "Re-ranked from your past priority adjustments"
+            scored_tasks.append(task_data)
+
+        scored_tasks.sort(key=lambda task: task["ai_priority_score"], reverse=True)
+
+        return {
+            "scored_tasks": scored_tasks,
+            "recommendations": ["Scores recalibrated locally from your feedback and edits"],
+            "unscored_tasks": [],
+            "calibration": {"source": "local", "model": LOCAL_MODEL_NAME}
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get training statistics."""
+        return {
+            "global_samples": self.global_model.samples,
+            "users": len(self.user_models),
+            "trained_users": sum(
+                1 for model in self.user_models.values() if model.samples >= self.min_samples
+            )
+        }
+
+    async def warm_start(self, limit: int) -> int:
+        """Replay recent rated interactions and priority edits so the models survive restarts."""
+        async with async_session() as session:
+            # Only the scored tasks are fetched, not the whole response document
+            result = await session.execute(
+                select(
+                    AIInteraction.user_id,
+                    AIInteraction.response_data["scored_tasks"].label("scored_tasks"),
+                    AIInteraction.response_data[("priority_analysis", "scored_tasks")].label("dashboard_tasks"),
+                    AIInteraction.user_feedback,
+                    AIInteraction.created_at
+                )
+                .where(
+                    AIInteraction.user_feedback.is_not(None),
+                    AIInteraction.interaction_type.in_(["ranking", "dashboard"])
+                )
+                .order_by(AIInteraction.created_at.desc())
+                .limit(limit)
+            )
+            ratings = result.all()
+
+            result = await session.execute(
+                select(PriorityEdit).order_by(PriorityEdit.created_at.desc()).limit(limit)
+            )
+            edits = result.scalars().all()
+
+        # Both kinds of signal are replayed oldest first, as they were learned
+        events = sorted([*ratings, *edits], key=lambda event: event.created_at)
+
+        learned = 0
+        for event in events:
+            try:
+                if isinstance(event, PriorityEdit):
+                    self.learn_from_edit(event.user_id, event.task, event.new_priority, event.previous_status)
+                    learned += 1
+                else:
+                    scored_tasks = event.scored_tasks or event.dashboard_tasks or []
+                    learned += self.learn_from_feedback(event.user_id, {"scored_tasks": scored_tasks}, event.user_feedback)
+            except (ValueError, AttributeError, TypeError) as e:
+                logger.warning(f"Skipping event during calibration warm start: {str(e)}")
+        return learned
+
+
+# Global priority calibrator instance
+priority_calibrator = PriorityCalibrator(
+    min_samples=settings.calibration_min_samples,
+    novelty_threshold=settings.calibration_novelty_threshold,
+    learning_rate=settings.calibration_learning_rate
+)
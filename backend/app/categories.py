@@ -0,0 +1,161 @@
+"""Per-user canonicalization of AI-assigned task categories."""
+
+import logging
+import re
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from .database import CanonicalCategory, async_session
+
+logger = logging.getLogger(__name__)
+
+# Seed taxonomy matched after a user's own categories
+DEFAULT_CATEGORIES = [
+    "Development", "Design", "Marketing", "Research", "Testing", "Deployment",
+    "Planning", "Documentation", "Learning", "Infrastructure", "Security", "Performance",
+]
+
+# Words that don't distinguish one category from another
+STOPWORDS = {"and", "the", "of", "for", "to", "a", "an", "task", "tasks", "work", "general", "misc", "stuff"}
+
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+Entry = Tuple[str, str, FrozenSet[str]]
+
+
+def category_key(name: str) -> str:
+    """Normalize a category name into its lookup key."""
+    return NON_ALNUM.sub(" ", name.lower()).strip()
+
+
+def category_tokens(key: str) -> FrozenSet[str]:
+    """Get the distinguishing tokens of a category key."""
+    tokens = frozenset(token for token in key.split() if token not in STOPWORDS)
+    return tokens or frozenset(key.split())
+
+
+def _is_abbreviation(short: FrozenSet[str], long: FrozenSet[str]) -> bool:
+    """Check whether every token of one name abbreviates a token of the other."""
+    return all(
+        len(token) >= 3 and any(other.startswith(token) for other in long)
+        for token in short
+    )
+
+
+def match_score(key: str, tokens: FrozenSet[str], candidate: Entry) -> float:
+    """Score how likely two category names mean the same thing (0-1)."""
+    _, candidate_key, candidate_tokens = candidate
+    if key == candidate_key:
+        return 1.0
+    if not tokens or not candidate_tokens:
+        return 0.0
+
+    # "Development" vs "Software Development"
+    if tokens <= candidate_tokens or candidate_tokens <= tokens:
+        return 0.95
+
+    # "Dev" vs "Development"
+    if _is_abbreviation(tokens, candidate_tokens) or _is_abbreviation(candidate_tokens, tokens):
+        return 0.9
+
+    # "Developement" vs "Development": every token needs a close counterpart
+    if len(tokens) != len(candidate_tokens):
+        return len(tokens & candidate_tokens) / len(tokens | candidate_tokens)
+    return min(
+        max(SequenceMatcher(None, token, other).ratio() for other in candidate_tokens)
+        for token in tokens
+    )
+
+
+class CategoryNormalizer:
+    """Maps raw category names onto each user's canonical category table."""
+
+    def __init__(self, threshold: float = 0.85, max_users: int = 1024):
+        """Initialize the normalizer."""
+        self.threshold = threshold
+        self.max_users = max_users
+        self._defaults: List[Entry] = [self._entry(name) for name in DEFAULT_CATEGORIES]
+        self._canonical: "OrderedDict[str, List[Entry]]" = OrderedDict()
+
+    @staticmethod
+    def _entry(name: str) -> Entry:
+        """Build a matchable entry for a category name."""
+        key = category_key(name)
+        return name, key, category_tokens(key)
+
+    def best_match(self, name: str, candidates: Iterable[Entry]) -> Optional[str]:
+        """Find the canonical name that best matches a raw category name."""
+        key = category_key(name)
+        tokens = category_tokens(key)
+
+        best_name, best_score = None, 0.0
+        for candidate in candidates:
+            score = match_score(key, tokens, candidate)
+            if score > best_score:
+                best_name, best_score = candidate[0], score
+        return best_name if best_score >= self.threshold else None
+
+    async def _load(self, user_id: str) -> List[Entry]:
+        """Load a user's canonical categories, cached in process."""
+        if user_id in self._canonical:
+            self._canonical.move_to_end(user_id)
+            return self._canonical[user_id]
+
+        async with async_session() as session:
+            result = await session.execute(
+                select(CanonicalCategory.name)
+                .where(CanonicalCategory.user_id == UUID(user_id))
+                .order_by(CanonicalCategory.created_at)
+            )
+            entries = [self._entry(name) for name in result.scalars().all()]
+
+        self._canonical[user_id] = entries
+        if len(self._canonical) > self.max_users:
+            self._canonical.popitem(last=False)
+        return entries
+
+    async def _add(self, user_id: str, names: List[str]) -> None:
+        """Persist new canonical categories for a user."""
+        async with async_session() as session:
+            for name in names:
+                session.add(CanonicalCategory(user_id=UUID(user_id), name=name, key=category_key(name)))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Another request added one of them first; reload on next use
+                await session.rollback()
+                self._canonical.pop(user_id, None)
+                logger.info(f"Concurrent category registration for user {user_id}, reloading")
+
+    async def canonicalize(self, user_id, names: Iterable[Optional[str]]) -> Dict[str, str]:
+        """Map raw category names to canonical ones, registering new categories."""
+        user_id = str(user_id)
+        entries = await self._load(user_id)
+
+        mapping: Dict[str, str] = {}
+        new_names: List[str] = []
+        for name in names:
+            if not name or not name.strip() or name in mapping:
+                continue
+
+            canonical = self.best_match(name, entries) or self.best_match(name, self._defaults)
+            if canonical is None:
+                canonical = name.strip()
+
+            if not any(entry[0] == canonical for entry in entries):
+                entries.append(self._entry(canonical))
+                new_names.append(canonical)
+            mapping[name] = canonical
+
+        if new_names:
+            await self._add(user_id, new_names)
+        return mapping
+
+
+# Global category normalizer instance
+category_normalizer = CategoryNormalizer()
@@ -0,0 +1,168 @@
+"""Negotiated gzip/brotli compression of large and streamed responses."""
+
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+# Media types worth compressing; images and already compressed formats are left alone
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "image/svg+xml")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick brotli or gzip from an Accept-Encoding header, or None for identity."""
+    offered = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = max(candidates, key=lambda name: offered.get(name, offered.get("*", 0.0)))
+    return best if offered.get(best, offered.get("*", 0.0)) > 0 else None
+
+
+class _Encoder:
+    """Incremental encoder whose every chunk can be decoded on arrival."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        """Start a gzip or brotli stream."""
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress data and flush it, so streamed events are not held back."""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the last data and end the stream."""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def _with_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """Add Accept-Encoding to the Vary header of a response."""
+    vary = [value for name, value in headers if name.lower() == b"vary"]
+    listed = {item.strip().lower() for value in vary for item in value.split(b",")}
+    if b"accept-encoding" in listed or b"*" in listed:
+        return headers
+    others = [(name, value) for name, value in headers if name.lower() != b"vary"]
+    return others + [(b"vary", b", ".join(vary + [b"Accept-Encoding"]))]
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies in the encoding the client prefers.
+
+    Complete bodies under minimum_size (most CRUD responses) are sent as-is. Streamed bodies
+    (server-sent events, NDJSON) are compressed chunk by chunk with a flush after each one.
+    Every response of a compressible type carries Vary: Accept-Encoding, compressed or not,
+    so shared caches keep the identity and encoded variants apart.
+    """
+
+    def __init__(self, app: Any, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        """Wrap an ASGI app."""
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Handle a request, compressing its response when negotiated."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        await self.app(scope, receive, _CompressingSend(send, encoding, self))
+
+
+class _CompressingSend:
+    """ASGI send wrapper that decides on compression once the first body chunk is known."""
+
+    def __init__(self, send: Any, encoding: Optional[str], middleware: CompressionMiddleware):
+        """Wrap the server's send callable; encoding is None when the client accepts none."""
+        self.send = send
+        self.encoding = encoding
+        self.middleware = middleware
+        self.start: Optional[Dict[str, Any]] = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    @staticmethod
+    def _compressible_type(headers: List[Tuple[bytes, bytes]]) -> bool:
+        """Whether the response has a media type worth compressing."""
+        content_type = next((value for name, value in headers if name.lower() == b"content-type"), b"")
+        return content_type.decode("latin-1").startswith(COMPRESSIBLE_TYPES)
+
+    def _compressible(self, headers: List[Tuple[bytes, bytes]]) -> bool:
+        """Whether the response has a compressible type and no encoding yet."""
+        if any(name.lower() == b"content-encoding" for name, _ in headers) or self.start["status"] in (204, 304):
+            return False
+        return self._compressible_type(headers)
+
+    async def _send_start(self, headers: List[Tuple[bytes, bytes]], length: Optional[int] = None) -> None:
+        """Send the held response start with compression headers and the encoded length, if known."""
+        headers = [(name, value) for name, value in headers if name.lower() != b"content-length"]
+        headers = _with_vary(headers) + [(b"content-encoding", self.encoding.encode())]
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        await self.send({**self.start, "headers": headers})
+
+    async def __call__(self, message: Dict[str, Any]) -> None:
+        """Forward a message, compressing body chunks when the response qualifies."""
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.encoder is None:
+            headers = list(self.start.get("headers", []))
+            small = not more_body and len(body) < self.middleware.minimum_size
+            if self.encoding is None or small or not self._compressible(headers):
+                self.passthrough = True
+                if self._compressible_type(headers):
+                    headers = _with_vary(headers)
+                await self.send({**self.start, "headers": headers})
+                await self.send(message)
+                return
+
+            self.encoder = _Encoder(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            if not more_body:
+                compressed = self.encoder.finish(body)
+                await self._send_start(headers, len(compressed))
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            # Streamed: the length is unknown until the stream ends
+            await self._send_start(headers)
+
+        data = self.encoder.chunk(body) if more_body else self.encoder.finish(body)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+
+def compression_options() -> Dict[str, int]:
+    """Get the middleware options from the settings."""
+    return {
+        "minimum_size": settings.compression_minimum_size,
+        "gzip_level": settings.compression_gzip_level,
+        "brotli_quality": settings.compression_brotli_quality
+    }
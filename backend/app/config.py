@@ -15,6 +15,11 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = Field(..., env="DATABASE_URL")
+    # Comma-separated read replica URLs; read-only endpoints fall back to the primary without them
+    database_replica_urls: str = Field(default="", env="DATABASE_REPLICA_URLS")
+    database_replica_check_seconds: int = Field(default=10, env="DATABASE_REPLICA_CHECK_SECONDS")
+    # Reads of a user who just committed a write stay on the primary for this long
+    read_your_writes_seconds: float = Field(default=5.0, env="READ_YOUR_WRITES_SECONDS")
 
     # Supabase
     supabase_url: str = Field(..., env="SUPABASE_URL")
@@ -22,11 +27,94 @@ class Settings(BaseSettings):
     supabase_service_key: str = Field(..., env="SUPABASE_SERVICE_KEY")
     supabase_jwt_secret: str = Field(..., env="SUPABASE_JWT_SECRET")
 
+    # Auth caches: verified token claims are kept until the token expires, user rows for
+    # auth_user_cache_seconds (0 entries disables a cache)
+    auth_claims_cache_size: int = Field(default=10000, env="AUTH_CLAIMS_CACHE_SIZE")
+    auth_user_cache_size: int = Field(default=10000, env="AUTH_USER_CACHE_SIZE")
+    auth_user_cache_seconds: float = Field(default=60.0, env="AUTH_USER_CACHE_SECONDS")
+
     # Gemini AI
     google_api_key: str = Field(..., env="GOOGLE_API_KEY")
     gemini_model: str = Field(default="gemini-2.5-flash", env="GEMINI_MODEL")
     gemini_temperature: float = Field(default=0.3, env="GEMINI_TEMPERATURE")
     gemini_max_tokens: int = Field(default=2048, env="GEMINI_MAX_TOKENS")
+    prompt_templates_file: Optional[str] = Field(default=None, env="PROMPT_TEMPLATES_FILE")
+
+    # Dashboard cache (seconds since the suggestion was computed)
+    dashboard_cache_ttl_seconds: int = Field(default=900, env="DASHBOARD_CACHE_TTL_SECONDS")
+    dashboard_cache_stale_seconds: int = Field(default=86400, env="DASHBOARD_CACHE_STALE_SECONDS")
+
+    # Per-user cache of plan and task lists; a TTL of 0 disables it
+    read_cache_ttl_seconds: float = Field(default=300.0, env="READ_CACHE_TTL_SECONDS")
+    read_cache_max_entries: int = Field(default=10000, env="READ_CACHE_MAX_ENTRIES")
+    # Optional shared Redis-compatible tier, e.g. redis://localhost:6379/0 (needs the redis package)
+    read_cache_redis_url: str = Field(default="", env="READ_CACHE_REDIS_URL")
+
+    # Local priority calibration
+    calibration_min_samples: int = Field(default=20, env="CALIBRATION_MIN_SAMPLES")
+    calibration_novelty_threshold: float = Field(default=0.6, env="CALIBRATION_NOVELTY_THRESHOLD")
+    calibration_learning_rate: float = Field(default=0.1, env="CALIBRATION_LEARNING_RATE")
+    calibration_warm_start_limit: int = Field(default=5000, env="CALIBRATION_WARM_START_LIMIT")
+
+    # Write-behind buffer of AI interactions: rows are inserted in batches of up to
+    # ai_interaction_batch_size at least every ai_interaction_flush_seconds
+    ai_interaction_batch_size: int = Field(default=100, env="AI_INTERACTION_BATCH_SIZE")
+    ai_interaction_flush_seconds: float = Field(default=1.0, env="AI_INTERACTION_FLUSH_SECONDS")
+    # Buffered rows above which requests wait for a flush; the oldest are dropped if it fails
+    ai_interaction_max_pending: int = Field(default=5000, env="AI_INTERACTION_MAX_PENDING")
+
+    # AI interaction partitions, retention and daily rollups
+    # Months of raw interactions kept; older partitions are rolled up and removed (0 keeps everything)
+    ai_interactions_retention_months: int = Field(default=12, env="AI_INTERACTIONS_RETENTION_MONTHS")
+    # "detach" keeps expired partitions as standalone archive tables, "drop" deletes them
+    ai_interactions_retention_mode: str = Field(default="detach", env="AI_INTERACTIONS_RETENTION_MODE")
+    ai_interactions_maintenance_seconds: int = Field(default=3600, env="AI_INTERACTIONS_MAINTENANCE_SECONDS")
+
+    # Response compression: gzip, or brotli when the brotli package is installed; complete
+    # bodies smaller than compression_minimum_size bytes are sent uncompressed
+    compression_minimum_size: int = Field(default=1024, env="COMPRESSION_MINIMUM_SIZE")
+    compression_gzip_level: int = Field(default=6, env="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(default=4, env="COMPRESSION_BROTLI_QUALITY")
+
+    # Server-Timing breakdown: share of requests timed (0 disables it), and the duration from
+    # which a timed request is also logged
+    server_timing_sample_rate: float = Field(default=1.0, env="SERVER_TIMING_SAMPLE_RATE")
+    server_timing_log_min_ms: float = Field(default=250.0, env="SERVER_TIMING_LOG_MIN_MS")
+
+    # Prometheus metrics at /metrics, and how often event loop lag is sampled
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
+    metrics_event_loop_interval_seconds: float = Field(default=0.5, env="METRICS_EVENT_LOOP_INTERVAL_SECONDS")
+
+    # Tracing: TRACING_EXPORTER is "jsonl" (spans appended to tracing_file), "otlp" (posted to
+    # an OTLP/HTTP collector) or empty to keep trace ids without exporting spans
+    tracing_exporter: str = Field(default="", env="TRACING_EXPORTER")
+    tracing_file: str = Field(default="traces.jsonl", env="TRACING_FILE")
+    tracing_otlp_endpoint: str = Field(default="http://localhost:4318", env="TRACING_OTLP_ENDPOINT")
+    tracing_sample_rate: float = Field(default=1.0, env="TRACING_SAMPLE_RATE")
+    tracing_flush_seconds: float = Field(default=2.0, env="TRACING_FLUSH_SECONDS")
+    # Finished spans buffered for export; the oldest are dropped beyond it
+    tracing_max_pending: int = Field(default=10000, env="TRACING_MAX_PENDING")
+
+    # Query log: statements taking at least slow_query_ms are logged (with their EXPLAIN plan in
+    # debug mode, 0 disables it), and requests running query_count_warn or more statements
+    slow_query_ms: float = Field(default=200.0, env="SLOW_QUERY_MS")
+    query_count_warn: int = Field(default=50, env="QUERY_COUNT_WARN")
+    query_stats_max_fingerprints: int = Field(default=1000, env="QUERY_STATS_MAX_FINGERPRINTS")
+
+    # Profiling: requests carrying profiling_token in an X-Profile-Token header (never the query
+    # string) are profiled and kept for /api/profiles; empty disables it. A
+    # profiling_sample_rate share of requests to profiling_sample_paths is profiled into
+    # per-route aggregates. Stacks are sampled every profiling_interval_ms
+    profiling_token: str = Field(default="", env="PROFILING_TOKEN")
+    profiling_interval_ms: float = Field(default=5.0, env="PROFILING_INTERVAL_MS")
+    profiling_max_profiles: int = Field(default=50, env="PROFILING_MAX_PROFILES")
+    # Directory profiles are also written to as collapsed stacks; empty keeps them in memory only
+    profiling_dir: str = Field(default="", env="PROFILING_DIR")
+    profiling_sample_rate: float = Field(default=0.0, env="PROFILING_SAMPLE_RATE")
+    # Comma-separated request paths
+    profiling_sample_paths: str = Field(default="/api/ai/organize-prompt,/api/tasks", env="PROFILING_SAMPLE_PATHS")
+    # Distinct stacks kept per aggregated route; further ones are counted as "[other]"
+    profiling_max_stacks: int = Field(default=2000, env="PROFILING_MAX_STACKS")
 
     # CORS
     cors_origins: list[str] = Field(
@@ -0,0 +1,217 @@
+"""Incrementally maintained per-user context aggregates."""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import Plan, Task, UserContextStats
+
+# Number of most recent plans summarized in the context
+RECENT_PLANS = 10
+
+PRIORITY_LEVELS = {
+    "high": "5",
+    "medium_high": "4",
+    "medium": "3",
+    "medium_low": "2",
+    "low": "1",
+}
+
+
+class TaskFacts(NamedTuple):
+    """The parts of a task that contribute to the context aggregate."""
+    category: Optional[str]
+    priority: Optional[int]
+    status: Optional[str]
+
+
+def task_facts(task: Any) -> TaskFacts:
+    """Get the aggregate contribution of a task."""
+    return TaskFacts(task.ai_category, task.priority, task.status)
+
+
+def plan_summary(plan: Any) -> Dict[str, Any]:
+    """Summarize a plan for the context."""
+    return {
+        "id": str(plan.id),
+        "title": plan.title,
+        "description": plan.description,
+        "status": plan.status,
+    }
+
+
+def _bump(counts: Dict[str, int], key: Any, delta: int) -> None:
+    """Adjust a counter, dropping keys that reach zero."""
+    if key is None:
+        return
+    key = str(key)
+    value = counts.get(key, 0) + delta
+    if value > 0:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+async def _recent_plans(session: AsyncSession, user_id: UUID) -> List[Dict[str, Any]]:
+    """Query the most recent plan summaries of a user."""
+    result = await session.execute(
+        select(Plan.id, Plan.title, Plan.description, Plan.status)
+        .where(Plan.user_id == user_id)
+        .order_by(Plan.created_at.desc())
+        .limit(RECENT_PLANS)
+    )
+    return [plan_summary(row) for row in result.all()]
+
+
+async def rebuild(session: AsyncSession, user_id: Any) -> UserContextStats:
+    """Recompute a user's aggregate from their plans and tasks with grouped queries."""
+    user_id = UUID(str(user_id))
+    owned_tasks = select(Task).join(Plan).where(Plan.user_id == user_id).subquery()
+
+    async def grouped(column) -> Dict[str, int]:
+        result = await session.execute(
+            select(column, func.count()).where(column.is_not(None)).group_by(column)
+        )
+        return {str(key): count for key, count in result.all()}
+
+    total_plans = await session.scalar(
+        select(func.count()).select_from(Plan).where(Plan.user_id == user_id)
+    )
+
+    stats = await session.get(UserContextStats, user_id)
+    if stats is None:
+        stats = UserContextStats(user_id=user_id)
+        session.add(stats)
+
+    stats.category_counts = await grouped(owned_tasks.c.ai_category)
+    stats.priority_histogram = await grouped(owned_tasks.c.priority)
+    stats.status_counts = await grouped(owned_tasks.c.status)
+    stats.total_plans = total_plans or 0
+    stats.recent_plans = await _recent_plans(session, user_id)
+    return stats
+
+
+async def _load(session: AsyncSession, user_id: Any) -> Optional[UserContextStats]:
+    """Lock a user's aggregate for update, or create and rebuild it (including pending writes) if missing.
+
+    Returns None when the aggregate was rebuilt, as the caller's writes are already counted.
+    """
+    user_id = UUID(str(user_id))
+    stats = await session.get(UserContextStats, user_id, with_for_update=True)
+    if stats is not None:
+        return stats
+
+    # There is no row to lock yet; of concurrent first writes one inserts it, the others wait
+    # for that insert to commit and then lock and update the row like any later write
+    await session.flush()
+    dialect_insert = postgresql.insert if session.bind.dialect.name == "postgresql" else sqlite.insert
+    created = await session.execute(
+        dialect_insert(UserContextStats.__table__)
+        .values(user_id=user_id, total_plans=0)
+        .on_conflict_do_nothing()
+        .returning(UserContextStats.user_id)
+    )
+    if created.first() is None:
+        return await session.scalar(
+            select(UserContextStats)
+            .where(UserContextStats.user_id == user_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+
+    await rebuild(session, user_id)
+    return None
+
+
+async def apply_task_changes(
+    session: AsyncSession,
+    user_id: Any,
+    removed: Iterable[TaskFacts] = (),
+    added: Iterable[TaskFacts] = ()
+) -> None:
+    """Apply task writes to a user's aggregate in the caller's transaction."""
+    stats = await _load(session, user_id)
+    if stats is not None:
+        _apply_task_facts(stats, removed, added)
+
+
+def _apply_task_facts(stats: UserContextStats, removed: Iterable[TaskFacts], added: Iterable[TaskFacts]) -> None:
+    """Apply removed and added task facts to a loaded aggregate."""
+    # Copies, so assigning them back is seen as a change of the JSON columns
+    categories = dict(stats.category_counts or {})
+    priorities = dict(stats.priority_histogram or {})
+    statuses = dict(stats.status_counts or {})
+
+    for facts, delta in [(facts, -1) for facts in removed] + [(facts, 1) for facts in added]:
+        _bump(categories, facts.category, delta)
+        _bump(priorities, facts.priority, delta)
+        _bump(statuses, facts.status, delta)
+
+    stats.category_counts = categories
+    stats.priority_histogram = priorities
+    stats.status_counts = statuses
+
+
+async def apply_plan_change(
+    session: AsyncSession,
+    user_id: Any,
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]],
+    removed_tasks: Iterable[TaskFacts] = (),
+    added_tasks: Iterable[TaskFacts] = ()
+) -> None:
+    """Apply a plan create, update or delete and its task writes to a user's aggregate.
+
+    Call once per transaction: a missing aggregate is rebuilt from the flushed state,
+    which already includes every write made so far.
+    """
+    stats = await _load(session, user_id)
+    if stats is None:
+        return
+
+    recent = list(stats.recent_plans or [])
+
+    if before is None and after is not None:
+        stats.total_plans = (stats.total_plans or 0) + 1
+        recent = [after] + recent[:RECENT_PLANS - 1]
+    elif after is None and before is not None:
+        stats.total_plans = max((stats.total_plans or 0) - 1, 0)
+        if any(plan["id"] == before["id"] for plan in recent):
+            # Refill the window from the index once a listed plan is gone
+            await session.flush()
+            recent = await _recent_plans(session, UUID(str(user_id)))
+    elif after is not None:
+        recent = [after if plan["id"] == after["id"] else plan for plan in recent]
+
+    stats.recent_plans = recent
+
+    removed_tasks, added_tasks = list(removed_tasks), list(added_tasks)
+    if removed_tasks or added_tasks:
+        # Same locked row: no second lock and no flush between the plan and task updates
+        _apply_task_facts(stats, removed_tasks, added_tasks)
+
+
+async def invalidate(session: AsyncSession, user_id: Any) -> None:
+    """Drop a user's aggregate so the next read rebuilds it (for bulk rewrites)."""
+    await session.execute(
+        delete(UserContextStats).where(UserContextStats.user_id == UUID(str(user_id)))
+    )
+
+
+def to_context(stats: UserContextStats) -> Dict[str, Any]:
+    """Build the AI prompt context from a user's aggregate."""
+    categories = stats.category_counts or {}
+    priorities = stats.priority_histogram or {}
+
+    return {
+        "total_plans": stats.total_plans or 0,
+        "plan_data": list(stats.recent_plans or []),
+        "task_categories": sorted(categories, key=lambda name: (-categories[name], name)),
+        "priority_distribution": {
+            level: priorities.get(priority, 0) for level, priority in PRIORITY_LEVELS.items()
+        },
+        "status_counts": dict(stats.status_counts or {}),
+    }
@@ -0,0 +1,123 @@
+"""Stale-while-revalidate cache of dashboard suggestions per plan."""
+
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set
+from uuid import UUID
+
+from .config import settings
+from .database import DashboardSnapshot, async_session
+from .serialization import dumps_str, loads
+
+logger = logging.getLogger(__name__)
+
+# Freshness states of a cached suggestion
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+DEGRADED = "degraded"
+
+
+def plan_fingerprint(plan: Any, tasks: Iterable[Any]) -> str:
+    """Hash the plan content a dashboard suggestion is computed from."""
+    content = {
+        "title": plan.title,
+        "description": plan.description,
+        "tasks": sorted(
+            [
+                [str(task.id), task.title, task.description, task.priority, task.status]
+                for task in tasks
+            ],
+            key=lambda item: item[0]
+        )
+    }
+    encoded = json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class DashboardCache:
+    """Stores the last successful dashboard suggestion for each plan."""
+
+    def __init__(self, ttl_seconds: int, stale_seconds: int):
+        """Initialize the cache with its freshness windows."""
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._refreshing: Set[str] = set()
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    async def get(self, plan_id: str) -> Optional[DashboardSnapshot]:
+        """Get the stored snapshot for a plan."""
+        async with async_session() as session:
+            return await session.get(DashboardSnapshot, UUID(str(plan_id)))
+
+    async def store(
+        self,
+        plan_id: str,
+        fingerprint: str,
+        suggestion: Dict[str, Any],
+        interaction_id: Optional[Any] = None
+    ) -> None:
+        """Replace the stored snapshot for a plan."""
+        async with async_session() as session:
+            await session.merge(DashboardSnapshot(
+                plan_id=UUID(str(plan_id)),
+                fingerprint=fingerprint,
+                suggestion=dumps_str(suggestion),
+                interaction_id=UUID(str(interaction_id)) if interaction_id else None,
+                created_at=datetime.utcnow()
+            ))
+            await session.commit()
+
+    def classify(self, snapshot: Optional[DashboardSnapshot], fingerprint: str) -> str:
+        """Classify a snapshot as fresh, stale or a miss for the given plan content."""
+        if snapshot is None or snapshot.fingerprint != fingerprint:
+            return MISS
+
+        age_seconds = (datetime.utcnow() - snapshot.created_at).total_seconds()
+        if age_seconds <= self.ttl_seconds:
+            return FRESH
+        if age_seconds <= self.stale_seconds:
+            return STALE
+        return MISS
+
+    def render(self, snapshot: DashboardSnapshot, cache_status: str) -> Dict[str, Any]:
+        """Build a response payload from a snapshot, annotated with its cache status."""
+        suggestion = loads(snapshot.suggestion)
+        metadata = suggestion.setdefault("metadata", {})
+        metadata["cache"] = {
+            "status": cache_status,
+            "computed_at": snapshot.created_at.isoformat(),
+            "fingerprint": snapshot.fingerprint
+        }
+        return suggestion
+
+    def schedule_refresh(self, plan_id: str, refresh: Callable[[], Awaitable[Any]]) -> bool:
+        """Run a background refresh for a plan unless one is already in flight."""
+        key = str(plan_id)
+        if key in self._refreshing:
+            return False
+
+        self._refreshing.add(key)
+
+        async def run():
+            try:
+                await refresh()
+            except Exception as e:
+                logger.warning(f"Background dashboard refresh failed for plan {key}: {str(e)}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(run())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return True
+
+
+# Global dashboard cache instance
+dashboard_cache = DashboardCache(
+    ttl_seconds=settings.dashboard_cache_ttl_seconds,
+    stale_seconds=settings.dashboard_cache_stale_seconds
+)
@@ -4,13 +4,20 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import (
-    Column, String, Text, Integer, DateTime, ForeignKey,
-    Index, CheckConstraint, Float, Uuid
+    Column, String, Text, Integer, Date, DateTime, ForeignKey,
+    Index, CheckConstraint, Float, Uuid, UniqueConstraint, JSON
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, relationship
 
 from .config import settings
+from .metrics import instrument_engine
+from .serialization import dumps_str, loads
+
+
+# JSON documents, stored as JSONB on PostgreSQL so keys can be queried server-side
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
 
 
 class Base(DeclarativeBase):
@@ -41,19 +48,20 @@ class Plan(Base):
     description = Column(Text)
     status = Column(String, default="draft", nullable=False)
     # AI fields
-    ai_generated_data = Column(Text)  # JSON string for AI analysis
+    ai_generated_data = Column(JSONDocument)  # AI analysis
     original_thought = Column(Text)   # Raw user input
-    ai_metadata = Column(Text)        # Additional AI metadata
+    ai_metadata = Column(JSONDocument)        # Additional AI metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     user = relationship("User", back_populates="plans")
-    tasks = relationship("Task", back_populates="plan", cascade="all, delete-orphan")
+    # Tasks are removed by ON DELETE CASCADE rather than loaded and deleted one by one
+    tasks = relationship("Task", back_populates="plan", cascade="all, delete-orphan", passive_deletes=True)
 
     # Indexes
     __table_args__ = (
-        Index("idx_plans_user_id", "user_id"),
+        Index("idx_plans_user_created", "user_id", "created_at", "id"),
         Index("idx_plans_status", "status"),
         CheckConstraint("status IN ('draft', 'active', 'completed', 'archived')", name="check_plan_status"),
     )
@@ -64,7 +72,7 @@ class Task(Base):
     __tablename__ = "tasks"
 
     id = Column(Uuid, primary_key=True, default=uuid.uuid4)
-    plan_id = Column(Uuid, ForeignKey("plans.id"), nullable=False)
+    plan_id = Column(Uuid, ForeignKey("plans.id", ondelete="CASCADE"), nullable=False)
     title = Column(String, nullable=False)
     description = Column(Text)
     priority = Column(Integer, default=3, nullable=False)
@@ -81,7 +89,7 @@ class Task(Base):
 
     # Indexes
     __table_args__ = (
-        Index("idx_tasks_plan_id", "plan_id"),
+        Index("idx_tasks_plan_created", "plan_id", "created_at", "id"),
         Index("idx_tasks_status", "status"),
         Index("idx_tasks_ai_category", "ai_category"),
         CheckConstraint("priority BETWEEN 1 AND 5", name="check_task_priority"),
@@ -91,20 +99,27 @@ class Task(Base):
 
 
 class AIInteraction(Base):
-    """AI Interaction model for tracking AI usage and analytics."""
+    """AI Interaction model for tracking AI usage and analytics.
+
+    On PostgreSQL the table is range partitioned by month on created_at (see
+    interaction_rollups); analytics read AIInteractionDaily instead of raw rows.
+    """
     __tablename__ = "ai_interactions"
 
     id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     user_id = Column(Uuid, ForeignKey("users.id"), nullable=False)
-    plan_id = Column(Uuid, ForeignKey("plans.id"), nullable=False)
+    plan_id = Column(Uuid, ForeignKey("plans.id", ondelete="CASCADE"))  # Unset until an organized prompt is saved as a plan
     interaction_type = Column(String, nullable=False)  # 'analysis', 'categorization', 'ranking', 'dashboard'
-    request_data = Column(Text)        # JSON request
-    response_data = Column(Text)       # JSON response
+    request_data = Column(JSONDocument)        # JSON request
+    response_data = Column(JSONDocument)       # JSON response
     tokens_used = Column(Integer, default=0)
     cost_estimate = Column(Float, default=0.0)
     model_used = Column(String)
     response_time_ms = Column(Integer)  # Response time in milliseconds
     user_feedback = Column(Integer)    # User satisfaction rating 1-5
+    template_id = Column(String)       # Prompt template used
+    template_version = Column(Integer)  # Prompt template version used
+    trace_id = Column(String)          # Trace of the request that produced it
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -113,18 +128,105 @@ class AIInteraction(Base):
 
     # Indexes
     __table_args__ = (
-        Index("idx_ai_interactions_user_id", "user_id"),
-        Index("idx_ai_interactions_plan_id", "plan_id"),
+        Index("idx_ai_interactions_user_created", "user_id", "created_at", "id"),
+        Index("idx_ai_interactions_plan_created", "plan_id", "created_at", "id"),
         Index("idx_ai_interactions_type", "interaction_type"),
         Index("idx_ai_interactions_created_at", "created_at"),
+        Index("idx_ai_interactions_template", "template_id", "template_version"),
+        Index("idx_ai_interactions_trace", "trace_id"),
         CheckConstraint("interaction_type IN ('analysis', 'categorization', 'ranking', 'dashboard')", name="check_interaction_type"),
         CheckConstraint("user_feedback BETWEEN 1 AND 5", name="check_user_feedback"),
     )
 
 
+class AIInteractionDaily(Base):
+    """Daily rollup of AI interactions per user, interaction type and model."""
+    __tablename__ = "ai_interaction_daily"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(Uuid, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    interaction_type = Column(String, primary_key=True)
+    model_used = Column(String, primary_key=True)  # Empty when the model is unknown
+    interaction_count = Column(Integer, default=0, nullable=False)
+    tokens_used = Column(Integer, default=0, nullable=False)
+    cost_estimate = Column(Float, default=0.0, nullable=False)
+    latency_p50_ms = Column(Integer)
+    latency_p95_ms = Column(Integer)
+    latency_p99_ms = Column(Integer)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Indexes
+    __table_args__ = (
+        Index("idx_ai_interaction_daily_user_day", "user_id", "day"),
+    )
+
+
+class DashboardSnapshot(Base):
+    """Last successful dashboard suggestion for a plan."""
+    __tablename__ = "dashboard_snapshots"
+
+    plan_id = Column(Uuid, ForeignKey("plans.id", ondelete="CASCADE"), primary_key=True)
+    fingerprint = Column(String, nullable=False)  # Hash of plan content it was computed from
+    suggestion = Column(Text, nullable=False)     # JSON suggestion
+    interaction_id = Column(Uuid)                 # Interaction that produced it
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CanonicalCategory(Base):
+    """Canonical task category of a user."""
+    __tablename__ = "canonical_categories"
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)  # Display name written to tasks.ai_category
+    key = Column(String, nullable=False)   # Normalized lookup key
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_canonical_categories_user_key"),
+    )
+
+
+class UserContextStats(Base):
+    """Per-user aggregate of plans and tasks used as AI prompt context."""
+    __tablename__ = "user_context_stats"
+
+    user_id = Column(Uuid, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    category_counts = Column(JSONDocument)     # {category: task count}
+    priority_histogram = Column(JSONDocument)  # {priority: task count}
+    status_counts = Column(JSONDocument)       # {status: task count}
+    total_plans = Column(Integer, default=0)
+    recent_plans = Column(JSONDocument)        # Most recent plan summaries, newest first
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PriorityEdit(Base):
+    """Manual priority override of an AI-scored task, replayed into the priority calibration."""
+    __tablename__ = "priority_edits"
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    task_id = Column(Uuid, ForeignKey("tasks.id", ondelete="SET NULL"))
+    task = Column(JSONDocument, nullable=False)  # Task fields before the edit, with the new status
+    new_priority = Column(Integer, nullable=False)
+    previous_status = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Indexes
+    __table_args__ = (
+        Index("idx_priority_edits_created_at", "created_at"),
+    )
+
+
 # Database setup
-engine = create_async_engine(settings.database_url, echo=False)
+# JSON columns (AI requests, responses and generated plan data) are encoded with orjson
+engine = create_async_engine(settings.database_url, echo=False, json_serializer=dumps_str, json_deserializer=loads)
 async_session = async_sessionmaker(engine, class_=AsyncSession)
+instrument_engine(engine, "primary")
+
+# Session.info key holding the user whose writes a session commits
+USER_ID_KEY = "user_id"
 
 
 async def get_db():
@@ -134,4 +236,4 @@ async def get_db():
 
 
 # Export models
-__all__ = ["User", "Plan", "Task", "AIInteraction", "get_db"]
\ No newline at end of file
+__all__ = ["User", "Plan", "Task", "AIInteraction", "AIInteractionDaily", "DashboardSnapshot", "CanonicalCategory", "UserContextStats", "PriorityEdit", "get_db"]
\ No newline at end of file
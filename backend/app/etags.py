@@ -0,0 +1,36 @@
+"""Weak ETags and If-None-Match handling for conditional GETs."""
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import HTTPException, Response
+
+# Clients may keep responses but must revalidate them, and shared caches must not store them
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts: Any) -> str:
+    """Build a weak ETag from the values identifying a representation."""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weakly compare an If-None-Match header with an ETag."""
+    if not if_none_match:
+        return False
+
+    tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == tag:
+            return True
+    return False
+
+
+def conditional(response: Response, etag: str, if_none_match: Optional[str] = None) -> None:
+    """Answer 304 Not Modified when the client's copy is current, otherwise tag the response."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if matches(if_none_match, etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
@@ -0,0 +1,284 @@
+"""Monthly partitions, retention and daily rollups of AI interactions."""
+
+import asyncio
+import logging
+import math
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .database import AIInteraction, AIInteractionDaily, async_session
+
+logger = logging.getLogger(__name__)
+
+# Months of partitions created ahead of the current one
+PARTITIONS_AHEAD = 2
+
+# Monthly partitions are named ai_interactions_pYYYYMM by migration 009
+PARTITION_PATTERN = re.compile(r"^ai_interactions_p(\d{4})(\d{2})$")
+
+# Rollup latency columns and the percentile each one holds
+PERCENTILES = {"latency_p50_ms": 0.5, "latency_p95_ms": 0.95, "latency_p99_ms": 0.99}
+
+# Template usage latency fields and the percentile each one holds
+TEMPLATE_PERCENTILES = {"p50_latency_ms": 0.5, "p95_latency_ms": 0.95}
+
+# PostgreSQL advisory lock held by the worker running maintenance
+MAINTENANCE_LOCK_KEY = 720311401
+
+
+def month_start(value: date) -> date:
+    """Get the first day of a date's month."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Shift the first day of a month by a number of months."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Interpolate a percentile of sorted values the way percentile_cont does."""
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    lower, upper = math.floor(position), math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _milliseconds(value: Optional[float]) -> Optional[int]:
+    """Round a latency percentile to whole milliseconds."""
+    return None if value is None else int(round(value))
+
+
+async def _grouped_postgresql(session: AsyncSession, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """Aggregate interactions per day, user, type and model with percentile_cont."""
+    day = cast(AIInteraction.created_at, Date).label("day")
+    # Inlined so the grouped and selected expressions are identical
+    model = func.coalesce(AIInteraction.model_used, literal_column("''")).label("model_used")
+    result = await session.execute(
+        select(
+            day,
+            AIInteraction.user_id,
+            AIInteraction.interaction_type,
+            model,
+            func.count().label("interaction_count"),
+            func.coalesce(func.sum(AIInteraction.tokens_used), 0).label("tokens_used"),
+            func.coalesce(func.sum(AIInteraction.cost_estimate), 0).label("cost_estimate"),
+            *[
+                func.percentile_cont(fraction).within_group(AIInteraction.response_time_ms).label(name)
+                for name, fraction in PERCENTILES.items()
+            ]
+        )
+        .where(AIInteraction.created_at >= start, AIInteraction.created_at < end)
+        .group_by(day, AIInteraction.user_id, AIInteraction.interaction_type, model)
+    )
+    return [
+        {
+            **row,
+            "cost_estimate": float(row["cost_estimate"]),
+            **{name: _milliseconds(row[name]) for name in PERCENTILES}
+        }
+        for row in result.mappings()
+    ]
+
+
+async def _grouped_rows(session: AsyncSession, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """Aggregate interactions per day, user, type and model in Python for backends without percentile_cont."""
+    result = await session.execute(
+        select(
+            AIInteraction.created_at,
+            AIInteraction.user_id,
+            AIInteraction.interaction_type,
+            AIInteraction.model_used,
+            AIInteraction.tokens_used,
+            AIInteraction.cost_estimate,
+            AIInteraction.response_time_ms
+        )
+        .where(AIInteraction.created_at >= start, AIInteraction.created_at < end)
+    )
+
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for row in result.all():
+        key = (row.created_at.date(), row.user_id, row.interaction_type, row.model_used or "")
+        group = groups.setdefault(key, {"interaction_count": 0, "tokens_used": 0, "cost_estimate": 0.0, "latencies": []})
+        group["interaction_count"] += 1
+        group["tokens_used"] += row.tokens_used or 0
+        group["cost_estimate"] += row.cost_estimate or 0.0
+        if row.response_time_ms is not None:
+            group["latencies"].append(row.response_time_ms)
+
+    rows = []
+    for (day, user_id, interaction_type, model_used), group in groups.items():
+        latencies = sorted(group.pop("latencies"))
+        rows.append({
+            "day": day,
+            "user_id": user_id,
+            "interaction_type": interaction_type,
+            "model_used": model_used,
+            **group,
+            **{name: _milliseconds(percentile(latencies, fraction)) for name, fraction in PERCENTILES.items()}
+        })
+    return rows
+
+
+async def template_usage(session: AsyncSession, since: datetime) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """Aggregate the interactions since a time per prompt template version.
+
+    Computed from the stored rows, so every worker reports the same figures. Keyed by
+    (template id, version); latencies and tokens are those of the recorded interactions.
+    """
+    columns = [
+        AIInteraction.template_id,
+        AIInteraction.template_version,
+        func.count().label("interactions"),
+        func.coalesce(func.sum(AIInteraction.tokens_used), 0).label("tokens_total"),
+        func.avg(AIInteraction.user_feedback).label("feedback_avg"),
+        func.count(AIInteraction.user_feedback).label("feedback_count")
+    ]
+    postgresql = session.bind.dialect.name == "postgresql"
+    if postgresql:
+        columns += [
+            func.percentile_cont(fraction).within_group(AIInteraction.response_time_ms).label(name)
+            for name, fraction in TEMPLATE_PERCENTILES.items()
+        ]
+    result = await session.execute(
+        select(*columns)
+        .where(AIInteraction.template_id.is_not(None), AIInteraction.created_at >= since)
+        .group_by(AIInteraction.template_id, AIInteraction.template_version)
+    )
+    usage = {(row["template_id"], row["template_version"]): dict(row) for row in result.mappings()}
+
+    if not postgresql and usage:
+        latencies: Dict[Tuple[str, int], List[int]] = {}
+        rows = await session.execute(
+            select(AIInteraction.template_id, AIInteraction.template_version, AIInteraction.response_time_ms)
+            .where(
+                AIInteraction.template_id.is_not(None),
+                AIInteraction.created_at >= since,
+                AIInteraction.response_time_ms.is_not(None)
+            )
+        )
+        for template_id, version, response_time_ms in rows.all():
+            latencies.setdefault((template_id, version), []).append(response_time_ms)
+        for key, entry in usage.items():
+            ordered = sorted(latencies.get(key, []))
+            entry.update({name: percentile(ordered, fraction) for name, fraction in TEMPLATE_PERCENTILES.items()})
+
+    for entry in usage.values():
+        entry["tokens_total"] = int(entry["tokens_total"])
+        entry["avg_tokens"] = round(entry["tokens_total"] / entry["interactions"], 1)
+        entry["feedback_avg"] = round(float(entry["feedback_avg"]), 2) if entry["feedback_avg"] is not None else None
+        for name in TEMPLATE_PERCENTILES:
+            entry[name] = _milliseconds(entry[name])
+    return usage
+
+
+async def rollup(session: AsyncSession, start: date, end: date) -> int:
+    """Recompute the daily rollups of the days in [start, end) from raw interactions.
+
+    Returns the number of rollup rows written.
+    """
+    start_at, end_at = datetime.combine(start, time.min), datetime.combine(end, time.min)
+    if session.bind.dialect.name == "postgresql":
+        rows = await _grouped_postgresql(session, start_at, end_at)
+    else:
+        rows = await _grouped_rows(session, start_at, end_at)
+
+    await session.execute(
+        delete(AIInteractionDaily).where(AIInteractionDaily.day >= start, AIInteractionDaily.day < end)
+    )
+    if rows:
+        await session.execute(insert(AIInteractionDaily), rows)
+    return len(rows)
+
+
+async def ensure_partitions(session: AsyncSession, today: date) -> None:
+    """Create the monthly partitions of the current and upcoming months on PostgreSQL."""
+    month = month_start(today)
+    for offset in range(PARTITIONS_AHEAD + 1):
+        await session.execute(
+            text("SELECT public.create_ai_interactions_partition(:month)"),
+            {"month": add_months(month, offset)}
+        )
+
+
+async def _partitions(session: AsyncSession) -> Dict[date, str]:
+    """List the monthly partitions of ai_interactions by month."""
+    result = await session.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "WHERE parent.relname = 'ai_interactions'"
+    ))
+    partitions = {}
+    for name in result.scalars():
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+async def apply_retention(session: AsyncSession, today: date, months: int, mode: str) -> None:
+    """Roll up and remove raw interactions from before the retention window.
+
+    On PostgreSQL whole monthly partitions are detached, and dropped when mode is "drop";
+    detached partitions stay behind as standalone archive tables. Other backends delete the rows.
+    """
+    if months <= 0:
+        return
+
+    cutoff = add_months(month_start(today), -months)
+    if session.bind.dialect.name == "postgresql":
+        for month, name in sorted((await _partitions(session)).items()):
+            if month >= cutoff:
+                continue
+
+            await rollup(session, month, add_months(month, 1))
+            await session.execute(text(f'ALTER TABLE public.ai_interactions DETACH PARTITION public."{name}"'))
+            if mode == "drop":
+                await session.execute(text(f'DROP TABLE public."{name}"'))
+            logger.info(f"Removed AI interaction partition {name} ({mode})")
+        return
+
+    cutoff_at = datetime.combine(cutoff, time.min)
+    oldest = await session.scalar(select(func.min(AIInteraction.created_at)).where(AIInteraction.created_at < cutoff_at))
+    if oldest is None:
+        return
+
+    await rollup(session, oldest.date(), cutoff)
+    await session.execute(delete(AIInteraction).where(AIInteraction.created_at < cutoff_at))
+
+
+async def run_maintenance(today: Optional[date] = None) -> None:
+    """Create upcoming partitions, refresh the recent rollups and apply retention."""
+    today = today or datetime.utcnow().date()
+    async with async_session() as session:
+        if session.bind.dialect.name == "postgresql":
+            # Only one worker maintains the table at a time
+            locked = await session.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+            if not locked:
+                return
+            await ensure_partitions(session, today)
+
+        # Yesterday is refreshed too, so interactions recorded just before midnight are counted
+        await rollup(session, today - timedelta(days=1), today + timedelta(days=1))
+        await apply_retention(
+            session, today, settings.ai_interactions_retention_months, settings.ai_interactions_retention_mode
+        )
+        await session.commit()
+
+
+async def run_maintenance_periodically(interval_seconds: int) -> None:
+    """Run maintenance every interval until cancelled."""
+    while True:
+        try:
+            await run_maintenance()
+        except Exception as e:
+            logger.warning(f"AI interaction maintenance failed: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,165 @@
+"""Write-behind buffer batching AI interaction rows into multi-row inserts."""
+
+import asyncio
+import contextlib
+import logging
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from .config import settings
+from .database import AIInteraction, async_session
+from .replicas import replica_router
+
+logger = logging.getLogger(__name__)
+
+
+class InteractionWriter:
+    """Buffers interaction rows and flushes them on size or time thresholds.
+
+    Until start() is called (scripts, tests) every row is written as soon as it is enqueued.
+    The flush lock and wakeup event are created by start(), in the loop that runs the
+    flusher, so the module-level writer never holds primitives of a loop that has ended.
+    """
+
+    def __init__(self, batch_size: int, flush_seconds: float, max_pending: int):
+        """Initialize the writer with its flush thresholds and memory bound."""
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._unwritten: Set[UUID] = set()  # Pending and in-flight ids
+        self._lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start flushing in the background."""
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the background flusher and write every buffered row."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        self._lock, self._wakeup = None, None
+
+        if self._pending:
+            logger.error(f"Lost {len(self._pending)} AI interactions that could not be written on shutdown")
+
+    async def enqueue(self, row: Dict[str, Any]) -> None:
+        """Buffer an interaction row with a client-side id.
+
+        When the buffer is full the caller flushes it first; rows that still cannot be
+        written are dropped oldest first, so memory stays bounded while the database is down.
+        """
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+        while len(self._pending) >= self.max_pending:
+            dropped = self._pending.pop(0)
+            self._unwritten.discard(dropped["id"])
+            self.dropped += 1
+            logger.error(f"Dropped AI interaction {dropped['id']}: write buffer is full")
+
+        self._pending.append(row)
+        self._unwritten.add(row["id"])
+        # The row is on its way to the primary, so keep the user's reads there
+        replica_router.note_write(row["user_id"])
+
+        if self._task is None:
+            await self.flush()
+        elif len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def ensure_written(self, interaction_id: Any) -> None:
+        """Flush the buffer if an interaction is still waiting to be written."""
+        if UUID(str(interaction_id)) in self._unwritten:
+            await self.flush()
+
+    async def flush_user(self, user_id: Any) -> None:
+        """Flush the buffer if it holds interactions of a user."""
+        user_id = UUID(str(user_id))
+        in_flight = self._lock is not None and self._lock.locked()
+        if any(row["user_id"] == user_id for row in self._pending) or in_flight:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write every buffered row with one multi-row insert."""
+        # Unstarted, each call writes only the rows it took from the buffer, so no lock is needed
+        async with self._lock or contextlib.nullcontext():
+            if not self._pending:
+                return
+
+            batch, self._pending = self._pending, []
+            try:
+                await self._insert(batch)
+            except (DataError, IntegrityError) as e:
+                # One invalid row fails the whole statement, so isolate it
+                logger.warning(f"Batch of {len(batch)} AI interactions rejected, writing them one by one: {e}")
+                await self._insert_each(batch)
+                return
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} AI interactions: {e}")
+                self._requeue(batch)
+                return
+
+            for row in batch:
+                self._unwritten.discard(row["id"])
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        """Keep unwritten rows for the next flush, dropping the oldest beyond the memory bound."""
+        pending = rows + self._pending
+        overflow, self._pending = pending[:-self.max_pending], pending[-self.max_pending:]
+        for row in overflow:
+            self._unwritten.discard(row["id"])
+        self.dropped += len(overflow)
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert rows in one transaction."""
+        async with async_session() as session:
+            await session.execute(insert(AIInteraction), rows)
+            await session.commit()
+
+    async def _insert_each(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert rows one at a time, dropping the ones the database rejects.
+
+        Any other failure (the database going away mid-batch) puts the remaining rows back.
+        """
+        for index, row in enumerate(rows):
+            try:
+                await self._insert([row])
+            except (DataError, IntegrityError) as e:
+                self.dropped += 1
+                logger.error(f"Dropped invalid AI interaction {row['id']}: {e}")
+            except Exception as e:
+                logger.error(f"Failed to write {len(rows) - index} AI interactions: {e}")
+                self._requeue(rows[index:])
+                return
+            self._unwritten.discard(row["id"])
+
+    async def _run(self) -> None:
+        """Flush whenever a batch fills up or the flush interval passes."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+
+interaction_writer = InteractionWriter(
+    settings.ai_interaction_batch_size,
+    settings.ai_interaction_flush_seconds,
+    settings.ai_interaction_max_pending
+)
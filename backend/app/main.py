@@ -1,14 +1,27 @@
 """Simplified FastAPI application."""
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 
 from .config import settings
 from .api import api_router
+from .calibration import priority_calibrator
+from .compression import CompressionMiddleware, compression_options
+from .metrics import CONTENT_TYPE, MetricsMiddleware, monitor_event_loop_lag, registry
+from .query_log import QueryCountMiddleware
+from .pagination import NEXT_CURSOR_HEADER
+from .profiling import PROFILE_ID_HEADER, ProfilingMiddleware
+from .replicas import replica_router
+from .serialization import FastJSONResponse
+from .timings import ServerTimingMiddleware
+from .tracing import TracingMiddleware, tracer
+from .interaction_rollups import run_maintenance_periodically
+from .interaction_writer import interaction_writer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,9 +33,46 @@ async def lifespan(app: FastAPI):
     """Application lifespan."""
     logger.info("Starting Mindmesh API...")
     logger.info(f"Debug mode: {settings.debug}")
+
+    # Rebuild the local priority calibration from rated interactions
+    try:
+        learned = await priority_calibrator.warm_start(settings.calibration_warm_start_limit)
+        logger.info(f"Priority calibration warmed up from {learned} rated tasks and priority edits")
+    except Exception as e:
+        logger.warning(f"Priority calibration warm start failed: {e}")
+
+    health_checks = None
+    if replica_router.replicas:
+        logger.info(f"Routing reads to {len(replica_router.replicas)} replica(s)")
+        health_checks = asyncio.create_task(replica_router.run_health_checks())
+
+    # Write AI interactions behind the requests that record them
+    interaction_writer.start()
+
+    # Export tracing spans in the background
+    tracer.start()
+
+    # Keep AI interaction partitions, rollups and retention up to date
+    maintenance = asyncio.create_task(run_maintenance_periodically(settings.ai_interactions_maintenance_seconds))
+
+    loop_monitor = None
+    if settings.metrics_enabled:
+        loop_monitor = asyncio.create_task(monitor_event_loop_lag(settings.metrics_event_loop_interval_seconds))
+
     yield
     logger.info("Shutting down...")
 
+    maintenance.cancel()
+    if loop_monitor is not None:
+        loop_monitor.cancel()
+    if health_checks is not None:
+        health_checks.cancel()
+
+    # Write the buffered interactions before the connection pools close
+    await interaction_writer.close()
+    await replica_router.dispose()
+    await tracer.close()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -32,8 +82,12 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# Compress large and streamed responses
+app.add_middleware(CompressionMiddleware, **compression_options())
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -41,11 +95,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Server-Timing", PROFILE_ID_HEADER],
+)
+
+# Profile requests carrying the profiling token, and a sample of the configured paths
+app.add_middleware(
+    ProfilingMiddleware,
+    sample_paths=[path.strip() for path in settings.profiling_sample_paths.split(",") if path.strip()],
+    sample_rate=settings.profiling_sample_rate,
+)
+
+# Count the SQL statements of each request
+app.add_middleware(QueryCountMiddleware, warn_count=settings.query_count_warn)
+
+# Run each request in a root tracing span
+app.add_middleware(TracingMiddleware)
+
+# Observe request latency by route for /metrics
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# Time a sample of requests, outermost so the total covers every other middleware
+app.add_middleware(
+    ServerTimingMiddleware,
+    sample_rate=settings.server_timing_sample_rate,
+    log_min_ms=settings.server_timing_log_min_ms,
 )
 
 # Include API routes
 app.include_router(api_router)
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics."""
+    if not settings.metrics_enabled:
+        return PlainTextResponse("Metrics are disabled", status_code=404)
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -62,7 +150,7 @@ async def root():
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler."""
     logger.error(f"Unhandled exception: {exc}")
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={"error": "Internal server error", "detail": str(exc)}
     )
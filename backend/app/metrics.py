@@ -0,0 +1,307 @@
+"""Operational metrics rendered in the Prometheus text exposition format.
+
+Collectors are plain counters and bucket lists updated from the event loop thread, so they
+need no locks: an update is a dict lookup and an addition. Values owned by other components
+(pool occupancy, cache counters) are read from callbacks only when /metrics is scraped.
+"""
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+AI_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+def _escape(value: Any) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    """Format a sample value."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named metric family with fixed label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Describe the metric."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, Labels, Tuple[Tuple[str, str], ...], float]]:
+        """Yield (suffix, label values, extra labels, value) samples."""
+        return []
+
+    def render(self) -> List[str]:
+        """Render the family as exposition lines."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self.samples():
+            pairs = [f'{name}="{_escape(label)}"' for name, label in zip(self.labelnames, values)]
+            pairs += [f'{name}="{label}"' for name, label in extra]
+            labels = "{" + ",".join(pairs) + "}" if pairs else ""
+            lines.append(f"{self.name}{suffix}{labels} {_format(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonic totals by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Describe the counter."""
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add to the total of the label values."""
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        """Yield the totals."""
+        for labels, value in self.values.items():
+            yield "", labels, (), value
+
+
+class Histogram(Metric):
+    """Bucketed observations by label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        """Describe the histogram and its upper bounds."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label values: a count per bucket plus one for +Inf, the sum and the count
+        self.values: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record an observation."""
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self):
+        """Yield cumulative buckets, the sum and the count."""
+        for labels, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield "_bucket", labels, (("le", _format(float(bound))),), cumulative
+            yield "_sum", labels, (), total
+            yield "_count", labels, (), count
+
+
+class CallbackMetric(Metric):
+    """Values read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, kind: str, labelnames: Sequence[str], read: Callable[[], Iterable[Tuple[Labels, float]]]):
+        """Describe the metric and its value source."""
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.read = read
+
+    def samples(self):
+        """Yield the values from the callback."""
+        for labels, value in self.read():
+            yield "", labels, (), value
+
+
+class Registry:
+    """Metric families in exposition order."""
+
+    def __init__(self):
+        """Start empty."""
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a family."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every family; a failing callback is skipped rather than failing the scrape."""
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                logger.warning(f"Metric {metric.name} could not be collected: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# API
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "mindmesh_http_request_duration_seconds", "API request latency by route and status.", ("method", "route", "status")
+))
+
+# Database pools
+DB_POOL_CHECKOUT_SECONDS = registry.register(Histogram(
+    "mindmesh_db_pool_checkout_seconds", "Time to get a connection from the pool.", ("pool",), CHECKOUT_BUCKETS
+))
+_engines: Dict[str, AsyncEngine] = {}
+
+# Gemini pipeline, by operation (prompt template id)
+AI_CALL_SECONDS = registry.register(Histogram(
+    "mindmesh_ai_call_duration_seconds", "Gemini call latency including retries, by outcome (ok, parse_failure, error).",
+    ("operation", "outcome"), AI_LATENCY_BUCKETS
+))
+AI_RETRIES = registry.register(Counter("mindmesh_ai_retries_total", "Gemini call attempts retried.", ("operation",)))
+AI_PARSE_FAILURES = registry.register(Counter(
+    "mindmesh_ai_parse_failures_total", "Gemini responses that were not valid JSON.", ("operation",)
+))
+AI_FALLBACKS = registry.register(Counter(
+    "mindmesh_ai_fallbacks_total", "AI operations answered with a non-AI fallback.", ("operation",)
+))
+AI_TOKENS = registry.register(Counter("mindmesh_ai_tokens_total", "Tokens reported by Gemini.", ("operation",)))
+
+# Caches report (hits, misses) through callbacks registered by their owners
+_caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+# Event loop
+EVENT_LOOP_LAG_SECONDS = registry.register(Histogram(
+    "mindmesh_event_loop_lag_seconds", "Delay of timer callbacks on the event loop.", (), LATENCY_BUCKETS
+))
+
+
+def register_cache(name: str, counts: Callable[[], Tuple[int, int]]) -> None:
+    """Expose a cache whose counts callback returns (hits, misses)."""
+    _caches[name] = counts
+
+
+def _cache_samples(index: int) -> Iterable[Tuple[Labels, float]]:
+    """Hits (index 0) or misses (index 1) of every cache."""
+    for name, counts in _caches.items():
+        yield (name,), counts()[index]
+
+
+def _cache_ratios() -> Iterable[Tuple[Labels, float]]:
+    """Share of lookups answered by each cache so far."""
+    for name, counts in _caches.items():
+        hits, misses = counts()
+        if hits + misses:
+            yield (name,), hits / (hits + misses)
+
+
+def _pool_samples(read: Callable[[Any], float]) -> Iterable[Tuple[Labels, float]]:
+    """A value of every instrumented queue pool."""
+    for name, engine in _engines.items():
+        pool = engine.sync_engine.pool
+        if hasattr(pool, "checkedout"):
+            yield (name,), read(pool)
+
+
+registry.register(CallbackMetric(
+    "mindmesh_db_pool_in_use_connections", "Connections checked out of the pool.", "gauge", ("pool",),
+    lambda: _pool_samples(lambda pool: pool.checkedout())
+))
+registry.register(CallbackMetric(
+    "mindmesh_db_pool_idle_connections", "Connections idle in the pool.", "gauge", ("pool",),
+    lambda: _pool_samples(lambda pool: pool.checkedin())
+))
+registry.register(CallbackMetric(
+    "mindmesh_db_pool_overflow_connections", "Connections open beyond the pool size.", "gauge", ("pool",),
+    lambda: _pool_samples(lambda pool: max(pool.overflow(), 0))
+))
+registry.register(CallbackMetric(
+    "mindmesh_cache_hits_total", "Cache lookups answered from the cache.", "counter", ("cache",),
+    lambda: _cache_samples(0)
+))
+registry.register(CallbackMetric(
+    "mindmesh_cache_misses_total", "Cache lookups that missed.", "counter", ("cache",),
+    lambda: _cache_samples(1)
+))
+registry.register(CallbackMetric(
+    "mindmesh_cache_hit_ratio", "Share of cache lookups answered from the cache.", "gauge", ("cache",),
+    _cache_ratios
+))
+
+
+def _time_checkouts(engine: AsyncEngine, name: str) -> None:
+    """Wrap the connect method of the engine's current pool to observe checkout time."""
+    pool = engine.sync_engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, name)
+
+    pool.connect = timed_connect
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """Expose the checkout time and occupancy of an engine's pool under a pool label."""
+    _engines[name] = engine
+    _time_checkouts(engine, name)
+    # dispose() replaces the pool; time the new one too
+    event.listen(engine.sync_engine, "engine_disposed", lambda _: _time_checkouts(engine, name))
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing request latency by method, route template and status."""
+
+    def __init__(self, app: Any):
+        """Wrap an ASGI app."""
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Handle a request, observing its latency."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Templates rather than paths keep the label set bounded
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope["method"], getattr(route, "path", "unmatched"), str(status_code)
+            )
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """Observe how late a periodic timer fires, forever."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(loop.time() - start - interval, 0.0))
@@ -0,0 +1,64 @@
+"""Keyset pagination on (created_at, id) with opaque cursors."""
+
+import base64
+import binascii
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, literal, tuple_
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Convert a timestamp to naive UTC, the form the DateTime columns bind.
+
+    asyncpg returns timestamptz columns as aware datetimes but cannot encode an aware value
+    for the TIMESTAMP WITHOUT TIME ZONE parameter of a naive DateTime column.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor."""
+    raw = f"{_naive_utc(created_at).isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor back into its sort key."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return _naive_utc(datetime.fromisoformat(created_at)), UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset(query: Select, model: Any, cursor: Optional[str], limit: int, descending: bool = True) -> Select:
+    """Restrict a query to the page after a cursor, fetching one extra row to detect more."""
+    created_at, row_id = model.created_at, model.id
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        key = tuple_(created_at, row_id)
+        bound = tuple_(literal(cursor_created_at, created_at.type), literal(cursor_id, row_id.type))
+        query = query.where(key < bound if descending else key > bound)
+
+    order = (created_at.desc(), row_id.desc()) if descending else (created_at.asc(), row_id.asc())
+    return query.order_by(*order).limit(limit + 1)
+
+
+def page(rows: Sequence[Any], limit: int, response: Response) -> List[Any]:
+    """Trim the extra row of a keyset query and expose the next cursor in the response headers."""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
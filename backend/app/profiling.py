@@ -0,0 +1,342 @@
+"""Sampling profiler for single requests and for a low-rate share of chosen routes.
+
+A background thread samples the requests being profiled every PROFILING_INTERVAL_MS. A
+request whose coroutine is running contributes the event loop thread's stack (CPU time); a
+suspended one contributes its chain of awaiting coroutines ending in an "[await]" frame, so
+time spent waiting on the database or Gemini shows up next to the code that waited.
+Profiles are collapsed stacks ("frame;frame;frame count" lines), read as they are by
+flamegraph.pl, speedscope and most flame graph viewers.
+
+Requests sending PROFILING_TOKEN in an X-Profile-Token header are profiled on demand; the
+token is never read from the query string, which ends up in access logs and browser history.
+The X-Profile-Id response header names the profile, served by /api/profiles/{id} and written
+to PROFILING_DIR when set. A PROFILING_SAMPLE_RATE share of requests to
+PROFILING_SAMPLE_PATHS is profiled into per-route aggregates of hot stacks, served by
+/api/profiles/aggregate.
+"""
+
+import asyncio
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import Header, HTTPException
+
+from .config import settings
+
+try:
+    import greenlet
+except ImportError:  # only installed with SQLAlchemy's asyncio support
+    greenlet = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Leaf frame of samples taken while the request was suspended
+AWAIT_FRAME = "[await]"
+# Stack counting the samples of stacks beyond the per-profile limit
+OTHER_STACK = "[other]"
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@lru_cache(maxsize=8192)
+def _label(code: CodeType) -> str:
+    """Name a function for a collapsed stack, e.g. "list_tasks (app/api.py:120)"."""
+    filename = code.co_filename
+    if "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    elif filename.startswith(_BACKEND_DIR):
+        filename = os.path.relpath(filename, _BACKEND_DIR)
+    else:
+        filename = os.path.basename(filename)
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _count(stacks: Dict[str, int], stack: str, samples: int, max_stacks: int) -> None:
+    """Add samples of a stack, counting new stacks beyond max_stacks as OTHER_STACK."""
+    if stack not in stacks and len(stacks) >= max_stacks:
+        stack = OTHER_STACK
+    stacks[stack] = stacks.get(stack, 0) + samples
+
+
+def _collapsed(stacks: Dict[str, int], prefix: str = "") -> str:
+    """Render stacks in the collapsed format, one "stack count" line each."""
+    return "".join(f"{prefix}{stack} {count}\n" for stack, count in stacks.items())
+
+
+def _awaiting(awaitable: Any) -> Tuple[Optional[FrameType], Any]:
+    """Get the frame of a suspended coroutine or generator and the awaitable it waits on."""
+    if hasattr(awaitable, "cr_frame"):
+        return awaitable.cr_frame, awaitable.cr_await
+    if hasattr(awaitable, "gi_frame"):
+        return awaitable.gi_frame, awaitable.gi_yieldfrom
+    return None, None
+
+
+class Profile:
+    """Stack samples of one request."""
+
+    def __init__(self, coro: Any, method: str, path: str, max_stacks: int):
+        """Profile coro, the request's ASGI app coroutine; must be created on the event loop thread."""
+        self.id = uuid.uuid4().hex
+        self.coro = coro
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.max_stacks = max_stacks
+        self.thread_id = threading.get_ident()
+        # Greenlet of the event loop, suspended while SQLAlchemy runs ORM code in a child greenlet
+        self.greenlet = greenlet.getcurrent() if greenlet is not None else None
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.duration_ms = 0.0
+        self.samples = 0
+        self.cpu_samples = 0
+        self.stacks: Dict[str, int] = {}
+
+    def _running_stack(self, frame: Optional[FrameType], root: FrameType) -> Optional[List[str]]:
+        """Get the labels from root down to the executing frame, or None if the request is not on it."""
+        labels = []
+        jumped = False
+        while frame is not root:
+            if frame is None:
+                # Child greenlet frames do not link back to the coroutine that spawned them
+                if jumped or self.greenlet is None:
+                    return None
+                frame, jumped = self.greenlet.gr_frame, True
+                continue
+            labels.append(_label(frame.f_code))
+            frame = frame.f_back
+        labels.append(_label(root.f_code))
+        labels.reverse()
+        return labels
+
+    def sample(self, frames: Dict[int, FrameType]) -> None:
+        """Record where the request is: its executing stack, or the chain of coroutines it awaits in."""
+        root = self.coro.cr_frame
+        if root is None:
+            return
+        if self.coro.cr_running:
+            labels = self._running_stack(frames.get(self.thread_id), root)
+            if labels is None:
+                return
+            self.cpu_samples += 1
+        else:
+            labels = []
+            frame, awaited = _awaiting(self.coro)
+            while frame is not None:
+                labels.append(_label(frame.f_code))
+                frame, awaited = _awaiting(awaited)
+            labels.append(AWAIT_FRAME)
+        self.samples += 1
+        _count(self.stacks, ";".join(labels), 1, self.max_stacks)
+
+    def finish(self, route: Optional[str]) -> None:
+        """Note the end of the request and the route it matched."""
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 2)
+        self.route = route
+
+    def collapsed(self) -> str:
+        """Get the samples as collapsed stacks."""
+        return _collapsed(self.stacks)
+
+    def summary(self) -> Dict[str, Any]:
+        """Describe the profile without its stacks."""
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "cpu_samples": self.cpu_samples
+        }
+
+
+class Sampler:
+    """Thread sampling the profiled requests, running only while there are some."""
+
+    def __init__(self, interval_seconds: float):
+        """Initialize the sampler."""
+        self.interval_seconds = interval_seconds
+        self._profiles: Set[Profile] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: Profile) -> None:
+        """Start sampling a request."""
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile) -> None:
+        """Stop sampling a request; no sample of it is in progress once this returns."""
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self) -> None:
+        """Sample every interval until no request is profiled."""
+        while True:
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for profile in self._profiles:
+                    profile.sample(frames)
+            del frames
+            time.sleep(self.interval_seconds)
+
+
+class ProfileStore:
+    """The latest on-demand profiles, optionally written to a directory as well."""
+
+    def __init__(self, max_profiles: int, directory: str):
+        """Keep up to max_profiles profiles in memory."""
+        self.max_profiles = max_profiles
+        self.directory = directory
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+
+    async def add(self, profile: Profile) -> None:
+        """Keep a finished profile, dropping the oldest beyond max_profiles."""
+        self._profiles[profile.id] = profile
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._write, profile)
+            except OSError as e:
+                logger.warning(f"Writing profile {profile.id} failed: {e}")
+
+    def _write(self, profile: Profile) -> None:
+        """Write a profile as {directory}/{id}.collapsed."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{profile.id}.collapsed"), "w", encoding="utf-8") as f:
+            f.write(profile.collapsed())
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        """Get a kept profile."""
+        return self._profiles.get(profile_id)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Describe the kept profiles, newest first."""
+        return [profile.summary() for profile in reversed(self._profiles.values())]
+
+
+class StackAggregate:
+    """Samples of the sampled requests, summed by route."""
+
+    def __init__(self, max_stacks: int):
+        """Keep up to max_stacks distinct stacks per route."""
+        self.max_stacks = max_stacks
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, profile: Profile) -> None:
+        """Add the samples of a finished request."""
+        key = f"{profile.method} {profile.route or profile.path}"
+        entry = self._routes.setdefault(key, {"requests": 0, "samples": 0, "cpu_samples": 0, "stacks": {}})
+        entry["requests"] += 1
+        entry["samples"] += profile.samples
+        entry["cpu_samples"] += profile.cpu_samples
+        for stack, samples in profile.stacks.items():
+            _count(entry["stacks"], stack, samples, self.max_stacks)
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        """Get collapsed stacks of one route ("GET /api/tasks"), or of all under a frame per route."""
+        if route is not None:
+            entry = self._routes.get(route)
+            return _collapsed(entry["stacks"]) if entry else ""
+        return "".join(_collapsed(entry["stacks"], f"{key};") for key, entry in self._routes.items())
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Get the request and sample counts by route."""
+        return {
+            key: {"requests": entry["requests"], "samples": entry["samples"], "cpu_samples": entry["cpu_samples"]}
+            for key, entry in self._routes.items()
+        }
+
+    def reset(self) -> None:
+        """Forget all samples."""
+        self._routes.clear()
+
+
+sampler = Sampler(settings.profiling_interval_ms / 1000)
+profile_store = ProfileStore(settings.profiling_max_profiles, settings.profiling_dir)
+aggregates = StackAggregate(settings.profiling_max_stacks)
+
+
+def authorized(token: Optional[str]) -> bool:
+    """Check a caller's token against PROFILING_TOKEN; always false while it is unset."""
+    return bool(settings.profiling_token and token) and hmac.compare_digest(
+        token.encode("utf-8"), settings.profiling_token.encode("utf-8")
+    )
+
+
+def require_profiling_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    """Dependency allowing only callers sending PROFILING_TOKEN."""
+    if not settings.profiling_token:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+def _request_token(scope: Dict[str, Any]) -> Optional[str]:
+    """Get the profiling token of a request from its X-Profile-Token header."""
+    header = dict(scope.get("headers") or []).get(b"x-profile-token")
+    return header.decode("latin-1") if header is not None else None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that ask for it and a sample of chosen paths."""
+
+    def __init__(self, app: Any, sample_paths: List[str], sample_rate: float):
+        """Wrap an ASGI app; sample_rate of the requests to sample_paths are aggregated."""
+        self.app = app
+        self.sample_paths = set(sample_paths)
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Handle a request, under the profiler if asked for or sampled."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        on_demand = authorized(_request_token(scope))
+        sampled = not on_demand and scope["path"] in self.sample_paths and random.random() < self.sample_rate
+        if not (on_demand or sampled):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_profile_id(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode("latin-1"))]
+            await send(message)
+
+        coro = self.app(scope, receive, send_with_profile_id if on_demand else send)
+        profile = Profile(coro, scope["method"], scope["path"], settings.profiling_max_stacks)
+        sampler.add(profile)
+        try:
+            await coro
+        finally:
+            sampler.remove(profile)
+            profile.finish(getattr(scope.get("route"), "path", None))
+            if on_demand:
+                await profile_store.add(profile)
+            else:
+                aggregates.add(profile)
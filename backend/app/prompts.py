@@ -0,0 +1,339 @@
+"""Versioned prompt templates with weighted traffic splitting and per-version stats."""
+
+import json
+import logging
+import random
+import string
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Number of recent calls kept per template version for latency percentiles
+LATENCY_WINDOW = 1000
+
+
+# Built-in templates (version 1 of each prompt)
+
+CATEGORIZE_TASKS_V1 = """
+Analyze the following tasks and group them into logical categories.
+Consider the user's historical preferences: {existing_categories}
+
+Tasks to categorize:
+
+{task_list}
+
+Provide a JSON response with this structure:
+{{
+    "categories": [
+        {{
+            "name": "Category Name",
+            "description": "Brief description of what this category includes",
+            "tasks": [task_indices],
+            "priority_ranking": 1-5
+        }}
+    ],
+    "reasoning": "Explanation of the categorization logic"
+}}
+
+Guidelines:
+- Create 3-7 meaningful categories
+- Each task should belong to exactly one category
+- Categories should be logical and actionable
+- Consider task types, complexity, and goals
+- Priority ranking: 1 (lowest priority) to 5 (highest priority category)
+"""
+
+
+SCORE_PRIORITIES_V1 = """
+Analyze and rank the following tasks by priority. Consider:
+- User's historical priority patterns: {priority_distribution}
+- Task dependencies and logical flow
+- Estimated effort vs. impact
+- Urgency and importance
+
+Tasks to prioritize:
+
+{task_list}
+
+Provide a JSON response with this structure:
+{{
+    "ranked_tasks": [
+        {{
+            "task_index": 0,
+            "ai_priority_score": 1-10,
+            "reasoning": "Specific reason for this priority",
+            "estimated_effort": "Low/Medium/High",
+            "dependencies": ["task_indices"],
+            "impact_level": "Low/Medium/High"
+        }}
+    ],
+    "recommendations": ["List of priority recommendations"]
+}}
+
+Scoring guidelines:
+- 1-3: Low priority (can be deferred)
+- 4-6: Medium priority (important but not urgent)
+- 7-8: High priority (important and somewhat urgent)
+- 9-10: Critical priority (urgent and critical)
+"""
+
+
+DASHBOARD_SUMMARY_V1 = """
+Create a comprehensive dashboard suggestion based on this analysis:
+
+Plan: {plan_title}
+Description: {plan_description}
+
+Categorized Tasks: {categorized_count}
+Categories: {category_count}
+
+Priority Analysis: {scored_count} tasks scored
+
+Provide a JSON response:
+{{
+    "dashboard_title": "Suggested Dashboard Title",
+    "summary": "Brief summary of the analysis",
+    "categories": [...],
+    "priority_groups": {{
+        "critical": [],
+        "high": [],
+        "medium": [],
+        "low": []
+    }},
+    "recommendations": [],
+    "estimated_completion_time": "Time estimate",
+    "next_steps": ["Immediate next steps"]
+}}
+"""
+
+
+ORGANIZE_PROMPT_V1 = """
+You are a task organization expert. The user will give you a messy, unorganized prompt about their goals, ideas, or thoughts.
+Your job is to:
+1. Extract clear, actionable tasks from their messy input
+2. Group tasks into logical categories (3-7 categories)
+3. Assign each task to a status: "todo" (not started), "doing" (in progress), or "upcoming" (blocked/future)
+
+User's messy input:
+{messy_prompt}
+
+Provide a JSON response with this structure:
+{{
+    "categories": [
+        {{
+            "name": "Category Name",
+            "description": "Brief description of this category's focus",
+            "icon": "emoji-or-icon-name",
+            "color": "blue|green|purple|orange|red|yellow|pink",
+            "tasks": {{
+                "todo": [
+                    {{
+                        "title": "Clear task title",
+                        "description": "Detailed description",
+                        "priority": 1-10,
+                        "reasoning": "Why this task matters and why it's in todo"
+                    }}
+                ],
+                "doing": [
+                    {{
+                        "title": "Task currently in progress",
+                        "description": "Detailed description",
+                        "priority": 1-10,
+                        "reasoning": "Why this task is actively being worked on"
+                    }}
+                ],
+                "upcoming": [
+                    {{
+                        "title": "Future task",
+                        "description": "Detailed description",
+                        "priority": 1-10,
+                        "reasoning": "Why this task is upcoming (dependencies, timing, etc.)"
+                    }}
+                ]
+            }}
+        }}
+    ],
+    "summary": "Brief summary of what you organized",
+    "total_tasks": count,
+    "suggested_next_steps": ["Immediate action items"]
+}}
+
+Guidelines:
+- Extract 5-20 actionable tasks total
+- Create 3-7 logical categories based on themes (e.g., Development, Design, Marketing, Research, etc.)
+- Assign statuses based on task nature:
+  * "todo" - Tasks ready to start now, clear next steps
+  * "doing" - Tasks that seem to be in progress or actively happening
+  * "upcoming" - Tasks blocked by dependencies, future phases, or lower priority
+- Priority 1-10: 1-3 (low), 4-6 (medium), 7-8 (high), 9-10 (critical)
+- Be specific and actionable in task titles
+- Provide clear reasoning for status assignments
+"""
+
+
+BUILTIN_TEMPLATES = [
+    {"id": "categorize_tasks", "version": 1, "text": CATEGORIZE_TASKS_V1},
+    {"id": "score_priorities", "version": 1, "text": SCORE_PRIORITIES_V1},
+    {"id": "dashboard_summary", "version": 1, "text": DASHBOARD_SUMMARY_V1},
+    {"id": "organize_prompt", "version": 1, "text": ORGANIZE_PROMPT_V1},
+]
+
+
+class PromptTemplate:
+    """A compiled, versioned prompt template."""
+
+    def __init__(self, template_id: str, version: int, text: str, weight: float = 1.0):
+        """Compile the template and collect its placeholders."""
+        self.template_id = template_id
+        self.version = version
+        self.text = text.strip("\n") + "\n"
+        self.weight = weight
+
+        try:
+            self.fields = frozenset(
+                field for _, field, _, _ in string.Formatter().parse(self.text) if field
+            )
+        except ValueError as e:
+            raise ValueError(f"Invalid prompt template {template_id} v{version}: {e}") from e
+
+    def render(self, **values: Any) -> str:
+        """Render the template with the given values."""
+        missing = self.fields - values.keys()
+        if missing:
+            raise ValueError(f"Missing values for prompt template {self.template_id}: {sorted(missing)}")
+        return self.text.format(**values)
+
+    def ref(self) -> Dict[str, Any]:
+        """Get the reference recorded with AI interactions."""
+        return {"id": self.template_id, "version": self.version}
+
+
+class TemplateStats:
+    """Call statistics of one template version."""
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.calls = 0
+        self.errors = 0
+        self.parse_failures = 0
+        self.tokens_total = 0
+        self.latencies_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Get a latency percentile over the recent window."""
+        if not self.latencies_ms:
+            return None
+        ordered = sorted(self.latencies_ms)
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 1)
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the statistics."""
+        return {
+            "calls": self.calls,
+            "p50_latency_ms": self.percentile(0.5),
+            "p95_latency_ms": self.percentile(0.95),
+            "tokens_total": self.tokens_total,
+            "avg_tokens": round(self.tokens_total / self.calls, 1) if self.calls else None,
+            "error_rate": round(self.errors / self.calls, 4) if self.calls else None,
+            "parse_failure_rate": round(self.parse_failures / self.calls, 4) if self.calls else None,
+        }
+
+
+class PromptRegistry:
+    """Registry of prompt templates compiled once at startup."""
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        """Initialize an empty registry."""
+        self._templates: Dict[str, Dict[int, PromptTemplate]] = {}
+        self._stats: Dict[Tuple[str, int], TemplateStats] = {}
+        self._rng = rng or random.Random()
+
+    def register(self, template_id: str, version: int, text: str, weight: float = 1.0) -> PromptTemplate:
+        """Compile and register a template version."""
+        template = PromptTemplate(template_id, version, text, weight)
+        self._templates.setdefault(template_id, {})[version] = template
+        self._stats.setdefault((template_id, version), TemplateStats())
+        return template
+
+    def set_weight(self, template_id: str, version: int, weight: float) -> None:
+        """Change the traffic share of a registered template version."""
+        self.get(template_id, version).weight = weight
+
+    def get(self, template_id: str, version: int) -> PromptTemplate:
+        """Get a specific template version."""
+        try:
+            return self._templates[template_id][version]
+        except KeyError:
+            raise KeyError(f"Unknown prompt template {template_id} v{version}")
+
+    def select(self, template_id: str) -> PromptTemplate:
+        """Pick a version of a template according to the traffic weights."""
+        versions = [t for t in self._templates.get(template_id, {}).values() if t.weight > 0]
+        if not versions:
+            raise KeyError(f"No active versions of prompt template {template_id}")
+        if len(versions) == 1:
+            return versions[0]
+        return self._rng.choices(versions, weights=[t.weight for t in versions])[0]
+
+    def record(
+        self,
+        template: PromptTemplate,
+        latency_ms: float,
+        tokens: int,
+        parse_failed: bool,
+        errored: bool = False
+    ) -> None:
+        """Record the outcome of one call made with a template; errored calls raised after their retries."""
+        stats = self._stats[(template.template_id, template.version)]
+        stats.calls += 1
+        stats.tokens_total += tokens
+        stats.latencies_ms.append(latency_ms)
+        if errored:
+            stats.errors += 1
+        if parse_failed:
+            stats.parse_failures += 1
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Summarize the statistics of every template version."""
+        return [
+            {
+                "template_id": template_id,
+                "version": version,
+                "weight": template.weight,
+                **self._stats[(template_id, version)].summary()
+            }
+            for template_id, versions in sorted(self._templates.items())
+            for version, template in sorted(versions.items())
+        ]
+
+    def load_file(self, path: str) -> int:
+        """Load template versions and weights from a JSON file."""
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+
+        for entry in entries:
+            if "text" in entry:
+                self.register(entry["id"], int(entry["version"]), entry["text"], float(entry.get("weight", 1.0)))
+            else:
+                self.set_weight(entry["id"], int(entry["version"]), float(entry["weight"]))
+        return len(entries)
+
+
+def build_registry() -> PromptRegistry:
+    """Build the registry from the built-in templates and the optional templates file."""
+    registry = PromptRegistry()
+    for entry in BUILTIN_TEMPLATES:
+        registry.register(entry["id"], entry["version"], entry["text"])
+
+    if settings.prompt_templates_file:
+        loaded = registry.load_file(settings.prompt_templates_file)
+        logger.info(f"Loaded {loaded} prompt template entries from {settings.prompt_templates_file}")
+
+    return registry
+
+
+# Global prompt registry instance
+prompt_registry = build_registry()
@@ -0,0 +1,238 @@
+"""Statement fingerprints, slow-query log and per-request query counts.
+
+Every SQL statement is reduced to a fingerprint (literals, placeholders and value lists
+replaced), and calls, time and rows are accumulated per fingerprint. Statements slower than
+SLOW_QUERY_MS are logged as JSON lines; in debug mode their EXPLAIN plan follows, run on a
+separate connection so the request is not held up.
+
+Requests count their statements; those running QUERY_COUNT_WARN or more are logged with
+their most repeated fingerprints, which is how N+1 patterns show up. Tests use
+count_queries() (through the query_budget fixture) to hold each route to a query budget.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+from .metrics import Counter, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"\$\d+|%\(\w+\)s|(?<![:\w]):\w+|__\[POSTCOMPILE_\w+\]")
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+
+# Statements worth an EXPLAIN
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+DB_QUERIES_PER_REQUEST = registry.register(Histogram(
+    "mindmesh_db_queries_per_request", "SQL statements run by a request, by route.", ("route",),
+    (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+))
+DB_SLOW_QUERIES = registry.register(Counter("mindmesh_db_slow_queries_total", "Statements over SLOW_QUERY_MS."))
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """Get the (id, normalized text) of a statement, independent of its values."""
+    text = " ".join(statement.split())
+    text = _STRINGS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _VALUE_LISTS.sub("(?)", text)
+    text = _REPEATED_LISTS.sub("(?), ...", text)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16], text
+
+
+class QueryCounter:
+    """Statements run within a block, counted into enclosing counters as well."""
+
+    def __init__(self, parent: Optional["QueryCounter"] = None):
+        """Start counting, nested in parent if given."""
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Dict[str, int] = {}
+
+    def record(self, text: str, seconds: float) -> None:
+        """Count a statement here and in every enclosing counter."""
+        counter = self
+        while counter is not None:
+            counter.count += 1
+            counter.seconds += seconds
+            counter.statements[text] = counter.statements.get(text, 0) + 1
+            counter = counter.parent
+
+    def repeated(self, limit: int = 5) -> List[Tuple[str, int]]:
+        """Get the most frequent statements with their counts."""
+        return sorted(self.statements.items(), key=lambda item: -item[1])[:limit]
+
+    def report(self) -> str:
+        """Describe the statements, most frequent first."""
+        return "\n".join(f"  {count} x {text}" for text, count in self.repeated(len(self.statements)))
+
+
+class QueryStats:
+    """Calls, time and rows per statement fingerprint, bounded in the number of fingerprints."""
+
+    def __init__(self, max_fingerprints: int):
+        """Initialize an empty table."""
+        self.max_fingerprints = max_fingerprints
+        self.untracked = 0
+        self._rows: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, fingerprint_id: str, text: str, seconds: float, rows: int) -> None:
+        """Add a statement run."""
+        entry = self._rows.get(fingerprint_id)
+        if entry is None:
+            if len(self._rows) >= self.max_fingerprints:
+                self.untracked += 1
+                return
+            entry = self._rows[fingerprint_id] = {"statement": text, "calls": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0}
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        entry["rows"] += max(rows, 0)
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get the fingerprints with the most total time."""
+        entries = sorted(self._rows.items(), key=lambda item: -item[1]["seconds"])[:limit]
+        return [
+            {
+                "fingerprint": fingerprint_id,
+                "statement": entry["statement"],
+                "calls": entry["calls"],
+                "total_ms": round(entry["seconds"] * 1000, 2),
+                "mean_ms": round(entry["seconds"] * 1000 / entry["calls"], 3),
+                "max_ms": round(entry["max_seconds"] * 1000, 2),
+                "rows": entry["rows"]
+            }
+            for fingerprint_id, entry in entries
+        ]
+
+
+query_stats = QueryStats(settings.query_stats_max_fingerprints)
+
+# Counter of the innermost count_queries() block in the current context
+_current: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+# Fingerprints already explained, and the running EXPLAIN tasks
+_explained: Set[str] = set()
+_explains: Set[asyncio.Task] = set()
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Count the statements run in a block, including those of nested blocks."""
+    counter = QueryCounter(_current.get())
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+async def _explain(sync_engine: Engine, statement: str, parameters: Any, fingerprint_id: str) -> None:
+    """Log the plan of a slow statement, using a separate connection."""
+    prefix = "EXPLAIN QUERY PLAN " if sync_engine.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        async with AsyncEngine(sync_engine).connect() as conn:
+            rows = (await conn.exec_driver_sql(prefix + statement, parameters)).all()
+    except Exception as e:
+        logger.warning(f"EXPLAIN of slow query {fingerprint_id} failed: {e}")
+        return
+    logger.warning(json.dumps({
+        "event": "slow_query_plan",
+        "fingerprint": fingerprint_id,
+        "plan": [" | ".join(str(value) for value in row) for row in rows]
+    }))
+
+
+def _log_slow(conn, statement: str, parameters: Any, executemany: bool, fingerprint_id: str, seconds: float, rows: int) -> None:
+    """Log a slow statement and, in debug mode, schedule its EXPLAIN once per fingerprint."""
+    DB_SLOW_QUERIES.inc()
+    logger.warning(json.dumps({
+        "event": "slow_query",
+        "fingerprint": fingerprint_id,
+        "duration_ms": round(seconds * 1000, 2),
+        "rows": rows,
+        "statement": " ".join(statement.split())
+    }))
+
+    explainable = statement.lstrip().upper().startswith(_EXPLAINABLE) and not executemany
+    if settings.debug and explainable and fingerprint_id not in _explained and len(_explained) < settings.query_stats_max_fingerprints:
+        _explained.add(fingerprint_id)
+        task = asyncio.get_running_loop().create_task(_explain(conn.engine, statement, parameters, fingerprint_id))
+        _explains.add(task)
+        task.add_done_callback(_explains.discard)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Note when a statement starts."""
+    context._query_log_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Record a finished statement in the fingerprint table and the request's counter."""
+    seconds = time.perf_counter() - context._query_log_start
+    fingerprint_id, text = fingerprint(statement)
+    rows = cursor.rowcount if cursor.rowcount is not None else -1
+    query_stats.record(fingerprint_id, text, seconds, rows)
+
+    counter = _current.get()
+    if counter is not None:
+        counter.record(text, seconds)
+
+    if settings.slow_query_ms > 0 and seconds * 1000 >= settings.slow_query_ms:
+        _log_slow(conn, statement, parameters, executemany, fingerprint_id, seconds, rows)
+
+
+class QueryCountMiddleware:
+    """ASGI middleware counting the statements of each request."""
+
+    def __init__(self, app: Any, warn_count: int):
+        """Wrap an ASGI app; requests with warn_count or more statements are logged."""
+        self.app = app
+        self.warn_count = warn_count
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Handle a request, counting its statements."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as counter:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self._observe(scope, counter)
+
+    def _observe(self, scope: Dict[str, Any], counter: QueryCounter) -> None:
+        """Record the statement count of a finished request, logging it when over the warning count."""
+        route = getattr(scope.get("route"), "path", "unmatched")
+        DB_QUERIES_PER_REQUEST.observe(counter.count, route)
+        if self.warn_count > 0 and counter.count >= self.warn_count:
+            logger.warning(json.dumps({
+                "event": "query_count",
+                "method": scope["method"],
+                "route": route,
+                "queries": counter.count,
+                "db_ms": round(counter.seconds * 1000, 2),
+                "most_repeated": [{"statement": text, "count": count} for text, count in counter.repeated()]
+            }))
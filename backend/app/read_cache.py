@@ -0,0 +1,188 @@
+"""Per-user cache of serialized plan and task lists with versioned keys.
+
+Every cached list belongs to a scope of a user ("plans" or "tasks"), and its key embeds the
+scope's current version. Write handlers bump the versions of the scopes they change after
+committing, so later reads miss and reload; superseded entries are never read again and
+expire on their own.
+
+Entries live in an in-process tier and, when READ_CACHE_REDIS_URL is set, a shared
+Redis-compatible tier that also holds the versions. Without the shared tier versions are
+per process, so with several workers a write is only seen by the other workers' caches
+after read_cache_ttl_seconds.
+
+Lists loaded from a read replica within replica_lag_seconds of a version bump are returned
+but not stored: the replica may not have the write yet, and storing its answer under the new
+version would serve the stale list until it expires. The bump time is kept in the shared tier,
+so this holds on workers other than the one that handled the write.
+"""
+
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .config import settings
+from .expiring_cache import ExpiringCache
+from .metrics import register_cache
+from .serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Scopes of cached lists
+PLANS = "plans"
+TASKS = "tasks"
+
+KEY_PREFIX = "readcache"
+
+
+class ReadCache:
+    """Two-tier cache of per-user list responses."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, remote: Optional[Any] = None, replica_lag_seconds: float = 0.0):
+        """Initialize the cache; remote is an async client with get, set(ex=) and incr, or None."""
+        self.ttl_seconds = ttl_seconds
+        self.replica_lag_seconds = replica_lag_seconds
+        self.local = ExpiringCache(max_entries)
+        self.remote = remote
+        self.remote_hits = 0
+        self.loads = 0
+        self.bypasses = 0
+        self.unstored_replica_loads = 0
+        self._versions: Dict[str, int] = {}
+        self._bumped_at: Dict[str, float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether lists are cached at all."""
+        return self.ttl_seconds > 0 and self.local.max_entries > 0
+
+    def _version_key(self, user_id: Any, scope: str) -> str:
+        """Key of the version counter of a user's scope."""
+        return f"{KEY_PREFIX}:{user_id}:{scope}:version"
+
+    async def _version(self, user_id: Any, scope: str) -> Optional[int]:
+        """Get the current version of a user's scope, or None when it cannot be read."""
+        key = self._version_key(user_id, scope)
+        if self.remote is None:
+            return self._versions.get(key, 0)
+
+        try:
+            return int(await self.remote.get(key) or 0)
+        except Exception as e:
+            logger.warning(f"Read cache version lookup failed: {e}")
+            return None
+
+    async def _recently_bumped(self, user_id: Any, scope: str) -> bool:
+        """Check whether a user's scope moved to a new version within the replica lag window."""
+        key = f"{self._version_key(user_id, scope)}:bumped"
+        if time.time() - self._bumped_at.get(key, float("-inf")) < self.replica_lag_seconds:
+            return True
+        if self.remote is None:
+            return False
+
+        try:
+            return await self.remote.get(key) is not None
+        except Exception as e:
+            logger.warning(f"Read cache bump lookup failed: {e}")
+            return True
+
+    async def get_or_load(
+        self,
+        user_id: Any,
+        scope: str,
+        params: str,
+        load: Callable[[], Awaitable[Any]],
+        from_replica: bool = False
+    ) -> Any:
+        """Get a cached JSON-serializable value, loading and caching it on a miss.
+
+        The database is read directly when the version of the scope is unknown. from_replica
+        tells whether load reads a replica, whose answer is not stored right after a write.
+        """
+        version = await self._version(user_id, scope) if self.enabled else None
+        if version is None:
+            self.bypasses += 1
+            return await load()
+
+        key = f"{KEY_PREFIX}:{user_id}:{scope}:{version}:{params}"
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        if self.remote is not None:
+            try:
+                raw = await self.remote.get(key)
+            except Exception as e:
+                logger.warning(f"Read cache lookup failed: {e}")
+                raw = None
+            if raw is not None:
+                self.remote_hits += 1
+                value = loads(raw)
+                self.local.set(key, value, time.time() + self.ttl_seconds)
+                return value
+
+        value = await load()
+        self.loads += 1
+        if from_replica and await self._recently_bumped(user_id, scope):
+            self.unstored_replica_loads += 1
+            return value
+
+        self.local.set(key, value, time.time() + self.ttl_seconds)
+        if self.remote is not None:
+            try:
+                await self.remote.set(key, dumps(value), ex=max(int(self.ttl_seconds), 1))
+            except Exception as e:
+                logger.warning(f"Read cache store failed: {e}")
+        return value
+
+    async def invalidate(self, user_id: Any, *scopes: str) -> None:
+        """Move scopes of a user to a new version; call after the write has committed."""
+        for scope in scopes:
+            key = self._version_key(user_id, scope)
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._bumped_at[f"{key}:bumped"] = time.time()
+            if self.remote is not None:
+                try:
+                    await self.remote.incr(key)
+                    if self.replica_lag_seconds > 0:
+                        await self.remote.set(f"{key}:bumped", "1", ex=max(math.ceil(self.replica_lag_seconds), 1))
+                except Exception as e:
+                    logger.warning(f"Read cache invalidation failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit rates and the share of list reads served without the database."""
+        local = self.local.stats()
+        hits = local["hits"] + self.remote_hits
+        reads = hits + self.loads + self.bypasses
+        return {
+            "local": local,
+            "remote_enabled": self.remote is not None,
+            "remote_hits": self.remote_hits,
+            "database_loads": self.loads,
+            "bypasses": self.bypasses,
+            "unstored_replica_loads": self.unstored_replica_loads,
+            "hit_rate": round(hits / reads, 4) if reads else None,
+            "database_reads_saved": hits
+        }
+
+
+def connect_remote(url: str) -> Optional[Any]:
+    """Create the shared Redis tier client, or None when it is not configured or unavailable."""
+    if not url:
+        return None
+    try:
+        import redis.asyncio as redis
+    except ImportError:
+        logger.warning("READ_CACHE_REDIS_URL is set but the redis package is not installed; using the in-process tier only")
+        return None
+    return redis.from_url(url, decode_responses=True)
+
+
+# Global read cache instance
+read_cache = ReadCache(
+    max_entries=settings.read_cache_max_entries,
+    ttl_seconds=settings.read_cache_ttl_seconds,
+    remote=connect_remote(settings.read_cache_redis_url),
+    replica_lag_seconds=settings.read_your_writes_seconds
+)
+register_cache("read_cache", lambda: (read_cache.local.hits + read_cache.remote_hits, read_cache.loads + read_cache.bypasses))
@@ -0,0 +1,149 @@
+"""Routing of read-only sessions to health-checked read replicas."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import Depends
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from .auth import get_current_user
+from .config import settings
+from .database import USER_ID_KEY, User, get_db
+from .metrics import instrument_engine
+from .serialization import dumps_str, loads
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """A read replica engine and its health."""
+
+    def __init__(self, url: str):
+        """Create the replica engine and session factory."""
+        self.engine: AsyncEngine = create_async_engine(
+            url, echo=False, pool_pre_ping=True, json_serializer=dumps_str, json_deserializer=loads
+        )
+        self.sessionmaker = async_sessionmaker(self.engine, class_=AsyncSession)
+        self.healthy = True
+        instrument_engine(self.engine, f"replica:{self.engine.url.host}")
+
+    @property
+    def name(self) -> str:
+        """Replica URL without credentials, for logging."""
+        return self.engine.url.render_as_string(hide_password=True)
+
+
+class ReplicaRouter:
+    """Picks a healthy replica for reads, keeping recent writers on the primary."""
+
+    def __init__(self, urls: List[str], sticky_seconds: float, check_seconds: int):
+        """Initialize the router with its replicas and timing windows."""
+        self.replicas = [Replica(url) for url in urls]
+        self.sticky_seconds = sticky_seconds
+        self.check_seconds = check_seconds
+        self._last_write: Dict[Any, float] = {}
+        self._next = 0
+
+    def note_write(self, user_id: Any) -> None:
+        """Record that a user committed a write, pinning their reads to the primary."""
+        now = time.monotonic()
+        self._last_write[str(user_id)] = now
+
+        # Forget writers whose window has passed so the map stays small
+        if len(self._last_write) > 10_000:
+            cutoff = now - self.sticky_seconds
+            self._last_write = {key: at for key, at in self._last_write.items() if at > cutoff}
+
+    def is_sticky(self, user_id: Any) -> bool:
+        """Check whether a user wrote within the read-your-writes window."""
+        last_write = self._last_write.get(str(user_id))
+        return last_write is not None and time.monotonic() - last_write < self.sticky_seconds
+
+    def choose(self, user_id: Any) -> Optional[Replica]:
+        """Pick the next healthy replica for a user's reads, or None to read from the primary."""
+        if self.is_sticky(user_id):
+            return None
+
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next]
+
+    def is_replica(self, session: AsyncSession) -> bool:
+        """Check whether a session reads from one of the replicas rather than the primary."""
+        return any(session.bind is replica.engine for replica in self.replicas)
+
+    def mark_unhealthy(self, replica: Replica) -> None:
+        """Take a replica out of rotation until its next successful health check."""
+        if replica.healthy:
+            logger.warning(f"Read replica {replica.name} marked unhealthy")
+        replica.healthy = False
+
+    async def check(self) -> None:
+        """Probe every replica and update its health."""
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout=self.check_seconds)
+            except Exception as e:
+                if replica.healthy:
+                    logger.warning(f"Read replica {replica.name} failed health check: {e}")
+                replica.healthy = False
+            else:
+                if not replica.healthy:
+                    logger.info(f"Read replica {replica.name} is healthy again")
+                replica.healthy = True
+
+    async def run_health_checks(self) -> None:
+        """Probe the replicas periodically until cancelled."""
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_seconds)
+
+    async def dispose(self) -> None:
+        """Close the replica connection pools."""
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()],
+    settings.read_your_writes_seconds,
+    settings.database_replica_check_seconds
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _note_committed_write(session: Session) -> None:
+    """Pin the user of a committed primary session to the primary."""
+    user_id = session.info.get(USER_ID_KEY)
+    if user_id is not None:
+        replica_router.note_write(user_id)
+
+
+async def get_read_db(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a session for read-only endpoints.
+
+    Uses a healthy replica unless the user wrote recently, otherwise the request's primary session.
+    """
+    replica = replica_router.choose(current_user.id)
+    if replica is None:
+        yield db
+        return
+
+    async with replica.sessionmaker() as session:
+        try:
+            yield session
+        except (DBAPIError, OSError):
+            replica_router.mark_unhealthy(replica)
+            raise
@@ -1,7 +1,7 @@
 
 """Simplified Pydantic schemas."""
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 
@@ -21,8 +21,8 @@ class Plan(BaseSchema):
     description: Optional[str] = None
     status: str
     original_thought: Optional[str] = None
-    ai_generated_data: Optional[str] = None
-    ai_metadata: Optional[str] = None
+    ai_generated_data: Optional[Dict[str, Any]] = None
+    ai_metadata: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
 
@@ -58,6 +58,50 @@ class TaskCreate(BaseModel):
     priority: int = Field(default=3, ge=1, le=5)
 
 
+class PlanWithTasks(BaseModel):
+    """Plan schema with its tasks."""
+    plan: Plan
+    tasks: List[Task]
+
+
+class AIInteractionSummary(BaseSchema):
+    """AI interaction schema without request and response documents."""
+    model_config = {"from_attributes": True, "protected_namespaces": ()}
+
+    id: UUID
+    interaction_type: str
+    model_used: Optional[str] = None
+    tokens_used: int = 0
+    response_time_ms: Optional[int] = None
+    user_feedback: Optional[int] = None
+    template_id: Optional[str] = None
+    template_version: Optional[int] = None
+    trace_id: Optional[str] = None
+    created_at: datetime
+
+
+class AIUsageDay(BaseSchema):
+    """Daily AI usage rollup schema."""
+    model_config = {"from_attributes": True, "protected_namespaces": ()}
+
+    day: date
+    interaction_type: str
+    model_used: str
+    interaction_count: int
+    tokens_used: int
+    cost_estimate: float
+    latency_p50_ms: Optional[int] = None
+    latency_p95_ms: Optional[int] = None
+    latency_p99_ms: Optional[int] = None
+
+
+class PlanDetail(BaseModel):
+    """Plan schema with its tasks and latest AI interaction; sections may be omitted."""
+    plan: Optional[Plan] = None
+    tasks: Optional[List[Task]] = None
+    latest_interaction: Optional[AIInteractionSummary] = None
+
+
 class User(BaseSchema):
     """User schema."""
     id: UUID
@@ -127,15 +171,18 @@ class AIInteraction(BaseModel):
 
     id: UUID
     user_id: UUID
-    plan_id: UUID
+    plan_id: Optional[UUID] = None
     interaction_type: str
-    request_data: Optional[str] = None
-    response_data: Optional[str] = None
+    request_data: Optional[Dict[str, Any]] = None
+    response_data: Optional[Dict[str, Any]] = None
     tokens_used: int = 0
     cost_estimate: float = 0.0
     model_used: Optional[str] = None
     response_time_ms: Optional[int] = None
     user_feedback: Optional[int] = Field(None, ge=1, le=5)
+    template_id: Optional[str] = None
+    template_version: Optional[int] = None
+    trace_id: Optional[str] = None
     created_at: datetime
 
 
@@ -156,9 +203,9 @@ class AIAnalysisResponse(BaseModel):
 
 class EnhancedPlan(Plan):
     """Enhanced plan schema with AI fields."""
-    ai_generated_data: Optional[str] = None
+    ai_generated_data: Optional[Dict[str, Any]] = None
     original_thought: Optional[str] = None
-    ai_metadata: Optional[str] = None
+    ai_metadata: Optional[Dict[str, Any]] = None
 
 
 class EnhancedTask(Task):
@@ -189,6 +236,14 @@ class AIDashboardGeneration(BaseModel):
 
 # Enhanced create schemas with AI support
 
+class OrganizedPlanCreate(BaseModel):
+    """Schema for saving an organize-prompt result as a plan with tasks."""
+    interaction_id: Optional[UUID] = Field(None, description="Organize-prompt interaction to save")
+    result: Optional[Dict[str, Any]] = Field(None, description="Organize-prompt result to save")
+    title: Optional[str] = Field(None, min_length=1, max_length=200)
+    description: Optional[str] = Field(None, max_length=1000)
+
+
 class PlanCreateWithAI(PlanCreate):
     """Enhanced plan creation schema with AI support."""
     original_thought: Optional[str] = None
@@ -0,0 +1,32 @@
+"""Fast JSON encoding with orjson for API responses, cached payloads and JSON columns."""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+from .timings import timed
+
+# Integer dict keys (e.g. priority histograms) and numpy scalars from calibration are encoded as-is
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+loads = orjson.loads
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as JSON bytes; UUIDs and datetimes are native, other unknown types become strings."""
+    return orjson.dumps(value, default=str, option=OPTIONS)
+
+
+def dumps_str(value: Any) -> str:
+    """Encode a value as a JSON string, for text columns and the database JSON serializer."""
+    return dumps(value).decode("utf-8")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """JSON response rendered with the shared orjson options."""
+
+    def render(self, content: Any) -> bytes:
+        """Encode the response content."""
+        with timed("serialize"):
+            return dumps(content)
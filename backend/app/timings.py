@@ -0,0 +1,142 @@
+"""Per-request time breakdown reported as a Server-Timing header and a log line.
+
+Sampled requests collect the time spent in named phases: "auth" (token verification and
+user lookup), "db" (every SQL statement, from engine events), "ai" (Gemini calls) and
+"serialize" (response model conversion and JSON rendering). Phases may overlap; the auth
+lookup query, for example, is also counted under "db".
+"""
+
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTIONS = {
+    "auth": "Token and user lookup",
+    "db": "Database",
+    "ai": "Gemini",
+    "serialize": "Serialization"
+}
+
+
+class RequestTimings:
+    """Accumulated durations and counts of the phases of one request."""
+
+    def __init__(self):
+        """Start with no recorded phases."""
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Record one occurrence of a phase."""
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Get milliseconds and counts by phase."""
+        return {
+            name: {"ms": round(seconds * 1000, 2), "count": self.counts[name]}
+            for name, seconds in self.durations.items()
+        }
+
+    def header(self, total_seconds: float) -> str:
+        """Format the phases and the total as a Server-Timing header value."""
+        metrics = [
+            f'{name};dur={seconds * 1000:.2f};desc="{DESCRIPTIONS.get(name, name)} x{self.counts[name]}"'
+            for name, seconds in self.durations.items()
+        ]
+        metrics.append(f"total;dur={total_seconds * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+# Timings of the current request, None when it is not sampled
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current() -> Optional[RequestTimings]:
+    """Get the timings of the current request, if it is sampled."""
+    return _current.get()
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Add the duration of the block to a phase of the current request."""
+    timings = _current.get()
+    start = time.perf_counter() if timings is not None else 0.0
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.add(name, time.perf_counter() - start)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Note when a statement of a sampled request starts."""
+    if _current.get() is not None:
+        context._timing_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Add the duration of a finished statement to the "db" phase."""
+    timings = _current.get()
+    start = getattr(context, "_timing_start", None)
+    if timings is not None and start is not None:
+        timings.add("db", time.perf_counter() - start)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware timing a sample of requests.
+
+    A sampled response gets a Server-Timing header; it is logged as one JSON line when it
+    took at least log_min_ms.
+    """
+
+    def __init__(self, app: Any, sample_rate: float = 1.0, log_min_ms: float = 250.0):
+        """Wrap an ASGI app."""
+        self.app = app
+        self.sample_rate = sample_rate
+        self.log_min_ms = log_min_ms
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Handle a request, timing it when sampled."""
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        status_code = None
+
+        async def send_with_timings(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                value = timings.header(time.perf_counter() - start).encode("latin-1")
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", value)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _current.reset(token)
+            total_ms = (time.perf_counter() - start) * 1000
+            if total_ms >= self.log_min_ms:
+                logger.info(json.dumps({
+                    "event": "server_timing",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "total_ms": round(total_ms, 2),
+                    "phases": timings.summary()
+                }))
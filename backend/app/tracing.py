@@ -0,0 +1,361 @@
+"""Tracing spans for requests, AI pipeline stages and database statements.
+
+Spans nest through a context variable: a span started while another is current becomes its
+child and shares its trace id. Requests start a root span, continuing the trace and the
+sampling decision of an incoming W3C traceparent header. Finished spans of sampled traces are buffered and handed to
+the configured exporter by a background task, so no export I/O happens on the request path.
+
+Exporters are pluggable: JsonLinesExporter appends one JSON object per span to a local file
+for offline analysis, and OTLPHttpExporter posts OTLP/HTTP JSON to a collector. Custom ones
+subclass SpanExporter and are set with tracer.exporter.
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text kept as a db span attribute
+MAX_STATEMENT_CHARS = 500
+
+
+class Span:
+    """A timed operation with attributes, belonging to a trace."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, attributes: Optional[Dict[str, Any]] = None):
+        """Start the span now."""
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute."""
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: int = 1) -> None:
+        """Add to a numeric attribute, e.g. a retry count."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """Finish the span and hand it to the tracer."""
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        tracer.finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the span as a JSON-serializable dict."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+# Span of the operation in progress in the current context
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def start_span(name: str, remote_parent: Optional[Tuple[str, str, bool]] = None, **attributes: Any) -> Span:
+    """Create a child of the current span, or a root span, without making it current.
+
+    remote_parent is the (trace id, span id, sampled flag) of a caller from another process;
+    its sampling decision is kept so the whole distributed trace is exported or none of it.
+    """
+    parent = _current.get()
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, parent.sampled, attributes)
+    if remote_parent is not None:
+        return Span(name, remote_parent[0], remote_parent[1], remote_parent[2], attributes)
+    return Span(name, os.urandom(16).hex(), None, random.random() < tracer.sample_rate, attributes)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Run a block in a span, recording an escaping exception as its error."""
+    current = start_span(name, **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        _current.reset(token)
+        current.end(e)
+        raise
+    _current.reset(token)
+    current.end()
+
+
+def current_span() -> Optional[Span]:
+    """Get the span in progress, if any."""
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """Get the trace id of the operation in progress, if any."""
+    current = _current.get()
+    return current.trace_id if current is not None else None
+
+
+def parse_traceparent(value: str) -> Optional[Tuple[str, str, bool]]:
+    """Get (trace id, parent span id, sampled) from a W3C traceparent header, or None if malformed."""
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 0x01)
+
+
+class SpanExporter(abc.ABC):
+    """Destination of finished spans; export runs in a worker thread."""
+
+    @abc.abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        """Send a batch of spans."""
+
+
+class JsonLinesExporter(SpanExporter):
+    """Appends spans to a local file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        """Write to path, creating it when missing."""
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        """Append the spans."""
+        with open(self.path, "a", encoding="utf-8") as f:
+            for finished in spans:
+                f.write(json.dumps(finished.to_dict(), default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Encode an attribute value as an OTLP AnyValue."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPHttpExporter(SpanExporter):
+    """Posts spans to an OTLP/HTTP collector in the JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout_seconds: float = 5.0):
+        """Send to {endpoint}/v1/traces."""
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout_seconds = timeout_seconds
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        """Build the ExportTraceServiceRequest body."""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "mindmesh"},
+                    "spans": [
+                        {
+                            "traceId": finished.trace_id,
+                            "spanId": finished.span_id,
+                            "parentSpanId": finished.parent_id or "",
+                            "name": finished.name,
+                            "kind": 2 if finished.name.startswith("HTTP ") else 1,  # SERVER or INTERNAL
+                            "startTimeUnixNano": str(finished.start_ns),
+                            "endTimeUnixNano": str(finished.end_ns),
+                            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in finished.attributes.items()],
+                            "status": {"code": 2, "message": finished.error} if finished.error else {"code": 1}
+                        }
+                        for finished in spans
+                    ]
+                }]
+            }]
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        """Post the spans."""
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(self.payload(spans), default=str).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout_seconds):
+            pass
+
+
+class Tracer:
+    """Buffers finished spans of sampled traces and exports them in batches.
+
+    Until start() is called (scripts, tests) spans are only exported by explicit flush() calls.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter], sample_rate: float, flush_seconds: float, max_pending: int):
+        """Initialize the tracer; without an exporter finished spans are discarded."""
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: List[Span] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def finish(self, finished: Span) -> None:
+        """Queue a finished span for export, dropping the oldest beyond max_pending."""
+        if self.exporter is None or not finished.sampled:
+            return
+        self._pending.append(finished)
+        if len(self._pending) > self.max_pending:
+            del self._pending[0]
+            self.dropped += 1
+
+    async def flush(self) -> None:
+        """Export the queued spans; a failed batch is logged and discarded."""
+        if not self._pending or self.exporter is None:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self.exporter.export, batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            logger.warning(f"Exporting {len(batch)} spans failed: {e}")
+
+    async def _run(self) -> None:
+        """Flush every flush_seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start exporting in the background."""
+        if self.exporter is not None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the background exporter and export the remaining spans."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+
+def build_exporter() -> Optional[SpanExporter]:
+    """Create the exporter selected by TRACING_EXPORTER."""
+    if settings.tracing_exporter == "jsonl":
+        return JsonLinesExporter(settings.tracing_file)
+    if settings.tracing_exporter == "otlp":
+        return OTLPHttpExporter(settings.tracing_otlp_endpoint, settings.app_name)
+    if settings.tracing_exporter:
+        logger.warning(f"Unknown TRACING_EXPORTER {settings.tracing_exporter!r}; spans are not exported")
+    return None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Start a db span for a statement run inside a sampled trace."""
+    parent = _current.get()
+    if parent is not None and parent.sampled:
+        context._tracing_span = start_span(
+            "db.query", **{"db.system": conn.dialect.name, "db.statement": statement[:MAX_STATEMENT_CHARS]}
+        )
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Finish the db span of a statement."""
+    statement_span = getattr(context, "_tracing_span", None)
+    if statement_span is not None:
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            statement_span.set_attribute("db.rows", cursor.rowcount)
+        statement_span.end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    """Finish the db span of a failed statement with its error."""
+    statement_span = getattr(exception_context.execution_context, "_tracing_span", None)
+    if statement_span is not None:
+        statement_span.end(exception_context.original_exception)
+
+
+class TracingMiddleware:
+    """ASGI middleware running each request in a root span."""
+
+    def __init__(self, app: Any):
+        """Wrap an ASGI app."""
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Handle a request in a span named after its route."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = dict(scope.get("headers") or []).get(b"traceparent", b"").decode("latin-1")
+        request_span = start_span(
+            f"HTTP {scope['method']}",
+            remote_parent=parse_traceparent(traceparent) if traceparent else None,
+            **{"http.method": scope["method"], "http.target": scope["path"]}
+        )
+        token = _current.set(request_span)
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                request_span.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                request_span.name = f"HTTP {scope['method']} {route}"
+                request_span.set_attribute("http.route", route)
+            request_span.end(error)
+
+
+# Global tracer instance
+tracer = Tracer(
+    exporter=build_exporter(),
+    sample_rate=settings.tracing_sample_rate,
+    flush_seconds=settings.tracing_flush_seconds,
+    max_pending=settings.tracing_max_pending
+)
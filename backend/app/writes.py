@@ -0,0 +1,171 @@
+"""Single-statement, ownership-checked writes of plans, tasks and AI interactions."""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import JSON, Row, and_, cast, delete, exists, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .context_stats import TaskFacts, plan_summary
+from .database import AIInteraction, Plan, Task
+
+plans_table = Plan.__table__
+tasks_table = Task.__table__
+interactions_table = AIInteraction.__table__
+
+# Columns clients may change through the update endpoints
+PLAN_FIELDS = ("title", "description", "status", "original_thought", "ai_generated_data", "ai_metadata")
+TASK_FIELDS = ("title", "description", "priority", "status", "ai_category", "ai_priority_score", "ai_reasoning")
+
+# Task columns whose previous values update_task returns
+TASK_HISTORY = ("title", "description", "priority", "status", "ai_category", "ai_priority_score")
+
+
+def changes(update_data: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Keep the updatable, non-null fields of a client update."""
+    return {key: value for key, value in update_data.items() if key in fields and value is not None}
+
+
+def _owned_task(user_id: Any, task_id: Any):
+    """Criteria matching a task in one of the user's plans."""
+    owned_plans = select(plans_table.c.id).where(plans_table.c.user_id == user_id)
+    return and_(tasks_table.c.id == task_id, tasks_table.c.plan_id.in_(owned_plans))
+
+
+def _facts(row: Any) -> TaskFacts:
+    """Get the aggregate facts of a returned task row."""
+    return TaskFacts(row.ai_category, row.priority, row.status)
+
+
+async def insert_task(session: AsyncSession, user_id: Any, values: Dict[str, Any]) -> Optional[Row]:
+    """Insert a task into one of the user's plans with INSERT ... SELECT ... WHERE EXISTS.
+
+    Returns the new task row, or None when the plan is not the user's.
+    """
+    now = datetime.utcnow()
+    row = {"id": uuid.uuid4(), **values, "created_at": now, "updated_at": now}
+    owned = exists().where(plans_table.c.id == values["plan_id"], plans_table.c.user_id == user_id)
+    columns = [literal(value, tasks_table.c[key].type) for key, value in row.items()]
+    if session.bind.dialect.name == "postgresql":
+        # Cast so the selected parameters are typed as their target columns
+        columns = [cast(column, column.type) for column in columns]
+    source = select(*columns).where(owned)
+
+    result = await session.execute(
+        insert(tasks_table).from_select(list(row), source).returning(*tasks_table.c)
+    )
+    return result.first()
+
+
+async def update_plan(session: AsyncSession, user_id: Any, plan_id: Any, values: Dict[str, Any]) -> Optional[Row]:
+    """Update one of the user's plans, returning the updated row or None."""
+    result = await session.execute(
+        update(plans_table)
+        .where(plans_table.c.id == plan_id, plans_table.c.user_id == user_id)
+        .values(**values, updated_at=datetime.utcnow())
+        .returning(*plans_table.c)
+    )
+    return result.first()
+
+
+async def update_task(
+    session: AsyncSession,
+    user_id: Any,
+    task_id: Any,
+    values: Dict[str, Any]
+) -> Optional[Tuple[Dict[str, Any], Row]]:
+    """Update one of the user's tasks.
+
+    Returns the previous TASK_HISTORY values and the updated row, or None. PostgreSQL reads the
+    previous values from a self-join in the same UPDATE; other backends cannot return joined
+    columns and select them first.
+    """
+    values = {**values, "updated_at": datetime.utcnow()}
+
+    if session.bind.dialect.name == "postgresql":
+        # Joined rows are read from the statement snapshot, so they hold the pre-update values
+        old = tasks_table.alias("old")
+        result = await session.execute(
+            update(tasks_table)
+            .where(_owned_task(user_id, task_id), old.c.id == tasks_table.c.id)
+            .values(**values)
+            .returning(*tasks_table.c, *[old.c[name].label(f"previous_{name}") for name in TASK_HISTORY])
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return {name: getattr(row, f"previous_{name}") for name in TASK_HISTORY}, row
+
+    previous = (await session.execute(
+        select(*[tasks_table.c[name] for name in TASK_HISTORY]).where(_owned_task(user_id, task_id))
+    )).first()
+    if previous is None:
+        return None
+
+    result = await session.execute(
+        update(tasks_table).where(tasks_table.c.id == task_id).values(**values).returning(*tasks_table.c)
+    )
+    return dict(previous._mapping), result.one()
+
+
+async def delete_task(session: AsyncSession, user_id: Any, task_id: Any) -> Optional[TaskFacts]:
+    """Delete one of the user's tasks, returning its aggregate facts or None."""
+    result = await session.execute(
+        delete(tasks_table)
+        .where(_owned_task(user_id, task_id))
+        .returning(tasks_table.c.ai_category, tasks_table.c.priority, tasks_table.c.status)
+    )
+    row = result.first()
+    return _facts(row) if row else None
+
+
+async def delete_plan(session: AsyncSession, user_id: Any, plan_id: Any) -> Optional[Tuple[Dict[str, Any], List[TaskFacts]]]:
+    """Delete one of the user's plans, leaving its tasks and interactions to ON DELETE CASCADE.
+
+    Returns the plan summary and the facts of its deleted tasks, or None. On PostgreSQL the
+    tasks are read in the DELETE's RETURNING clause, which still sees them because cascades
+    run at the end of the statement; other backends delete the tasks explicitly first.
+    """
+    owned = and_(plans_table.c.id == plan_id, plans_table.c.user_id == user_id)
+    summary = (plans_table.c.id, plans_table.c.title, plans_table.c.description, plans_table.c.status)
+
+    if session.bind.dialect.name == "postgresql":
+        plan_tasks = (
+            select(func.json_agg(
+                func.json_build_array(tasks_table.c.ai_category, tasks_table.c.priority, tasks_table.c.status),
+                type_=JSON
+            ))
+            .where(tasks_table.c.plan_id == plans_table.c.id)
+            .correlate(plans_table)
+            .scalar_subquery()
+        )
+        row = (await session.execute(
+            delete(plans_table).where(owned).returning(*summary, plan_tasks.label("tasks"))
+        )).first()
+        if row is None:
+            return None
+        removed_tasks = [TaskFacts(*facts) for facts in row.tasks or []]
+    else:
+        tasks_result = await session.execute(
+            delete(tasks_table)
+            .where(tasks_table.c.plan_id.in_(select(plans_table.c.id).where(owned)))
+            .returning(tasks_table.c.ai_category, tasks_table.c.priority, tasks_table.c.status)
+        )
+        removed_tasks = [_facts(task) for task in tasks_result.all()]
+        row = (await session.execute(delete(plans_table).where(owned).returning(*summary))).first()
+        if row is None:
+            return None
+
+    return plan_summary(row), removed_tasks
+
+
+async def set_feedback(session: AsyncSession, user_id: Any, interaction_id: Any, feedback: int) -> Optional[Row]:
+    """Rate one of the user's AI interactions, returning its type and response or None."""
+    result = await session.execute(
+        update(interactions_table)
+        .where(interactions_table.c.id == interaction_id, interactions_table.c.user_id == user_id)
+        .values(user_feedback=feedback)
+        .returning(interactions_table.c.interaction_type, interactions_table.c.response_data)
+    )
+    return result.first()
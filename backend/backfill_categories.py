@@ -0,0 +1,58 @@
+"""Backfill canonical task categories for existing tasks."""
+
+import asyncio
+from sqlalchemy import select, update
+
+from app import context_stats
+from app.categories import category_normalizer
+from app.database import async_session, Plan, Task
+
+
+async def backfill_categories():
+    """Rewrite every task's ai_category to its owner's canonical category."""
+
+    async with async_session() as session:
+        result = await session.execute(
+            select(Plan.user_id, Task.ai_category)
+            .join(Task, Task.plan_id == Plan.id)
+            .where(Task.ai_category.is_not(None))
+            .distinct()
+            .order_by(Plan.user_id)
+        )
+        rows = result.all()
+
+    categories_by_user = {}
+    for row in rows:
+        categories_by_user.setdefault(row.user_id, []).append(row.ai_category)
+
+    print(f"Found {len(rows)} distinct categories across {len(categories_by_user)} users")
+
+    total_updated = 0
+    for user_id, categories in categories_by_user.items():
+        mapping = await category_normalizer.canonicalize(user_id, sorted(categories, key=len))
+
+        async with async_session() as session:
+            async with session.begin():
+                for raw, canonical in mapping.items():
+                    if raw == canonical:
+                        continue
+
+                    result = await session.execute(
+                        update(Task)
+                        .where(
+                            Task.ai_category == raw,
+                            Task.plan_id.in_(select(Plan.id).where(Plan.user_id == user_id))
+                        )
+                        .values(ai_category=canonical)
+                        .execution_options(synchronize_session=False)
+                    )
+                    total_updated += result.rowcount
+                    print(f"  ✓ {user_id}: '{raw}' -> '{canonical}' ({result.rowcount} tasks)")
+
+                # Category counts changed in bulk; rebuild the context aggregate on next read
+                await context_stats.invalidate(session, user_id)
+
+    print(f"\n✅ Backfill completed: {total_updated} tasks updated")
+
+if __name__ == "__main__":
+    asyncio.run(backfill_categories())
@@ -0,0 +1,111 @@
+"""Benchmark applying scored tasks on dashboard approval: per-task ORM loop vs bulk UPDATE.
+
+Runs against DATABASE_URL when set (use a disposable database), otherwise a temporary SQLite file.
+
+    python benchmarks/bench_approve_dashboard.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from uuid import UUID, uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+# Only the database is used; satisfy the remaining required settings when no .env is present
+for name in ["SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_KEY", "SUPABASE_JWT_SECRET", "GOOGLE_API_KEY"]:
+    os.environ.setdefault(name, "benchmark")
+
+from sqlalchemy import event, select
+
+from app.bulk import apply_scored_tasks
+from app.database import Base, Plan, Task, User, async_session, engine
+
+SIZES = [10, 100, 1000]
+ROUNDS = 5
+
+statements = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def count_statement(*args):
+    """Count statements sent to the database."""
+    global statements
+    statements += 1
+
+
+async def seed(size: int):
+    """Create a plan with the given number of tasks and their scored versions."""
+    user_id, plan_id = uuid4(), uuid4()
+    task_ids = [uuid4() for _ in range(size)]
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        session.add(Plan(id=plan_id, user_id=user_id, title=f"Benchmark {size}"))
+        session.add_all([
+            Task(id=task_id, plan_id=plan_id, title=f"Task {i}", priority=3)
+            for i, task_id in enumerate(task_ids)
+        ])
+        await session.commit()
+
+    scored = [
+        {"id": str(task_id), "ai_category": f"Category {i % 7}", "ai_priority_score": i % 10 + 1, "ai_reasoning": "x" * 200}
+        for i, task_id in enumerate(task_ids)
+    ]
+    return plan_id, scored
+
+
+async def apply_per_task(plan_id, scored):
+    """Apply scored tasks the way approve-dashboard did before: one SELECT per task."""
+    async with async_session() as session:
+        for task_data in scored:
+            result = await session.execute(
+                select(Task).where(Task.id == UUID(task_data["id"]), Task.plan_id == plan_id)
+            )
+            task = result.scalar_one_or_none()
+            if task:
+                task.ai_category = task_data["ai_category"]
+                task.ai_priority_score = task_data["ai_priority_score"]
+                task.ai_reasoning = task_data["ai_reasoning"]
+        await session.commit()
+
+
+async def apply_bulk(plan_id, scored):
+    """Apply scored tasks with the set-based bulk path."""
+    async with async_session() as session:
+        await apply_scored_tasks(session, plan_id, scored, {})
+        await session.commit()
+
+
+async def measure(apply, plan_id, scored):
+    """Return the best wall time in ms and the statement count of one run."""
+    global statements
+    best = float("inf")
+    for _ in range(ROUNDS):
+        statements = 0
+        start = time.perf_counter()
+        await apply(plan_id, scored)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, statements
+
+
+async def main():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    print(f"Backend: {engine.dialect.name}, best of {ROUNDS}")
+    print(f"{'tasks':>6} {'per-task ms':>12} {'stmts':>6} {'bulk ms':>9} {'stmts':>6} {'speedup':>8}")
+    for size in SIZES:
+        plan_id, scored = await seed(size)
+        loop_ms, loop_statements = await measure(apply_per_task, plan_id, scored)
+        bulk_ms, bulk_statements = await measure(apply_bulk, plan_id, scored)
+        print(f"{size:>6} {loop_ms:>12.1f} {loop_statements:>6} {bulk_ms:>9.1f} {bulk_statements:>6} {loop_ms / bulk_ms:>7.1f}x")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""Benchmark response compression: size, CPU time and end-to-end latency per level.
+
+Payloads are a small CRUD response, a 100-task plan and a 1000-task AI-organized plan, each
+encoded whole, plus the 1000 tasks streamed as NDJSON with a flush after every line. The
+latency estimate is compression time plus transfer time at the given link speeds, so it shows
+where the CPU spent on a higher level stops paying for itself. Brotli rows are printed when
+the brotli package is installed. No database is needed.
+
+    python benchmarks/bench_compression.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+# Only the encoders are used; satisfy the remaining required settings when no .env is present
+for name in ["SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_KEY", "SUPABASE_JWT_SECRET", "GOOGLE_API_KEY"]:
+    os.environ.setdefault(name, "benchmark")
+
+from app.compression import _Encoder, brotli
+from app.serialization import dumps
+
+ROUNDS = 20
+# Link speeds in megabits per second
+LINKS = {"3G": 1.5, "4G": 12.0, "broadband": 100.0}
+ENCODINGS = [("identity", 0), ("gzip", 1), ("gzip", 6), ("gzip", 9)]
+if brotli is not None:
+    ENCODINGS += [("br", 1), ("br", 4), ("br", 11)]
+
+
+def make_tasks(count):
+    """Build task dicts shaped like an AI-organized plan."""
+    plan_id, now = uuid4(), datetime.utcnow()
+    return [
+        {
+            "id": uuid4(),
+            "plan_id": plan_id,
+            "title": f"Task {i}",
+            "description": "Write the integration and its tests " * 3,
+            "priority": i % 5 + 1,
+            "status": "pending",
+            "ai_category": f"Category {i % 7}",
+            "ai_priority_score": i % 10 + 1,
+            "ai_reasoning": "Blocks the launch and depends on the API contract " * 4,
+            "created_at": now + timedelta(seconds=i),
+            "updated_at": now + timedelta(seconds=i)
+        }
+        for i in range(count)
+    ]
+
+
+def encode(encoding, level, chunks):
+    """Encode the chunks as one body (one chunk) or a flushed stream (several)."""
+    if encoding == "identity":
+        return b"".join(chunks)
+    encoder = _Encoder(encoding, gzip_level=level, brotli_quality=level)
+    return b"".join(encoder.chunk(chunk) for chunk in chunks[:-1]) + encoder.finish(chunks[-1])
+
+
+def measure(encoding, level, chunks):
+    """Median wall and CPU milliseconds of encoding, and the encoded size."""
+    wall, cpu = [], []
+    for _ in range(ROUNDS):
+        start, start_cpu = time.perf_counter(), time.process_time()
+        body = encode(encoding, level, chunks)
+        wall.append((time.perf_counter() - start) * 1000)
+        cpu.append((time.process_time() - start_cpu) * 1000)
+    return sorted(wall)[ROUNDS // 2], sorted(cpu)[ROUNDS // 2], len(body)
+
+
+def main():
+    tasks = make_tasks(1000)
+    payloads = {
+        "CRUD response": [dumps(tasks[0])],
+        "100-task plan": [dumps(tasks[:100])],
+        "1000-task plan": [dumps(tasks)],
+        "1000-task NDJSON stream": [dumps(task) + b"\n" for task in tasks]
+    }
+
+    for label, chunks in payloads.items():
+        size = sum(len(chunk) for chunk in chunks)
+        print(f"{label}: {size / 1024:.1f} KiB in {len(chunks)} chunk(s), median of {ROUNDS} rounds")
+        print(f"  {'encoding':<12} {'ratio':>6} {'wall ms':>8} {'cpu ms':>7}" + "".join(f" {name + ' ms':>13}" for name in LINKS))
+        for encoding, level in ENCODINGS:
+            wall, cpu, encoded = measure(encoding, level, chunks)
+            latencies = [wall + encoded * 8 / (speed * 1000) for speed in LINKS.values()]
+            name = encoding if encoding == "identity" else f"{encoding}-{level}"
+            print(f"  {name:<12} {size / encoded:6.1f} {wall:8.2f} {cpu:7.2f}" + "".join(f" {ms:13.1f}" for ms in latencies))
+
+
+if __name__ == "__main__":
+    main()
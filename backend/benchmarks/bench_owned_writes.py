@@ -0,0 +1,118 @@
+"""Benchmark ownership-checked task writes under concurrent load: SELECT-then-mutate vs single statement.
+
+Each operation runs in its own session, as a request would. Runs against DATABASE_URL when set
+(use a disposable database), otherwise a temporary SQLite file. SQLite fails concurrent
+read-then-write transactions with "database is locked", so it only runs a single worker.
+
+    python benchmarks/bench_owned_writes.py
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+# Only the database is used; satisfy the remaining required settings when no .env is present
+for name in ["SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_KEY", "SUPABASE_JWT_SECRET", "GOOGLE_API_KEY"]:
+    os.environ.setdefault(name, "benchmark")
+
+from sqlalchemy import event, select
+
+from app import writes
+from app.database import Base, Plan, Task, User, async_session, engine
+
+CONCURRENCY = [1, 8, 32]
+OPERATIONS_PER_WORKER = 50
+
+statements = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def count_statement(*args):
+    """Count statements sent to the database."""
+    global statements
+    statements += 1
+
+
+async def seed(workers: int):
+    """Create one user with a plan and a task per worker."""
+    user_id, plan_id = uuid4(), uuid4()
+    task_ids = [uuid4() for _ in range(workers)]
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        session.add(Plan(id=plan_id, user_id=user_id, title="Benchmark"))
+        session.add_all([Task(id=task_id, plan_id=plan_id, title="Task", priority=3) for task_id in task_ids])
+        await session.commit()
+    return user_id, task_ids
+
+
+async def update_select_then_mutate(user_id, task_id, priority: int):
+    """Update a task the way update_task did before: SELECT, mutate, commit, refresh."""
+    async with async_session() as session:
+        result = await session.execute(
+            select(Task).join(Plan).where(Task.id == task_id, Plan.user_id == user_id)
+        )
+        task = result.scalar_one_or_none()
+        task.priority = priority
+        await session.commit()
+        await session.refresh(task)
+
+
+async def update_single_statement(user_id, task_id, priority: int):
+    """Update a task with one ownership-scoped UPDATE ... RETURNING."""
+    async with async_session() as session:
+        await writes.update_task(session, user_id, task_id, {"priority": priority})
+        await session.commit()
+
+
+async def run(update, user_id, task_ids):
+    """Run every worker concurrently and return per-operation latencies in ms and statements per op."""
+    global statements
+    latencies = []
+
+    async def worker(task_id):
+        for i in range(OPERATIONS_PER_WORKER):
+            start = time.perf_counter()
+            await update(user_id, task_id, i % 5 + 1)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    statements = 0
+    await asyncio.gather(*[worker(task_id) for task_id in task_ids])
+    return latencies, statements / len(latencies)
+
+
+def percentile(latencies, fraction: float) -> float:
+    """Nearest-rank percentile of latencies."""
+    ordered = sorted(latencies)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def main():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    concurrency = CONCURRENCY if engine.dialect.name == "postgresql" else CONCURRENCY[:1]
+    print(f"Backend: {engine.dialect.name}, {OPERATIONS_PER_WORKER} updates per worker")
+    print(f"{'workers':>7} {'before p50':>11} {'p95':>7} {'stmts':>6} {'after p50':>10} {'p95':>7} {'stmts':>6} {'p50 gain':>9}")
+    for workers in concurrency:
+        user_id, task_ids = await seed(workers)
+        before, before_statements = await run(update_select_then_mutate, user_id, task_ids)
+        after, after_statements = await run(update_single_statement, user_id, task_ids)
+        before_p50, after_p50 = statistics.median(before), statistics.median(after)
+        print(
+            f"{workers:>7} {before_p50:>11.2f} {percentile(before, 0.95):>7.2f} {before_statements:>6.1f} "
+            f"{after_p50:>10.2f} {percentile(after, 0.95):>7.2f} {after_statements:>6.1f} {before_p50 / after_p50:>8.1f}x"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
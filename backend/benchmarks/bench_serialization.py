@@ -0,0 +1,111 @@
+"""Benchmark serializing a 1000-task list response and a large AI payload: stdlib json vs orjson.
+
+No database is needed.
+
+    python benchmarks/bench_serialization.py
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+# Only the serializers are used; satisfy the remaining required settings when no .env is present
+for name in ["SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_KEY", "SUPABASE_JWT_SECRET", "GOOGLE_API_KEY"]:
+    os.environ.setdefault(name, "benchmark")
+
+from fastapi.responses import JSONResponse
+
+from app.api import TASK_LIST, _dump
+from app.database import Task
+from app.schemas import Task as TaskSchema
+from app.serialization import FastJSONResponse, dumps_str
+
+TASKS = 1000
+ROUNDS = 20
+
+
+def make_tasks():
+    """Build detached task rows shaped like a large AI-organized plan."""
+    plan_id, now = uuid4(), datetime.utcnow()
+    return [
+        Task(
+            id=uuid4(),
+            plan_id=plan_id,
+            title=f"Task {i}",
+            description="Write the integration and its tests " * 3,
+            priority=i % 5 + 1,
+            status="pending",
+            ai_category=f"Category {i % 7}",
+            ai_priority_score=i % 10 + 1,
+            ai_reasoning="Blocks the launch and depends on the API contract " * 4,
+            created_at=now + timedelta(seconds=i),
+            updated_at=now + timedelta(seconds=i)
+        )
+        for i in range(TASKS)
+    ]
+
+
+def before(tasks) -> bytes:
+    """Per-row model dumps, then response model validation and stdlib json encoding."""
+    items = [TaskSchema.model_validate(task).model_dump(mode="json") for task in tasks]
+    content = TASK_LIST.dump_python(TASK_LIST.validate_python(items), mode="json")
+    return JSONResponse(content).body
+
+
+def before_cached(items) -> bytes:
+    """Cached items validated again by the response model and encoded with stdlib json."""
+    content = TASK_LIST.dump_python(TASK_LIST.validate_python(items), mode="json")
+    return JSONResponse(content).body
+
+
+def after_cold(tasks) -> bytes:
+    """One TypeAdapter pass over the rows, encoded with orjson."""
+    return FastJSONResponse(_dump(TASK_LIST, tasks)).body
+
+
+def after_cached(items) -> bytes:
+    """Items already validated and held by the read cache, encoded with orjson."""
+    return FastJSONResponse(items).body
+
+
+def timed(function, argument) -> float:
+    """Median milliseconds of a function over the rounds."""
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        function(argument)
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main():
+    tasks = make_tasks()
+    items = _dump(TASK_LIST, tasks)
+    assert json.loads(before(tasks)) == json.loads(after_cold(tasks))
+
+    payload = {"scored_tasks": items, "metadata": {"model": "gemini", "generated_at": datetime.utcnow()}}
+
+    print(f"{TASKS}-task list response, median of {ROUNDS} rounds")
+    for label, (old, new, argument) in {
+        "cache miss": (before, after_cold, tasks),
+        "cache hit": (before_cached, after_cached, items)
+    }.items():
+        baseline, elapsed = timed(old, argument), timed(new, argument)
+        print(f"  {label + ', response model + json':<44} {baseline:8.2f} ms")
+        print(f"  {label + ', TypeAdapter/direct + orjson':<44} {elapsed:8.2f} ms  {baseline / elapsed:5.1f}x")
+
+    print(f"AI payload with {TASKS} scored tasks ({len(dumps_str(payload)) // 1024} KiB) for a JSON column")
+    stdlib = timed(lambda value: json.dumps(value, default=str), payload)
+    fast = timed(dumps_str, payload)
+    print(f"  {'json.dumps':<44} {stdlib:8.2f} ms")
+    print(f"  {'orjson':<44} {fast:8.2f} ms  {stdlib / fast:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,6 @@ Save AI analysis to database to demonstrate where updates are stored.
 import os
 import sys
 import asyncio
-import json
 from uuid import uuid4
 from datetime import datetime
 
@@ -125,10 +124,10 @@ And I still haven't paid my hostel fees."""
         )
 
         # Save categorization to plan
-        plan.ai_generated_data = json.dumps({
+        plan.ai_generated_data = {
             "categorization": categorization_result,
             "generated_at": datetime.utcnow().isoformat()
-        })
+        }
 
         # Update tasks with AI categories
         categorized_tasks = categorization_result.get("categorized_tasks", [])
@@ -163,10 +162,11 @@ And I still haven't paid my hostel fees."""
                             break
 
             # Update AI data with priority results
-            current_ai_data = json.loads(plan.ai_generated_data or "{}")
-            current_ai_data["priority_scoring"] = priority_result
-            current_ai_data["updated_at"] = datetime.utcnow().isoformat()
-            plan.ai_generated_data = json.dumps(current_ai_data)
+            plan.ai_generated_data = {
+                **(plan.ai_generated_data or {}),
+                "priority_scoring": priority_result,
+                "updated_at": datetime.utcnow().isoformat()
+            }
 
             await session.commit()
             print("✅ Saved AI priority scoring to database")
@@ -180,7 +180,7 @@ And I still haven't paid my hostel fees."""
             user_id=user.id,
             plan_id=plan.id,
             interaction_type="dashboard",
-            request_data=json.dumps({"thought": original_thought}),
+            request_data={"thought": original_thought},
             response_data=plan.ai_generated_data,
             tokens_used=500,  # Estimated
             model_used=settings.gemini_model,
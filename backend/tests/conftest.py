@@ -2,6 +2,7 @@
 
 import os
 import pytest
+import pytest_asyncio
 import asyncio
 from unittest.mock import AsyncMock, MagicMock
 from uuid import uuid4
@@ -272,6 +273,37 @@ async def test_database():
     # Cleanup would go here
 
 
+@pytest_asyncio.fixture
+async def db_tables():
+    """Create all tables on the in-memory test engine and drop them afterwards."""
+    from app.database import Base, engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+@pytest.fixture
+def query_budget():
+    """Assert that a block runs at most a given number of SQL statements.
+
+    Usage: ``with query_budget(3): await client.get(...)``; an overrun fails with the
+    statements run, most repeated first, so N+1 patterns are easy to spot.
+    """
+    from contextlib import contextmanager
+    from app.query_log import count_queries
+
+    @contextmanager
+    def budget(limit: int):
+        with count_queries() as counter:
+            yield counter
+        assert counter.count <= limit, f"{counter.count} queries over a budget of {limit}:\n{counter.report()}"
+
+    return budget
+
+
 @pytest.fixture
 def mock_sqlalchemy():
     """Mock SQLAlchemy components."""
@@ -0,0 +1,108 @@
+"""Tests for list endpoint payloads."""
+
+from datetime import datetime
+from uuid import uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.auth import get_current_user
+from app.database import AIInteraction, Plan, Task, User, async_session
+from app.main import app
+
+
+@pytest_asyncio.fixture
+async def client_and_user(db_tables):
+    """Create a user with one AI-heavy plan and an authenticated client."""
+    user_id, plan_id = uuid4(), uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        session.add(Plan(
+            id=plan_id,
+            user_id=user_id,
+            title="Launch",
+            ai_generated_data={"summary": "x" * 10_000},
+            ai_metadata={"model": "gemini"}
+        ))
+        session.add(AIInteraction(
+            user_id=user_id,
+            plan_id=plan_id,
+            interaction_type="dashboard",
+            request_data={"plan_id": str(plan_id)},
+            response_data={"dashboard_data": {"summary": "x" * 10_000}}
+        ))
+        await session.commit()
+        user = await session.get(User, user_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client, plan_id
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+class TestListPayloads:
+    """Test suite for deferred AI blobs on list and detail endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_plan_list_omits_blobs(self, client_and_user):
+        """Plan lists leave out AI documents unless they are included."""
+        client, _ = client_and_user
+
+        plans = (await client.get("/api/plans")).json()
+        included = (await client.get("/api/plans", params={"include": "ai_metadata"})).json()
+
+        assert "ai_generated_data" not in plans[0]
+        assert "ai_metadata" not in plans[0]
+        assert plans[0]["title"] == "Launch"
+        assert included[0]["ai_metadata"] == {"model": "gemini"}
+        assert "ai_generated_data" not in included[0]
+
+    @pytest.mark.asyncio
+    async def test_unknown_include_is_rejected(self, client_and_user):
+        """Only blob columns can be included."""
+        client, _ = client_and_user
+
+        response = await client.get("/api/plans", params={"include": "password"})
+
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_interaction_detail_has_documents(self, client_and_user):
+        """The history lists interactions and the detail endpoint returns their documents."""
+        client, plan_id = client_and_user
+
+        history = (await client.get("/api/ai/interaction-history")).json()
+        detail = (await client.get(f"/api/ai/interactions/{history[0]['id']}")).json()
+
+        assert "response_data" not in history[0]
+        assert detail["request_data"] == {"plan_id": str(plan_id)}
+        assert len(detail["response_data"]["dashboard_data"]["summary"]) == 10_000
+
+    @pytest.mark.asyncio
+    async def test_plan_detail_sections(self, client_and_user):
+        """Plan detail returns the plan, tasks and latest interaction summary, or only the requested sections."""
+        client, plan_id = client_and_user
+        async with async_session() as session:
+            session.add(Task(plan_id=plan_id, title="Second", priority=3, created_at=datetime(2024, 1, 2)))
+            session.add(Task(plan_id=plan_id, title="First", priority=3, created_at=datetime(2024, 1, 1)))
+            await session.commit()
+
+        detail = (await client.get(f"/api/plans/{plan_id}/detail")).json()
+        tasks_only = (await client.get(f"/api/plans/{plan_id}/detail", params={"fields": "tasks"})).json()
+
+        assert detail["plan"]["title"] == "Launch"
+        assert "ai_generated_data" not in detail["plan"]
+        assert [task["title"] for task in detail["tasks"]] == ["First", "Second"]
+        assert detail["latest_interaction"]["interaction_type"] == "dashboard"
+        assert "response_data" not in detail["latest_interaction"]
+        assert list(tasks_only) == ["tasks"]
+
+    @pytest.mark.asyncio
+    async def test_plan_detail_of_other_user_is_not_found(self, client_and_user):
+        """Plan detail is ownership checked."""
+        client, _ = client_and_user
+
+        response = await client.get(f"/api/plans/{uuid4()}/detail")
+
+        assert response.status_code == 404
@@ -0,0 +1,122 @@
+"""Tests for cached authentication and first sign-in user provisioning."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from jose import jwt
+from sqlalchemy import func, select
+
+from app import auth, auth_cache
+from app.auth import get_user_from_token
+from app.expiring_cache import ExpiringCache
+from app.config import settings
+from app.database import User, async_session
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    """Start every test with empty auth caches."""
+    auth_cache.claims_cache.clear()
+    auth_cache.user_cache.clear()
+    yield
+    auth_cache.claims_cache.clear()
+    auth_cache.user_cache.clear()
+
+
+def make_token(user_id, expires_in: int = 3600) -> str:
+    """Sign a Supabase-style access token for a user."""
+    return jwt.encode(
+        {"sub": str(user_id), "email": f"{user_id}@example.com", "exp": int(time.time()) + expires_in},
+        settings.supabase_jwt_secret,
+        algorithm="HS256"
+    )
+
+
+class TestExpiringCache:
+    """Test suite for the bounded expiring cache."""
+
+    def test_entries_expire_and_are_evicted_least_recently_used_first(self):
+        """Entries vanish at their expiry and the least recently used one is evicted beyond the bound."""
+        cache = ExpiringCache(max_entries=2)
+        cache.set("a", 1, expires_at=100)
+        cache.set("b", 2, expires_at=200)
+
+        assert cache.get("a", now=50) == 1
+        cache.set("c", 3, expires_at=200)  # Evicts "b", which was used least recently
+
+        assert cache.get("b", now=50) is None
+        assert cache.get("a", now=150) is None  # Expired
+        assert cache.get("c", now=150) == 3
+        assert cache.stats() == {
+            "size": 1, "max_entries": 2, "hits": 2, "misses": 2, "evictions": 1, "hit_rate": 0.5
+        }
+
+
+class TestGetUserFromToken:
+    """Test suite for cached authentication."""
+
+    @pytest.mark.asyncio
+    async def test_warm_requests_skip_the_database(self, db_tables):
+        """Once a token and its user are cached, authentication does not touch the database."""
+        user_id = uuid4()
+        token = make_token(user_id)
+
+        async with async_session() as session:
+            user = await get_user_from_token(token, session)
+        assert str(user.id) == str(user_id)
+
+        offline = AsyncMock()
+        offline.execute.side_effect = AssertionError("authentication queried the database")
+        first, second = await get_user_from_token(token, offline), await get_user_from_token(token, offline)
+
+        assert first.id == second.id == user.id
+        assert first is not second
+        assert first.email == f"{user_id}@example.com"
+        offline.execute.assert_not_called()
+        stats = auth_cache.stats()
+        assert stats["claims"]["hits"] == 2
+        assert stats["users"]["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_or_forged_tokens_are_rejected(self, db_tables):
+        """Tokens that fail verification are neither accepted nor cached."""
+        user_id = uuid4()
+        forged = jwt.encode({"sub": str(user_id), "exp": int(time.time()) + 3600}, "wrong-secret", algorithm="HS256")
+
+        async with async_session() as session:
+            assert await get_user_from_token(make_token(user_id, expires_in=-10), session) is None
+            assert await get_user_from_token(forged, session) is None
+
+        assert auth_cache.claims_cache.stats()["size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_first_requests_provision_one_user(self, db_tables):
+        """Parallel first requests of a new user all succeed and create a single row."""
+        user_id = uuid4()
+        tokens = [make_token(user_id, expires_in=3600 + i) for i in range(5)]
+
+        async def authenticate(token):
+            async with async_session() as session:
+                return await get_user_from_token(token, session)
+
+        users = await asyncio.gather(*[authenticate(token) for token in tokens])
+
+        assert all(user is not None and user.id == user_id for user in users)
+        async with async_session() as session:
+            assert await session.scalar(select(func.count()).select_from(User).where(User.id == user_id)) == 1
+
+    @pytest.mark.asyncio
+    async def test_provisioning_a_user_created_meanwhile_returns_the_stored_row(self, db_tables):
+        """Losing the insert race to another worker returns the row that worker stored."""
+        user_id = uuid4()
+        async with async_session() as session:
+            session.add(User(id=user_id, email=f"{user_id}@example.com", full_name="Existing"))
+            await session.commit()
+
+        user = await auth.provision_user(user_id, {"email": f"{user_id}@example.com"})
+
+        assert user.id == user_id
+        assert user.full_name == "Existing"
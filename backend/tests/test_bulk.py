@@ -0,0 +1,124 @@
+"""Tests for set-based bulk writes."""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.bulk import _update_from_values_statement, apply_scored_tasks, insert_tasks, organized_task_rows, scored_rows
+from app.database import Plan, Task, User, async_session
+
+
+class TestScoredTasks:
+    """Test suite for applying scored tasks in bulk."""
+
+    def test_rows_are_deduplicated_and_canonicalized(self):
+        """Invalid ids are skipped and the last entry per task wins."""
+        task_id = uuid4()
+        rows = scored_rows([
+            {"id": str(task_id), "ai_category": "dev", "ai_priority_score": 3},
+            {"id": "not-a-uuid", "ai_category": "dev"},
+            {"ai_category": "dev"},
+            {"id": task_id, "ai_category": "dev", "ai_priority_score": 8, "ai_reasoning": "Blocks launch"},
+        ], {"dev": "Development"})
+
+        assert rows == [{
+            "task_id": task_id,
+            "ai_category": "Development",
+            "ai_priority_score": 8,
+            "ai_reasoning": "Blocks launch"
+        }]
+
+    @pytest.mark.asyncio
+    async def test_apply_is_scoped_to_plan(self, db_tables):
+        """Only tasks of the given plan are updated, and their old and new facts are returned."""
+        user_id, plan_id, other_plan_id = uuid4(), uuid4(), uuid4()
+        task_ids, foreign_id = [uuid4() for _ in range(3)], uuid4()
+        async with async_session() as session:
+            session.add(User(id=user_id, email=f"{user_id}@example.com"))
+            session.add(Plan(id=plan_id, user_id=user_id, title="Mine"))
+            session.add(Plan(id=other_plan_id, user_id=user_id, title="Other"))
+            session.add_all(
+                [Task(id=task_id, plan_id=plan_id, title=f"Task {i}", priority=3, ai_category="Old")
+                 for i, task_id in enumerate(task_ids)]
+                + [Task(id=foreign_id, plan_id=other_plan_id, title="Foreign", priority=3)]
+            )
+            await session.commit()
+
+        scored = [
+            {"id": str(task_id), "ai_category": "Dev", "ai_priority_score": 9 - i, "ai_reasoning": f"Reason {i}"}
+            for i, task_id in enumerate(task_ids)
+        ] + [{"id": str(foreign_id), "ai_category": "Dev", "ai_priority_score": 1}]
+
+        async with async_session() as session:
+            changes = await apply_scored_tasks(session, plan_id, scored, {"Dev": "Development"})
+            await session.commit()
+
+        async with async_session() as session:
+            updated = {task.title: task for task in (await session.execute(Task.__table__.select())).all()}
+
+        assert len(changes) == 3
+        assert {(before.category, after.category) for before, after in changes} == {("Old", "Development")}
+        assert updated["Task 0"].ai_category == "Development"
+        assert updated["Task 2"].ai_priority_score == 7
+        assert updated["Task 1"].ai_reasoning == "Reason 1"
+        assert updated["Foreign"].ai_priority_score is None
+
+
+    def test_postgresql_update_joins_typed_values(self):
+        """On PostgreSQL all rows go into one UPDATE ... FROM (VALUES ...) returning old and new facts."""
+        plan_id, first_id, second_id = uuid4(), uuid4(), uuid4()
+        statement = _update_from_values_statement(plan_id, [
+            {"task_id": first_id, "ai_category": "Development", "ai_priority_score": None, "ai_reasoning": "Blocks launch"},
+            {"task_id": second_id, "ai_category": None, "ai_priority_score": 7, "ai_reasoning": None}
+        ])
+
+        compiled = statement.compile(dialect=postgresql.asyncpg.dialect())
+        sql = " ".join(str(compiled).split())
+
+        assert "FROM (VALUES ($2::UUID, $3::VARCHAR, NULL, $4::VARCHAR), ($5::UUID, NULL, $6::INTEGER, NULL)) " \
+            "AS scored (task_id, ai_category, ai_priority_score, ai_reasoning)" in sql
+        assert "ai_priority_score=CAST(scored.ai_priority_score AS INTEGER)" in sql
+        assert 'tasks AS "old" WHERE tasks.id = scored.task_id AND tasks.plan_id = $7::UUID AND "old".id = tasks.id' in sql
+        assert sql.endswith('RETURNING "old".ai_category AS old_category, tasks.ai_category, tasks.priority, tasks.status')
+        assert [compiled.params[name] for name in ("param_1", "param_4", "plan_id_1")] == [first_id, second_id, plan_id]
+
+
+class TestOrganizedTasks:
+    """Test suite for saving organize-prompt results."""
+
+    def test_rows_follow_status_blocks(self):
+        """Tasks keep their status block, scores are clamped and priorities derived from them."""
+        plan_id = uuid4()
+        rows = organized_task_rows(plan_id, {"categories": [{
+            "name": "dev",
+            "tasks": {
+                "upcoming": [{"title": "Launch", "priority": 9}],
+                "todo": [{"title": " Build API ", "priority": 14, "reasoning": "Core"}, {"title": ""}],
+                "doing": [{"title": "Design", "priority": "soon"}]
+            }
+        }]}, {"dev": "Development"})
+
+        assert [(row["title"], row["status"], row["priority"], row["ai_priority_score"]) for row in rows] == [
+            ("Build API", "todo", 5, 10),
+            ("Design", "doing", 3, None),
+            ("Launch", "upcoming", 5, 9)
+        ]
+        assert {row["ai_category"] for row in rows} == {"Development"}
+        assert rows[0]["ai_reasoning"] == "Core"
+
+    @pytest.mark.asyncio
+    async def test_insert_returns_tasks_in_order(self, db_tables):
+        """Multi-row inserts return the created tasks with their generated ids."""
+        user_id, plan_id = uuid4(), uuid4()
+        async with async_session() as session:
+            session.add(User(id=user_id, email=f"{user_id}@example.com"))
+            session.add(Plan(id=plan_id, user_id=user_id, title="Organized"))
+            await session.flush()
+
+            rows = [{"plan_id": plan_id, "title": f"Task {i}", "priority": 3, "status": "todo"} for i in range(25)]
+            tasks = await insert_tasks(session, rows)
+
+            assert [task.title for task in tasks] == [row["title"] for row in rows]
+            assert len({task.id for task in tasks}) == 25
+            assert all(task.created_at is not None for task in tasks)
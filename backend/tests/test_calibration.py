@@ -0,0 +1,206 @@
+"""Tests for local priority calibration."""
+
+import time
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.calibration import PriorityCalibrator, task_features, NUM_FEATURES
+from app.database import AIInteraction, Plan, Task, User, async_session
+
+
+@pytest.fixture
+def calibrator():
+    """Create a calibrator that trusts its models after a few samples."""
+    return PriorityCalibrator(min_samples=5, novelty_threshold=0.6, learning_rate=0.5)
+
+
+def make_task(title: str, ai_score: int = 6, priority: int = 3, category: str = "Development") -> dict:
+    """Build an AI-scored task dict."""
+    return {
+        "id": str(uuid4()),
+        "title": title,
+        "description": None,
+        "priority": priority,
+        "status": "todo",
+        "ai_category": category,
+        "ai_priority_score": ai_score
+    }
+
+
+class TestTaskFeatures:
+    """Test suite for feature extraction."""
+
+    def test_features_are_stable_and_bounded(self):
+        """The same task always hashes to the same in-range features."""
+        task = make_task("Write API docs")
+
+        first = task_features(task)
+        second = task_features(task)
+
+        assert np.array_equal(first[0], second[0])
+        assert first[0].max() < NUM_FEATURES
+        assert len(first[2]) == 3
+
+    def test_status_transition_feature(self):
+        """A status change adds a transition feature."""
+        task = make_task("Write API docs")
+        task["status"] = "doing"
+
+        without = task_features(task)[0]
+        with_transition = task_features(task, previous_status="todo")[0]
+
+        assert len(with_transition) == len(without) + 1
+
+
+class TestPriorityCalibrator:
+    """Test suite for PriorityCalibrator."""
+
+    def test_untrained_calibration_is_identity(self, calibrator):
+        """Without enough samples the AI score is used unchanged."""
+        task = make_task("Deploy service", ai_score=7)
+
+        assert calibrator.calibrate("user", task) == 7
+        assert calibrator.is_novel(task)
+
+    def test_learns_from_priority_edits(self, calibrator):
+        """Repeated user overrides pull calibrated scores towards the user's priorities."""
+        user_id = str(uuid4())
+        for _ in range(30):
+            calibrator.learn_from_edit(user_id, make_task("Write unit tests", ai_score=8), new_priority=2)
+
+        calibrated = calibrator.calibrate(user_id, make_task("Write unit tests", ai_score=8))
+
+        assert calibrated < 6
+
+    def test_rerank_falls_back_for_novel_tasks(self, calibrator):
+        """Tasks with unseen wording need the LLM."""
+        user_id = str(uuid4())
+        for _ in range(10):
+            calibrator.learn_from_edit(user_id, make_task("Write unit tests"), new_priority=4)
+
+        assert calibrator.rerank(user_id, [make_task("Write unit tests")]) is not None
+        assert calibrator.rerank(user_id, [make_task("Negotiate office lease")]) is None
+        assert calibrator.rerank(user_id, [make_task("Write unit tests", ai_score=None)]) is None
+
+    def test_rerank_orders_by_calibrated_score(self, calibrator):
+        """Local re-ranking sorts tasks by calibrated score."""
+        user_id = str(uuid4())
+        for _ in range(20):
+            calibrator.learn_from_edit(user_id, make_task("Fix login bug", ai_score=4), new_priority=5)
+            calibrator.learn_from_edit(user_id, make_task("Update changelog", ai_score=8), new_priority=1)
+
+        result = calibrator.rerank(user_id, [
+            make_task("Update changelog", ai_score=8),
+            make_task("Fix login bug", ai_score=4)
+        ])
+
+        assert result["calibration"]["source"] == "local"
+        assert result["scored_tasks"][0]["title"] == "Fix login bug"
+
+    def test_rerank_is_fast(self, calibrator):
+        """Local re-ranking a plan stays far below an LLM round trip."""
+        user_id = str(uuid4())
+        tasks = [make_task(f"Write unit tests for module {i % 5}") for i in range(50)]
+        for task in tasks:
+            calibrator.learn_from_edit(user_id, task, new_priority=3)
+
+        start = time.perf_counter()
+        result = calibrator.rerank(user_id, tasks)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        assert result is not None
+        assert elapsed_ms < 50
+
+    def test_learn_from_feedback(self, calibrator):
+        """Ratings on dashboard interactions train on the scored tasks."""
+        response_data = {"priority_analysis": {"scored_tasks": [make_task("Ship beta"), make_task("Fix bugs")]}}
+
+        assert calibrator.learn_from_feedback("user", response_data, 5) == 2
+        assert calibrator.learn_from_feedback("user", response_data, 3) == 0
+        assert calibrator.learn_from_feedback("user", {"scored_tasks": [make_task("Ship beta")]}, 1) == 1
+        assert calibrator.stats()["global_samples"] == 3
+
+    def test_calibrate_scored_keeps_raw_score(self, calibrator):
+        """Recalibrated LLM output keeps the raw model score."""
+        user_id = str(uuid4())
+        for _ in range(30):
+            calibrator.learn_from_edit(user_id, make_task("Write unit tests", ai_score=8), new_priority=2)
+
+        scored = [make_task("Write unit tests", ai_score=8)]
+        calibrator.calibrate_scored(user_id, scored)
+
+        assert scored[0]["raw_ai_priority_score"] == 8
+        assert scored[0]["ai_priority_score"] < 8
+
+    def test_positive_feedback_keeps_the_correction(self, calibrator):
+        """A good rating of calibrated scores confirms the correction instead of unlearning it."""
+        user_id = str(uuid4())
+        for _ in range(30):
+            calibrator.learn_from_edit(user_id, make_task("Write unit tests", ai_score=8), new_priority=2)
+        before = calibrator.calibrate(user_id, make_task("Write unit tests", ai_score=8))
+
+        scored = [make_task("Write unit tests", ai_score=8)]
+        calibrator.calibrate_scored(user_id, scored)
+        assert scored[0]["ai_priority_score"] < 8
+        for _ in range(10):
+            calibrator.learn_from_feedback(user_id, {"scored_tasks": scored}, 5)
+
+        after = calibrator.calibrate(user_id, make_task("Write unit tests", ai_score=8))
+        assert 8 - after >= 8 - before - 0.5
+        assert calibrator.calibrate(user_id, scored[0]) == after
+
+    @pytest.mark.asyncio
+    async def test_warm_start_replays_rated_interactions(self, calibrator, db_tables):
+        """Warm start trains from rated ranking interactions in the database."""
+        user_id, plan_id = uuid4(), uuid4()
+        async with async_session() as session:
+            session.add(User(id=user_id, email=f"{user_id}@example.com"))
+            session.add(Plan(id=plan_id, user_id=user_id, title="Launch"))
+            session.add(AIInteraction(
+                user_id=user_id,
+                plan_id=plan_id,
+                interaction_type="ranking",
+                response_data={"scored_tasks": [make_task("Ship beta")]},
+                user_feedback=5
+            ))
+            session.add(AIInteraction(
+                user_id=user_id,
+                plan_id=plan_id,
+                interaction_type="ranking",
+                response_data={"scored_tasks": [make_task("Ship beta")]}
+            ))
+            session.add(AIInteraction(
+                user_id=user_id,
+                plan_id=plan_id,
+                interaction_type="dashboard",
+                response_data={"priority_analysis": {"scored_tasks": [make_task("Fix bugs")]}},
+                user_feedback=5
+            ))
+            await session.commit()
+
+        assert await calibrator.warm_start(limit=100) == 2
+
+    @pytest.mark.asyncio
+    async def test_warm_start_replays_priority_edits(self, calibrator, db_tables):
+        """Recorded priority overrides train a fresh calibrator the same way they trained the first."""
+        user_id, plan_id, task_id = uuid4(), uuid4(), uuid4()
+        async with async_session() as session:
+            session.add(User(id=user_id, email=f"{user_id}@example.com"))
+            session.add(Plan(id=plan_id, user_id=user_id, title="Launch"))
+            session.add(Task(id=task_id, plan_id=plan_id, title="Write unit tests", ai_priority_score=8))
+            await session.flush()
+            task = make_task("Write unit tests", ai_score=8)
+            del task["id"]
+            for _ in range(30):
+                assert calibrator.record_edit(session, user_id, task_id, task, 2, "todo")
+                calibrator.learn_from_edit(user_id, task, 2, previous_status="todo")
+            assert not calibrator.record_edit(session, user_id, task_id, {**task, "ai_priority_score": None}, 2)
+            await session.commit()
+
+        restarted = PriorityCalibrator(min_samples=5, novelty_threshold=0.6, learning_rate=0.5)
+
+        assert await restarted.warm_start(limit=100) == 30
+        assert restarted.calibrate(user_id, task) == pytest.approx(calibrator.calibrate(user_id, task))
+        assert restarted.calibrate(user_id, task) < 6
@@ -0,0 +1,65 @@
+"""Tests for category canonicalization."""
+
+from uuid import uuid4
+
+import pytest
+
+from app.categories import CategoryNormalizer, category_key
+from app.database import CanonicalCategory, User, async_session
+
+
+@pytest.fixture
+def normalizer():
+    """Create a category normalizer for testing."""
+    return CategoryNormalizer()
+
+
+class TestCategoryMatching:
+    """Test suite for fuzzy and token category matching."""
+
+    def test_category_key(self):
+        """Keys ignore case and punctuation."""
+        assert category_key("  Dev-Ops & QA ") == "dev ops qa"
+
+    @pytest.mark.parametrize("raw", ["Dev", "Development", "development", "Software Development", "Developement"])
+    def test_development_variants(self, normalizer, raw):
+        """Common variants collapse onto the seed category."""
+        assert normalizer.best_match(raw, normalizer._defaults) == "Development"
+
+    def test_distinct_categories_stay_apart(self, normalizer):
+        """Unrelated names do not match."""
+        candidates = [normalizer._entry("Frontend")]
+
+        assert normalizer.best_match("Backend", candidates) is None
+        assert normalizer.best_match("Groceries", normalizer._defaults) is None
+
+
+class TestCategoryNormalizer:
+    """Test suite for CategoryNormalizer."""
+
+    @pytest.mark.asyncio
+    async def test_canonicalize_registers_and_reuses(self, normalizer, db_tables):
+        """New names are registered once and later variants map onto them."""
+        user_id = uuid4()
+        async with async_session() as session:
+            session.add(User(id=user_id, email=f"{user_id}@example.com"))
+            await session.commit()
+
+        first = await normalizer.canonicalize(user_id, ["Dev", "Home Renovation", None, ""])
+        second = await normalizer.canonicalize(user_id, ["home renovation tasks", "Software Development"])
+
+        assert first == {"Dev": "Development", "Home Renovation": "Home Renovation"}
+        assert second == {
+            "home renovation tasks": "Home Renovation",
+            "Software Development": "Development"
+        }
+
+        # A cold normalizer reads the same canonical table back
+        fresh = CategoryNormalizer()
+        assert await fresh.canonicalize(user_id, ["HOME-RENOVATION"]) == {"HOME-RENOVATION": "Home Renovation"}
+
+        async with async_session() as session:
+            result = await session.execute(
+                CanonicalCategory.__table__.select().where(CanonicalCategory.user_id == user_id)
+            )
+            assert sorted(row.name for row in result) == ["Development", "Home Renovation"]
@@ -0,0 +1,90 @@
+"""Tests for negotiated response compression."""
+
+import zlib
+
+import pytest
+
+from app.compression import CompressionMiddleware, _with_vary, negotiate
+
+
+def make_app(chunks, content_type=b"application/json"):
+    """Build an ASGI app sending the given body chunks."""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+    return app
+
+
+async def call(app, accept_encoding="gzip"):
+    """Run a request through the middleware and collect the sent messages."""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    await CompressionMiddleware(app, minimum_size=500)(scope, None, send)
+    return dict(messages[0]["headers"]), messages[1:]
+
+
+class TestCompression:
+    """Test suite for the compression middleware."""
+
+    def test_negotiation_honours_quality_values(self):
+        """Identity is used when gzip is refused or nothing is offered."""
+        assert negotiate("gzip, deflate") == "gzip"
+        assert negotiate("gzip;q=0") is None
+        assert negotiate("") is None
+        assert negotiate("*") in ("br", "gzip")
+
+    @pytest.mark.asyncio
+    async def test_large_bodies_are_compressed_and_small_ones_are_not(self):
+        """Only complete bodies at or above the minimum size are compressed."""
+        large = b'{"tasks": [' + b'{"title": "Write tests"},' * 100 + b"{}]}"
+
+        headers, body = await call(make_app([large]))
+        assert headers[b"content-encoding"] == b"gzip"
+        assert headers[b"vary"] == b"Accept-Encoding"
+        assert int(headers[b"content-length"]) == len(body[0]["body"]) < len(large)
+        assert zlib.decompress(body[0]["body"], 31) == large
+
+        headers, body = await call(make_app([b'{"id": 1}']))
+        assert b"content-encoding" not in headers
+        assert body[0]["body"] == b'{"id": 1}'
+
+        headers, _ = await call(make_app([large]), accept_encoding="identity")
+        assert b"content-encoding" not in headers
+
+        headers, _ = await call(make_app([large], content_type=b"image/png"))
+        assert b"content-encoding" not in headers
+
+    @pytest.mark.asyncio
+    async def test_uncompressed_responses_still_vary_on_accept_encoding(self):
+        """Identity responses of compressible types carry Vary, so shared caches do not serve them to every client."""
+        large = b'{"tasks": [' + b'{"title": "Write tests"},' * 100 + b"{}]}"
+
+        for app, accept_encoding in [(make_app([b'{"id": 1}']), "gzip"), (make_app([large]), "")]:
+            headers, body = await call(app, accept_encoding=accept_encoding)
+            assert b"content-encoding" not in headers
+            assert headers[b"vary"] == b"Accept-Encoding"
+
+        headers, _ = await call(make_app([large], content_type=b"image/png"), accept_encoding="")
+        assert b"vary" not in headers
+        assert _with_vary([(b"vary", b"Origin")]) == [(b"vary", b"Origin, Accept-Encoding")]
+        assert _with_vary([(b"vary", b"accept-encoding")]) == [(b"vary", b"accept-encoding")]
+
+    @pytest.mark.asyncio
+    async def test_streamed_events_can_be_decoded_as_they_arrive(self):
+        """Each streamed chunk is flushed, so a client decodes every event on arrival."""
+        events = [b'{"task": %d}\n' % i for i in range(3)]
+
+        headers, body = await call(make_app(events, content_type=b"application/x-ndjson"))
+        assert headers[b"content-encoding"] == b"gzip"
+        assert b"content-length" not in headers
+
+        decoder = zlib.decompressobj(31)
+        for event, message in zip(events, body):
+            assert decoder.decompress(message["body"]) == event
+        assert body[-1]["more_body"] is False
+        assert decoder.eof
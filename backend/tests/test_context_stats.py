@@ -0,0 +1,150 @@
+"""Tests for incrementally maintained user context aggregates."""
+
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app import context_stats
+from app.context_stats import TaskFacts
+from app.database import Plan, Task, User, UserContextStats, async_session
+
+
+async def create_user() -> str:
+    """Create a user and return their id."""
+    user_id = uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        await session.commit()
+    return user_id
+
+
+async def snapshot(user_id) -> dict:
+    """Read the maintained context and the context rebuilt from scratch."""
+    async with async_session() as session:
+        maintained = context_stats.to_context(await session.get(UserContextStats, user_id))
+        rebuilt = context_stats.to_context(await context_stats.rebuild(session, user_id))
+        await session.rollback()
+    return maintained, rebuilt
+
+
+class TestContextStats:
+    """Test suite for context aggregate maintenance."""
+
+    @pytest.mark.asyncio
+    async def test_incremental_updates_match_rebuild(self, db_tables):
+        """Applying write deltas yields the same context as a full rebuild."""
+        user_id = await create_user()
+
+        async with async_session() as session:
+            plan = Plan(user_id=user_id, title="Launch", status="draft")
+            session.add(plan)
+            await session.flush()
+            await context_stats.apply_plan_change(session, user_id, None, context_stats.plan_summary(plan))
+            plan_id = plan.id
+            await session.commit()
+
+        async with async_session() as session:
+            tasks = [
+                Task(plan_id=plan_id, title="API", priority=5, status="pending", ai_category="Development"),
+                Task(plan_id=plan_id, title="Docs", priority=2, status="pending", ai_category="Documentation"),
+                Task(plan_id=plan_id, title="UI", priority=5, status="pending", ai_category="Development"),
+            ]
+            session.add_all(tasks)
+            await context_stats.apply_task_changes(
+                session, user_id, added=[context_stats.task_facts(task) for task in tasks]
+            )
+            await session.flush()
+
+            before = context_stats.task_facts(tasks[1])
+            tasks[1].status = "completed"
+            tasks[1].ai_category = "Development"
+            await context_stats.apply_task_changes(
+                session, user_id, removed=[before], added=[context_stats.task_facts(tasks[1])]
+            )
+            await session.commit()
+
+        maintained, rebuilt = await snapshot(user_id)
+
+        assert maintained == rebuilt
+        assert maintained["task_categories"] == ["Development"]
+        assert maintained["priority_distribution"]["high"] == 2
+        assert maintained["status_counts"] == {"pending": 2, "completed": 1}
+
+    @pytest.mark.asyncio
+    async def test_plan_delete_refills_recent_window(self, db_tables, monkeypatch):
+        """Deleting a listed plan drops its tasks and refills the recent plans window."""
+        monkeypatch.setattr(context_stats, "RECENT_PLANS", 2)
+        user_id = await create_user()
+
+        plan_ids = []
+        for title in ["First", "Second", "Third"]:
+            async with async_session() as session:
+                plan = Plan(user_id=user_id, title=title, status="draft")
+                session.add(plan)
+                session.add(Task(plan=plan, title=f"{title} task", priority=3, status="pending"))
+                await session.flush()
+                await context_stats.rebuild(session, user_id)
+                plan_ids.append(plan.id)
+                await session.commit()
+
+        async with async_session() as session:
+            plan = await session.get(Plan, plan_ids[-1])
+            before = context_stats.plan_summary(plan)
+            removed = [context_stats.TaskFacts(None, 3, "pending")]
+            await session.delete(plan)
+            await context_stats.apply_plan_change(session, user_id, before, None, removed)
+            await session.commit()
+
+        maintained, rebuilt = await snapshot(user_id)
+
+        assert maintained == rebuilt
+        assert maintained["total_plans"] == 2
+        assert [plan["title"] for plan in maintained["plan_data"]] == ["Second", "First"]
+        assert maintained["status_counts"] == {"pending": 2}
+
+    @pytest.mark.asyncio
+    async def test_missing_row_is_rebuilt_on_write(self, db_tables):
+        """A write for a user without an aggregate builds it including the write."""
+        user_id = await create_user()
+
+        async with async_session() as session:
+            plan = Plan(user_id=user_id, title="Solo", status="draft")
+            task = Task(plan=plan, title="Only task", priority=5, status="todo")
+            session.add_all([plan, task])
+            await context_stats.apply_plan_change(
+                session, user_id, None, {"id": "pending"}, added_tasks=[TaskFacts(None, 5, "todo")]
+            )
+            await session.commit()
+
+        maintained, rebuilt = await snapshot(user_id)
+
+        assert maintained == rebuilt
+        assert maintained["total_plans"] == 1
+        assert maintained["status_counts"] == {"todo": 1}
+        assert maintained["plan_data"][0]["title"] == "Solo"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_first_writes_do_not_conflict(self, db_tables):
+        """A first write racing another one for the same user updates the row the other created."""
+        user_id = await create_user()
+
+        async with async_session() as session:
+            # Reads of this write ran before the racing one below committed the aggregate
+            session.get = AsyncMock(return_value=None)
+
+            async with async_session() as racing:
+                racing.add(Plan(user_id=user_id, title="First"))
+                await context_stats.apply_plan_change(racing, user_id, None, {"id": "pending"})
+                await racing.commit()
+
+            session.add(Task(plan=Plan(user_id=user_id, title="Second"), title="Later task", priority=2, status="todo"))
+            await context_stats.apply_plan_change(
+                session, user_id, None, {"id": "pending"}, added_tasks=[TaskFacts(None, 2, "todo")]
+            )
+            await session.commit()
+
+        maintained, rebuilt = await snapshot(user_id)
+
+        assert maintained["status_counts"] == {"todo": 1}
+        assert maintained["total_plans"] == rebuilt["total_plans"] == 2
@@ -0,0 +1,249 @@
+"""Tests for the stale-while-revalidate dashboard cache."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from uuid import UUID, uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+
+from app.ai_service import ai_service
+from app.auth import get_current_user
+from app.dashboard_cache import DashboardCache, dashboard_cache, plan_fingerprint, FRESH, STALE, MISS, DEGRADED
+from app.database import DashboardSnapshot, Plan, User, async_session
+from app.main import app
+
+
+@pytest.fixture
+def cache():
+    """Create a dashboard cache with short windows for testing."""
+    return DashboardCache(ttl_seconds=60, stale_seconds=3600)
+
+
+@pytest.fixture
+def plan():
+    """Create plan content for fingerprinting."""
+    return SimpleNamespace(title="Launch", description="Ship the beta")
+
+
+@pytest.fixture
+def tasks():
+    """Create task content for fingerprinting."""
+    return [
+        SimpleNamespace(id=uuid4(), title="Write docs", description=None, priority=3, status="todo"),
+        SimpleNamespace(id=uuid4(), title="Fix bugs", description="P1 only", priority=5, status="doing"),
+    ]
+
+
+@pytest_asyncio.fixture
+async def client(db_tables):
+    """Create an authenticated client with a plan of one task."""
+    user_id = uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        await session.commit()
+        user = await session.get(User, user_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(app=app, base_url="http://test") as http_client:
+        plan = (await http_client.post("/api/plans", json={"title": "Launch"})).json()
+        await http_client.post("/api/tasks", json={"plan_id": plan["id"], "title": "Write docs", "priority": 3})
+        yield http_client, plan["id"]
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def suggestion(summary: str) -> dict:
+    """Build a dashboard suggestion as generated by the AI service."""
+    return {"plan_title": "Launch", "dashboard_data": {"summary": summary}, "metadata": {"total_tasks": 1}}
+
+
+async def generate(http_client, plan_id):
+    """Request a dashboard, returning the response body."""
+    response = await http_client.post("/api/ai/generate-dashboard", params={"plan_id": plan_id})
+    assert response.status_code == 200
+    return response.json()
+
+
+def make_snapshot(fingerprint: str, age_seconds: int) -> DashboardSnapshot:
+    """Build a snapshot computed the given number of seconds ago."""
+    return DashboardSnapshot(
+        plan_id=uuid4(),
+        fingerprint=fingerprint,
+        suggestion='{"plan_title": "Launch", "metadata": {"total_tasks": 2}}',
+        interaction_id=uuid4(),
+        created_at=datetime.utcnow() - timedelta(seconds=age_seconds)
+    )
+
+
+class TestPlanFingerprint:
+    """Test suite for plan content fingerprints."""
+
+    def test_fingerprint_ignores_task_order(self, plan, tasks):
+        """Task order does not change the fingerprint."""
+        assert plan_fingerprint(plan, tasks) == plan_fingerprint(plan, list(reversed(tasks)))
+
+    def test_fingerprint_changes_with_content(self, plan, tasks):
+        """Editing a task changes the fingerprint."""
+        before = plan_fingerprint(plan, tasks)
+        tasks[0].status = "completed"
+
+        assert plan_fingerprint(plan, tasks) != before
+
+
+class TestDashboardCache:
+    """Test suite for DashboardCache."""
+
+    def test_classify_fresh(self, cache):
+        """Recent snapshots with matching content are fresh."""
+        assert cache.classify(make_snapshot("abc", 10), "abc") == FRESH
+
+    def test_classify_stale(self, cache):
+        """Snapshots past the TTL but inside the stale window are stale."""
+        assert cache.classify(make_snapshot("abc", 600), "abc") == STALE
+
+    def test_classify_expired(self, cache):
+        """Snapshots past the stale window are misses."""
+        assert cache.classify(make_snapshot("abc", 7200), "abc") == MISS
+
+    def test_classify_changed_content(self, cache):
+        """Snapshots computed from other plan content are misses."""
+        assert cache.classify(make_snapshot("abc", 10), "def") == MISS
+        assert cache.classify(None, "abc") == MISS
+
+    def test_render_annotates_cache_status(self, cache):
+        """Rendered snapshots carry their cache status in metadata."""
+        snapshot = make_snapshot("abc", 10)
+
+        data = cache.render(snapshot, DEGRADED)
+
+        assert data["plan_title"] == "Launch"
+        assert data["metadata"]["total_tasks"] == 2
+        assert data["metadata"]["cache"]["status"] == DEGRADED
+        assert data["metadata"]["cache"]["fingerprint"] == "abc"
+
+    @pytest.mark.asyncio
+    async def test_schedule_refresh_deduplicates(self, cache):
+        """Only one background refresh runs per plan at a time."""
+        plan_id = str(uuid4())
+        release = asyncio.Event()
+        calls = []
+
+        async def refresh():
+            calls.append(plan_id)
+            await release.wait()
+
+        assert cache.schedule_refresh(plan_id, refresh) is True
+        assert cache.schedule_refresh(plan_id, refresh) is False
+
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*cache._background_tasks)
+
+        assert calls == [plan_id]
+        assert cache.schedule_refresh(plan_id, refresh) is True
+        await asyncio.gather(*cache._background_tasks)
+
+    @pytest.mark.asyncio
+    async def test_store_and_get_roundtrip(self, cache, db_tables):
+        """Stored suggestions replace the previous snapshot for the plan."""
+        user_id, plan_id = uuid4(), uuid4()
+        async with async_session() as session:
+            session.add(User(id=user_id, email=f"{user_id}@example.com"))
+            session.add(Plan(id=plan_id, user_id=user_id, title="Launch"))
+            await session.commit()
+
+        await cache.store(plan_id, "first", {"dashboard_data": {"summary": "v1"}})
+        await cache.store(plan_id, "second", {"dashboard_data": {"summary": "v2"}}, uuid4())
+
+        snapshot = await cache.get(plan_id)
+
+        assert snapshot.fingerprint == "second"
+        assert cache.classify(snapshot, "second") == FRESH
+        assert cache.render(snapshot, FRESH)["dashboard_data"]["summary"] == "v2"
+
+
+class TestGenerateDashboardEndpoint:
+    """Test suite for the cache states served by /api/ai/generate-dashboard."""
+
+    @pytest.mark.asyncio
+    async def test_miss_then_fresh(self, client):
+        """The first request computes a suggestion; the next one is served from the cache."""
+        http_client, plan_id = client
+        with patch.object(ai_service, "generate_dashboard_suggestion", AsyncMock(return_value=suggestion("v1"))) as generate_mock:
+            first = await generate(http_client, plan_id)
+            second = await generate(http_client, plan_id)
+
+        assert first["data"]["metadata"]["cache"]["status"] == MISS
+        assert second["data"]["metadata"]["cache"]["status"] == FRESH
+        assert second["data"]["dashboard_data"]["summary"] == "v1"
+        assert generate_mock.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_plan_loaded_from_the_database_is_cached(self, client):
+        """The real pipeline loads the plan and its tasks, and its suggestion is stored and served fresh."""
+        http_client, plan_id = client
+        response_text = json.dumps({"categories": [], "summary": "From the model"})
+        with patch.object(ai_service, "_generate_content", AsyncMock(return_value=response_text)):
+            first = await generate(http_client, plan_id)
+            second = await generate(http_client, plan_id)
+
+        assert first["success"] is True
+        assert first["data"]["metadata"]["cache"]["status"] == MISS
+        assert first["data"]["metadata"]["total_tasks"] == 1
+        assert second["data"]["metadata"]["cache"]["status"] == FRESH
+        assert (await dashboard_cache.get(plan_id)) is not None
+
+    @pytest.mark.asyncio
+    async def test_stale_is_served_while_refreshing(self, client):
+        """A snapshot past its TTL is returned at once and recomputed in the background."""
+        http_client, plan_id = client
+        with patch.object(ai_service, "generate_dashboard_suggestion", AsyncMock(return_value=suggestion("v1"))):
+            await generate(http_client, plan_id)
+        async with async_session() as session:
+            await session.execute(
+                update(DashboardSnapshot)
+                .where(DashboardSnapshot.plan_id == UUID(plan_id))
+                .values(created_at=datetime.utcnow() - timedelta(seconds=dashboard_cache.ttl_seconds + 60))
+            )
+            await session.commit()
+
+        with patch.object(ai_service, "generate_dashboard_suggestion", AsyncMock(return_value=suggestion("v2"))) as generate_mock:
+            stale = await generate(http_client, plan_id)
+            await asyncio.gather(*dashboard_cache._background_tasks)
+
+        assert stale["data"]["metadata"]["cache"]["status"] == STALE
+        assert stale["data"]["dashboard_data"]["summary"] == "v1"
+        assert generate_mock.await_count == 1
+        refreshed = await dashboard_cache.get(plan_id)
+        assert dashboard_cache.render(refreshed, FRESH)["dashboard_data"]["summary"] == "v2"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error", [RuntimeError("Gemini unavailable"), asyncio.TimeoutError()])
+    async def test_failures_degrade_to_the_last_good_suggestion(self, client, error):
+        """Failed or timed-out generations fall back to the last snapshot, even of older plan content."""
+        http_client, plan_id = client
+        with patch.object(ai_service, "generate_dashboard_suggestion", AsyncMock(return_value=suggestion("v1"))):
+            await generate(http_client, plan_id)
+        await http_client.post("/api/tasks", json={"plan_id": plan_id, "title": "Fix bugs", "priority": 5})
+
+        with patch.object(ai_service, "generate_dashboard_suggestion", AsyncMock(side_effect=error)):
+            degraded = await generate(http_client, plan_id)
+
+        assert degraded["success"] is True
+        assert degraded["data"]["metadata"]["cache"]["status"] == DEGRADED
+        assert degraded["data"]["dashboard_data"]["summary"] == "v1"
+
+    @pytest.mark.asyncio
+    async def test_failure_without_snapshot_is_reported(self, client):
+        """Without a previous suggestion a failed generation is an unsuccessful response."""
+        http_client, plan_id = client
+        with patch.object(ai_service, "generate_dashboard_suggestion", AsyncMock(side_effect=asyncio.TimeoutError())):
+            failed = await generate(http_client, plan_id)
+
+        assert failed["success"] is False
+        assert failed["data"] is None
@@ -0,0 +1,104 @@
+"""Tests for ETags and conditional GETs of plans and tasks."""
+
+from uuid import uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.auth import get_current_user
+from app.database import Plan, User, async_session
+from app.etags import matches, weak_etag
+from app.main import app
+
+
+@pytest_asyncio.fixture
+async def client(db_tables):
+    """Create an authenticated client and a plan owned by another user."""
+    user_id, other_id, foreign_plan_id = uuid4(), uuid4(), uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        session.add(User(id=other_id, email=f"{other_id}@example.com"))
+        session.add(Plan(id=foreign_plan_id, user_id=other_id, title="Not yours"))
+        await session.commit()
+        user = await session.get(User, user_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(app=app, base_url="http://test") as http_client:
+        yield http_client, foreign_plan_id
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+async def revalidate(http_client, url: str) -> httpx.Response:
+    """Fetch a resource, then fetch it again with its ETag."""
+    first = await http_client.get(url)
+    assert first.status_code == 200
+    return await http_client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+
+
+class TestETags:
+    """Test suite for weak ETags and 304 responses."""
+
+    def test_if_none_match_compares_weakly(self):
+        """Weak and strong forms of a tag match, as do lists containing it and the wildcard."""
+        etag = weak_etag("plan", 1)
+        strong = etag.removeprefix("W/")
+
+        assert matches(etag, etag)
+        assert matches(f'W/"other", {strong}', etag)
+        assert matches("*", etag)
+        assert not matches('W/"other"', etag)
+        assert not matches(None, etag)
+
+    @pytest.mark.asyncio
+    async def test_unchanged_resources_are_not_modified(self, client):
+        """Every plan and task GET answers a current If-None-Match with an empty 304."""
+        http_client, _ = client
+        plan = (await http_client.post("/api/plans", json={"title": "Launch"})).json()
+        task = (await http_client.post("/api/tasks", json={"plan_id": plan["id"], "title": "API"})).json()
+
+        for url in [
+            "/api/plans",
+            f"/api/plans/{plan['id']}",
+            f"/api/plans/{plan['id']}/detail",
+            "/api/tasks",
+            f"/api/plans/{plan['id']}/tasks",
+            f"/api/tasks/{task['id']}"
+        ]:
+            response = await revalidate(http_client, url)
+            assert response.status_code == 304, url
+            assert response.content == b""
+            assert response.headers["ETag"].startswith('W/"')
+
+    @pytest.mark.asyncio
+    async def test_changes_produce_new_etags(self, client):
+        """Writes change the ETags of the lists, plans and tasks they touch."""
+        http_client, _ = client
+        plan = (await http_client.post("/api/plans", json={"title": "Launch"})).json()
+        task = (await http_client.post("/api/tasks", json={"plan_id": plan["id"], "title": "API"})).json()
+        urls = ["/api/tasks", f"/api/plans/{plan['id']}/tasks", f"/api/tasks/{task['id']}", f"/api/plans/{plan['id']}/detail"]
+        before = {url: (await http_client.get(url)).headers["ETag"] for url in urls}
+        plans_etag = (await http_client.get("/api/plans")).headers["ETag"]
+
+        await http_client.put(f"/api/tasks/{task['id']}", json={"status": "completed"})
+
+        for url in urls:
+            response = await http_client.get(url, headers={"If-None-Match": before[url]})
+            assert response.status_code == 200, url
+            assert response.headers["ETag"] != before[url]
+        assert (await http_client.get("/api/plans", headers={"If-None-Match": plans_etag})).status_code == 304
+
+        await http_client.post("/api/tasks", json={"plan_id": plan["id"], "title": "Docs"})
+        assert (await http_client.get("/api/plans", headers={"If-None-Match": plans_etag})).status_code == 304
+        await http_client.delete(f"/api/tasks/{task['id']}")
+        response = await http_client.get(f"/api/plans/{plan['id']}/tasks")
+        assert [item["title"] for item in response.json()] == ["Docs"]
+
+    @pytest.mark.asyncio
+    async def test_other_users_plans_are_not_found_even_with_a_wildcard(self, client):
+        """Conditional requests for another user's resources still answer 404."""
+        http_client, foreign_plan_id = client
+
+        for url in [f"/api/plans/{foreign_plan_id}", f"/api/plans/{foreign_plan_id}/tasks", f"/api/plans/{foreign_plan_id}/detail"]:
+            response = await http_client.get(url, headers={"If-None-Match": "*"})
+            assert response.status_code == 404, url
@@ -0,0 +1,98 @@
+"""Tests for AI interaction rollups and retention."""
+
+from datetime import date, datetime
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import AIInteraction, AIInteractionDaily, User, async_session
+from app.interaction_rollups import add_months, apply_retention, percentile, rollup
+
+
+async def create_interactions(user_id, rows) -> None:
+    """Create a user and interactions from (created_at, type, model, tokens, latency) tuples."""
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        for created_at, interaction_type, model, tokens, latency in rows:
+            session.add(AIInteraction(
+                user_id=user_id,
+                interaction_type=interaction_type,
+                model_used=model,
+                tokens_used=tokens,
+                cost_estimate=tokens / 1000,
+                response_time_ms=latency,
+                created_at=created_at
+            ))
+        await session.commit()
+
+
+async def rollup_rows(user_id) -> dict:
+    """Read a user's rollups keyed by (day, type, model)."""
+    async with async_session() as session:
+        result = await session.execute(select(AIInteractionDaily).where(AIInteractionDaily.user_id == user_id))
+        return {(row.day, row.interaction_type, row.model_used): row for row in result.scalars()}
+
+
+class TestInteractionRollups:
+    """Test suite for daily rollups and retention."""
+
+    def test_percentile_interpolates(self):
+        """Percentiles interpolate between neighbouring values."""
+        assert percentile([], 0.5) is None
+        assert percentile([100], 0.95) == 100
+        assert percentile([100, 200, 300, 400], 0.5) == 250
+        assert percentile(list(range(1, 101)), 0.95) == pytest.approx(95.05)
+
+    def test_add_months_wraps_years(self):
+        """Month arithmetic crosses year boundaries."""
+        assert add_months(date(2024, 11, 1), 2) == date(2025, 1, 1)
+        assert add_months(date(2024, 1, 1), -13) == date(2022, 12, 1)
+
+    @pytest.mark.asyncio
+    async def test_rollup_groups_by_day_type_and_model(self, db_tables):
+        """Rollups count, sum and take latency percentiles per day, type and model."""
+        user_id = uuid4()
+        await create_interactions(user_id, [
+            (datetime(2024, 3, 1, 9), "dashboard", "gemini", 100, 100),
+            (datetime(2024, 3, 1, 18), "dashboard", "gemini", 300, 300),
+            (datetime(2024, 3, 1, 12), "dashboard", None, 50, None),
+            (datetime(2024, 3, 2, 8), "ranking", "gemini", 10, 40),
+        ])
+
+        async with async_session() as session:
+            written = await rollup(session, date(2024, 3, 1), date(2024, 3, 2))
+            await session.commit()
+
+        rows = await rollup_rows(user_id)
+        dashboard = rows[(date(2024, 3, 1), "dashboard", "gemini")]
+
+        assert written == 2
+        assert set(rows) == {(date(2024, 3, 1), "dashboard", "gemini"), (date(2024, 3, 1), "dashboard", "")}
+        assert (dashboard.interaction_count, dashboard.tokens_used) == (2, 400)
+        assert dashboard.cost_estimate == pytest.approx(0.4)
+        assert (dashboard.latency_p50_ms, dashboard.latency_p95_ms) == (200, 290)
+        assert rows[(date(2024, 3, 1), "dashboard", "")].latency_p50_ms is None
+
+    @pytest.mark.asyncio
+    async def test_retention_rolls_up_then_removes_old_rows(self, db_tables):
+        """Interactions before the retention window are rolled up and deleted."""
+        user_id = uuid4()
+        await create_interactions(user_id, [
+            (datetime(2023, 12, 31, 23), "analysis", "gemini", 10, 10),
+            (datetime(2024, 1, 15), "analysis", "gemini", 20, 20),
+            (datetime(2024, 2, 1), "analysis", "gemini", 30, 30),
+        ])
+
+        async with async_session() as session:
+            await apply_retention(session, date(2024, 3, 10), months=1, mode="drop")
+            await session.commit()
+
+        async with async_session() as session:
+            remaining = await session.scalar(select(func.count()).select_from(AIInteraction))
+
+        assert remaining == 1
+        assert set(await rollup_rows(user_id)) == {
+            (date(2023, 12, 31), "analysis", "gemini"),
+            (date(2024, 1, 15), "analysis", "gemini"),
+        }
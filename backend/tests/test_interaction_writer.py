@@ -0,0 +1,161 @@
+"""Tests for the write-behind AI interaction buffer."""
+
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from app.database import AIInteraction, User, async_session
+from app.interaction_writer import InteractionWriter
+
+
+def make_row(user_id, interaction_type: str = "analysis") -> dict:
+    """Build an interaction row with a client-side id."""
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "plan_id": None,
+        "interaction_type": interaction_type,
+        "request_data": {},
+        "response_data": {},
+        "tokens_used": 0,
+        "created_at": datetime.utcnow()
+    }
+
+
+async def stored_ids() -> set:
+    """Read the ids of all stored interactions."""
+    async with async_session() as session:
+        return set((await session.scalars(select(AIInteraction.id))).all())
+
+
+@pytest_asyncio.fixture
+async def user_id(db_tables):
+    """Create a user and return their id."""
+    user_id = uuid.uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        await session.commit()
+    return user_id
+
+
+class TestInteractionWriter:
+    """Test suite for write-behind interaction batching."""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_buffered_until_flushed(self, user_id):
+        """A started writer holds rows until a flush is needed and writes them on close."""
+        writer = InteractionWriter(batch_size=100, flush_seconds=60, max_pending=100)
+        writer.start()
+        rows = [make_row(user_id) for _ in range(3)]
+        for row in rows:
+            await writer.enqueue(row)
+
+        assert await stored_ids() == set()
+
+        await writer.ensure_written(rows[1]["id"])
+        assert await stored_ids() == {row["id"] for row in rows}
+
+        late = make_row(user_id)
+        await writer.enqueue(late)
+        await writer.close()
+        assert late["id"] in await stored_ids()
+
+    @pytest.mark.asyncio
+    async def test_unstarted_writer_writes_through(self, user_id):
+        """Without a background flusher every row is written immediately."""
+        writer = InteractionWriter(batch_size=100, flush_seconds=60, max_pending=100)
+        row = make_row(user_id)
+
+        await writer.enqueue(row)
+
+        assert await stored_ids() == {row["id"]}
+
+    @pytest.mark.asyncio
+    async def test_invalid_row_does_not_block_batch(self, user_id):
+        """A row the database rejects is dropped without losing the rest of its batch."""
+        writer = InteractionWriter(batch_size=100, flush_seconds=60, max_pending=100)
+        writer.start()
+        valid, invalid = make_row(user_id), make_row(user_id, interaction_type="unknown")
+        await writer.enqueue(valid)
+        await writer.enqueue(invalid)
+
+        await writer.close()
+
+        assert await stored_ids() == {valid["id"]}
+        assert writer.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_drops_oldest_when_writes_fail(self, user_id, monkeypatch):
+        """While the database is unavailable the buffer keeps only the newest rows."""
+        writer = InteractionWriter(batch_size=100, flush_seconds=60, max_pending=2)
+        writer.start()
+
+        async def unavailable(rows):
+            raise ConnectionError("database unavailable")
+
+        monkeypatch.setattr(writer, "_insert", unavailable)
+        rows = [make_row(user_id) for _ in range(4)]
+        for row in rows:
+            await writer.enqueue(row)
+
+        monkeypatch.undo()
+        await writer.close()
+
+        assert await stored_ids() == {rows[2]["id"], rows[3]["id"]}
+        assert writer.dropped == 2
+
+    @pytest.mark.asyncio
+    async def test_outage_while_isolating_rows_keeps_the_rest(self, user_id, monkeypatch):
+        """Rows not yet written one by one when the database goes away are kept for the next flush."""
+        writer = InteractionWriter(batch_size=100, flush_seconds=60, max_pending=100)
+        writer.start()
+        rows = [make_row(user_id), make_row(user_id, interaction_type="unknown"), make_row(user_id), make_row(user_id)]
+        for row in rows:
+            await writer.enqueue(row)
+
+        insert = writer._insert
+        calls = []
+
+        async def fails_on_the_third_row(batch):
+            calls.append(batch)
+            if len(calls) == 4:
+                raise ConnectionError("database unavailable")
+            await insert(batch)
+
+        monkeypatch.setattr(writer, "_insert", fails_on_the_third_row)
+        await writer.flush()
+
+        assert await stored_ids() == {rows[0]["id"]}
+        assert [row["id"] for row in writer._pending] == [rows[2]["id"], rows[3]["id"]]
+        assert writer._unwritten == {rows[2]["id"], rows[3]["id"]}
+
+        monkeypatch.undo()
+        await writer.close()
+
+        assert await stored_ids() == {rows[0]["id"], rows[2]["id"], rows[3]["id"]}
+        assert writer.dropped == 1
+
+    def test_writer_restarts_under_a_new_event_loop(self, monkeypatch):
+        """A writer started, closed and started again in another loop does not reuse the first loop's primitives."""
+        writer = InteractionWriter(batch_size=1, flush_seconds=60, max_pending=100)
+        written = []
+
+        async def insert(rows):
+            written.extend(rows)
+
+        monkeypatch.setattr(writer, "_insert", insert)
+
+        async def serve():
+            writer.start()
+            await writer.enqueue(make_row(uuid.uuid4()))
+            await asyncio.sleep(0.05)  # The flusher writes the row and waits for the next one
+            await writer.close()
+
+        asyncio.run(serve())
+        asyncio.run(serve())
+
+        assert len(written) == 2
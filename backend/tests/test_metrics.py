@@ -0,0 +1,94 @@
+"""Tests for the Prometheus metrics endpoint and collectors."""
+
+from unittest.mock import patch
+from uuid import uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.ai_service import GeminiAIService
+from app.auth import get_current_user
+from app.database import User, async_session
+from app.main import app
+from app.metrics import AI_CALL_SECONDS, AI_FALLBACKS, AI_PARSE_FAILURES, Counter, Histogram
+
+
+@pytest_asyncio.fixture
+async def client(db_tables):
+    """Create an authenticated client."""
+    user_id = uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        await session.commit()
+        user = await session.get(User, user_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(app=app, base_url="http://test") as http_client:
+        yield http_client
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+class TestMetrics:
+    """Test suite for metrics collection and exposition."""
+
+    def test_histograms_render_cumulative_buckets(self):
+        """Buckets count observations at or below their bound, ending with +Inf, sum and count."""
+        histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "/api/plans")
+        counter = Counter("calls_total", "Calls.", ("operation",))
+        counter.inc('say "hi"', amount=2)
+
+        assert histogram.render()[2:] == [
+            'latency_seconds_bucket{route="/api/plans",le="0.1"} 2',
+            'latency_seconds_bucket{route="/api/plans",le="1.0"} 3',
+            'latency_seconds_bucket{route="/api/plans",le="+Inf"} 4',
+            'latency_seconds_sum{route="/api/plans"} 3.65',
+            'latency_seconds_count{route="/api/plans"} 4'
+        ]
+        assert counter.render() == ["# HELP calls_total Calls.", "# TYPE calls_total counter", 'calls_total{operation="say \\"hi\\""} 2']
+
+    @pytest.mark.asyncio
+    async def test_endpoint_exposes_requests_pools_and_caches(self, client):
+        """Requests are labelled by route template, next to pool checkouts and cache counters."""
+        plan = (await client.post("/api/plans", json={"title": "Launch"})).json()
+        await client.get(f"/api/plans/{plan['id']}")
+
+        response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert 'mindmesh_http_request_duration_seconds_count{method="GET",route="/api/plans/{plan_id}",status="200"}' in body
+        assert 'mindmesh_db_pool_checkout_seconds_count{pool="primary"}' in body
+        assert 'mindmesh_cache_hits_total{cache="read_cache"}' in body
+        assert "# TYPE mindmesh_event_loop_lag_seconds histogram" in body
+
+    @pytest.mark.asyncio
+    async def test_ai_parse_failures_and_fallbacks_are_counted(self):
+        """An unparseable Gemini response counts as a parse failure and a fallback of the operation."""
+        service = GeminiAIService()
+        failures = AI_PARSE_FAILURES.values.get(("organize_prompt",), 0)
+        fallbacks = AI_FALLBACKS.values.get(("organize_prompt",), 0)
+
+        with patch.object(service, "_generate_content", return_value="not json at all"):
+            await service.organize_into_categories("buy milk, fix bike")
+
+        assert AI_PARSE_FAILURES.values[("organize_prompt",)] == failures + 1
+        assert AI_FALLBACKS.values[("organize_prompt",)] == fallbacks + 1
+
+    @pytest.mark.asyncio
+    async def test_ai_calls_are_measured_by_outcome(self):
+        """Failed Gemini calls are observed as errors, unparseable ones as parse failures."""
+        service = GeminiAIService()
+        count = lambda outcome: AI_CALL_SECONDS.values.get(("organize_prompt", outcome), [None, 0.0, 0])[2]
+        errors, parse_failures = count("error"), count("parse_failure")
+
+        with patch.object(service, "_generate_content", side_effect=RuntimeError("quota exceeded")):
+            await service.organize_into_categories("buy milk, fix bike")
+        with patch.object(service, "_generate_content", return_value="not json at all"):
+            await service.organize_into_categories("buy milk, fix bike")
+
+        assert count("error") == errors + 1
+        assert count("parse_failure") == parse_failures + 1
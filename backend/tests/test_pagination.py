@@ -0,0 +1,78 @@
+"""Tests for keyset pagination."""
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.database import Plan, User, async_session
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset, page
+
+
+async def fetch_all_pages(user_id, limit: int, descending: bool = True):
+    """Walk every page of a user's plans and return the pages."""
+    pages, cursor = [], None
+    while True:
+        response = Response()
+        async with async_session() as session:
+            query = select(Plan).where(Plan.user_id == user_id)
+            result = await session.execute(keyset(query, Plan, cursor, limit, descending))
+            pages.append([plan.title for plan in page(result.scalars().all(), limit, response)])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+class TestPagination:
+    """Test suite for keyset pagination."""
+
+    def test_cursor_round_trip(self):
+        """Cursors decode back to the sort key they were built from."""
+        created_at, row_id = datetime(2024, 5, 1, 12, 30, 15, 123456), uuid4()
+
+        assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, row_id)
+
+    def test_aware_timestamps_bind_as_naive_utc(self):
+        """timestamptz values read by asyncpg page as the naive UTC the DateTime columns bind."""
+        created_at, row_id = datetime(2024, 5, 1, 14, 30, tzinfo=timezone(timedelta(hours=2))), uuid4()
+
+        cursor = encode_cursor(created_at, row_id)
+        assert decode_cursor(cursor) == (datetime(2024, 5, 1, 12, 30), row_id)
+
+        compiled = keyset(select(Plan), Plan, cursor, 20).compile(dialect=postgresql.asyncpg.dialect())
+        bound = [value for value in compiled.params.values() if isinstance(value, datetime)]
+        assert bound == [datetime(2024, 5, 1, 12, 30)]
+        assert bound[0].tzinfo is None
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "", "!!!"])
+    def test_invalid_cursor(self, cursor):
+        """Malformed cursors are rejected as bad requests."""
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor(cursor)
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("descending", [True, False])
+    async def test_pages_cover_every_row_once(self, db_tables, descending):
+        """Pages are disjoint and ordered, including rows sharing a timestamp."""
+        user_id = uuid4()
+        base = datetime(2024, 1, 1)
+        async with async_session() as session:
+            session.add(User(id=user_id, email=f"{user_id}@example.com"))
+            for i in range(7):
+                # Pairs of plans share created_at so ties are broken by id
+                session.add(Plan(user_id=user_id, title=f"Plan {i}", created_at=base + timedelta(minutes=i // 2)))
+            await session.commit()
+
+        pages = await fetch_all_pages(user_id, limit=3, descending=descending)
+
+        async with async_session() as session:
+            query = select(Plan).where(Plan.user_id == user_id)
+            order = (Plan.created_at.desc(), Plan.id.desc()) if descending else (Plan.created_at, Plan.id)
+            expected = (await session.execute(query.order_by(*order))).scalars().all()
+
+        assert [len(titles) for titles in pages] == [3, 3, 1]
+        assert [title for titles in pages for title in titles] == [plan.title for plan in expected]
@@ -0,0 +1,136 @@
+"""Tests for on-demand and sampled request profiling."""
+
+import asyncio
+import sys
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.util import greenlet_spawn
+
+from app.config import settings
+from app.main import app
+from app.profiling import AWAIT_FRAME, Profile, ProfilingMiddleware, aggregates, profile_store, sampler
+
+TOKEN = "profiling-secret"
+
+
+@pytest.fixture(autouse=True)
+def profiling(monkeypatch):
+    """Enable profiling with a fast sampler and empty aggregates."""
+    monkeypatch.setattr(settings, "profiling_token", TOKEN)
+    monkeypatch.setattr(sampler, "interval_seconds", 0.001)
+    aggregates.reset()
+
+
+@pytest_asyncio.fixture
+async def client():
+    """Create a client of the application."""
+    async with httpx.AsyncClient(app=app, base_url="http://test") as http_client:
+        yield http_client
+
+
+def busy(seconds):
+    """Keep the event loop thread busy."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def wait_for_io():
+    """Wait as if on the database or Gemini."""
+    await asyncio.sleep(0.05)
+
+
+async def profiled_app(scope, receive, send):
+    """ASGI app spending time on the CPU, then waiting."""
+    busy(0.05)
+    await wait_for_io()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def call(middleware, path, headers=(), query_string=b""):
+    """Run a request through the middleware, returning the response headers."""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query_string, "headers": list(headers)}
+    await middleware(scope, None, send)
+    return dict(messages[0]["headers"])
+
+
+class TestProfiling:
+    """Test suite for the request profiler."""
+
+    @pytest.mark.asyncio
+    async def test_on_demand_profiles_cover_cpu_and_await_time(self):
+        """A request with the token is profiled; running and suspended time both appear as stacks."""
+        middleware = ProfilingMiddleware(profiled_app, sample_paths=[], sample_rate=0.0)
+
+        assert b"x-profile-id" not in await call(middleware, "/api/tasks", [(b"x-profile-token", b"wrong")])
+        assert b"x-profile-id" not in await call(middleware, "/api/tasks", query_string=f"profile_token={TOKEN}".encode())
+        headers = await call(middleware, "/api/tasks", [(b"x-profile-token", TOKEN.encode())])
+
+        profile = profile_store.get(headers[b"x-profile-id"].decode())
+        stacks = profile.collapsed().splitlines()
+        assert 0 < profile.cpu_samples < profile.samples
+        assert any(line.split(";")[-1].startswith("busy (tests/test_profiling.py") for line in stacks)
+        assert any("wait_for_io" in line and line.rsplit(" ", 1)[0].endswith(AWAIT_FRAME) for line in stacks)
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+
+    @pytest.mark.asyncio
+    async def test_orm_code_in_greenlets_is_attributed_to_the_request(self):
+        """Synchronous code SQLAlchemy runs in a greenlet joins the stack of the awaiting coroutine."""
+        def load_rows():
+            profile.sample(sys._current_frames())
+
+        async def handler():
+            await greenlet_spawn(load_rows)
+
+        coro = handler()
+        profile = Profile(coro, "GET", "/api/tasks", max_stacks=10)
+        await coro
+
+        [stack] = profile.stacks
+        frames = stack.split(";")
+        assert frames[0].startswith("TestProfiling.test_orm_code_in_greenlets_is_attributed_to_the_request.<locals>.handler")
+        assert frames[1].startswith("greenlet_spawn")
+        assert frames[-1].startswith("TestProfiling.test_orm_code_in_greenlets_is_attributed_to_the_request.<locals>.load_rows")
+        assert profile.cpu_samples == 1
+
+    @pytest.mark.asyncio
+    async def test_sampled_requests_are_aggregated_and_served_to_token_holders(self, client, monkeypatch):
+        """Requests to sampled paths add up by route; the profile endpoints need the token."""
+        middleware = ProfilingMiddleware(profiled_app, sample_paths=["/api/tasks"], sample_rate=1.0)
+        for path in ["/api/tasks", "/api/tasks", "/api/plans"]:
+            assert b"x-profile-id" not in await call(middleware, path)
+
+        assert aggregates.summary()["GET /api/tasks"]["requests"] == 2
+        assert "GET /api/plans" not in aggregates.summary()
+
+        assert (await client.get("/api/profiles")).status_code == 403
+        response = await client.get("/api/profiles/aggregate", headers={"X-Profile-Token": TOKEN})
+        assert response.status_code == 200
+        assert all(line.startswith("GET /api/tasks;") for line in response.text.splitlines())
+        assert any(line.split(";")[-1].startswith("busy") for line in response.text.splitlines())
+
+        response = await client.get(
+            "/api/profiles/aggregate", params={"route": "GET /api/tasks", "reset": "true"}, headers={"X-Profile-Token": TOKEN}
+        )
+        assert response.text.startswith("profiled_app (tests/test_profiling.py")
+        assert aggregates.summary() == {}
+
+        monkeypatch.setattr(settings, "profiling_token", "")
+        assert (await client.get("/api/profiles", headers={"X-Profile-Token": TOKEN})).status_code == 404
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("path", ["/api/auth/cache-stats", "/api/read-cache/stats", "/api/db/query-stats"])
+    async def test_process_stats_need_the_token(self, client, path):
+        """Process-wide cache and query statistics are served to token holders only."""
+        assert (await client.get(path)).status_code == 403
+        assert (await client.get(path, headers={"X-Profile-Token": "wrong"})).status_code == 403
+        assert (await client.get(path, headers={"X-Profile-Token": TOKEN})).status_code == 200
@@ -0,0 +1,194 @@
+"""Tests for the prompt template registry."""
+
+import json
+import random
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app.ai_service import GeminiAIService, last_token_count
+from app.config import settings
+from app.database import AIInteraction, User, async_session
+from app.main import app
+from app.prompts import BUILTIN_TEMPLATES, PromptRegistry, PromptTemplate, prompt_registry
+
+
+@pytest.fixture
+def registry():
+    """Create a registry with two versions of one template."""
+    registry = PromptRegistry(rng=random.Random(42))
+    registry.register("greet", 1, "Hello {name}, reply with {{\"ok\": true}}", weight=0.8)
+    registry.register("greet", 2, "Hi {name}!", weight=0.2)
+    return registry
+
+
+class TestPromptTemplate:
+    """Test suite for PromptTemplate."""
+
+    def test_render_keeps_literal_braces(self):
+        """Escaped braces render as JSON braces."""
+        template = PromptTemplate("greet", 1, "Hello {name}, reply with {{\"ok\": true}}")
+
+        assert template.fields == {"name"}
+        assert template.render(name="Ada") == "Hello Ada, reply with {\"ok\": true}\n"
+
+    def test_render_requires_all_fields(self):
+        """Rendering without every placeholder fails."""
+        template = PromptTemplate("greet", 1, "Hello {name} from {place}")
+
+        with pytest.raises(ValueError, match="place"):
+            template.render(name="Ada")
+
+    def test_invalid_template_fails_at_compile_time(self):
+        """Malformed templates are rejected when registered."""
+        with pytest.raises(ValueError, match="greet v3"):
+            PromptTemplate("greet", 3, "Hello {name")
+
+    @pytest.mark.parametrize("entry", BUILTIN_TEMPLATES, ids=lambda entry: entry["id"])
+    def test_builtin_templates_compile(self, entry):
+        """Every built-in template is registered and renders."""
+        template = prompt_registry.get(entry["id"], entry["version"])
+
+        prompt = template.render(**{field: "x" for field in template.fields})
+
+        assert "JSON" in prompt
+
+
+class TestPromptRegistry:
+    """Test suite for PromptRegistry."""
+
+    def test_select_splits_traffic_by_weight(self, registry):
+        """Versions are selected in proportion to their weights."""
+        picks = [registry.select("greet").version for _ in range(2000)]
+
+        assert 0.75 < picks.count(1) / len(picks) < 0.85
+
+    def test_zero_weight_disables_version(self, registry):
+        """Versions with zero weight receive no traffic."""
+        registry.set_weight("greet", 1, 0)
+
+        assert {registry.select("greet").version for _ in range(50)} == {2}
+
+    def test_stats_per_version(self, registry):
+        """Latency percentiles, tokens and parse failures are tracked per version."""
+        template = registry.get("greet", 1)
+        for latency in range(1, 101):
+            registry.record(template, float(latency), tokens=10, parse_failed=latency % 10 == 0, errored=latency % 20 == 0)
+
+        stats = {entry["version"]: entry for entry in registry.stats()}
+
+        assert stats[1]["calls"] == 100
+        assert stats[1]["p50_latency_ms"] == 51.0
+        assert stats[1]["p95_latency_ms"] == 96.0
+        assert stats[1]["avg_tokens"] == 10
+        assert stats[1]["parse_failure_rate"] == 0.1
+        assert stats[1]["error_rate"] == 0.05
+        assert stats[2]["calls"] == 0
+        assert stats[2]["p50_latency_ms"] is None
+
+    def test_load_file(self, registry, tmp_path):
+        """Template files add versions and re-weight existing ones."""
+        path = tmp_path / "templates.json"
+        path.write_text(json.dumps([
+            {"id": "greet", "version": 3, "text": "Hey {name}", "weight": 0.5},
+            {"id": "greet", "version": 1, "weight": 0}
+        ]))
+
+        assert registry.load_file(str(path)) == 2
+        assert registry.get("greet", 3).render(name="Ada") == "Hey Ada\n"
+        assert registry.get("greet", 1).weight == 0
+
+
+class TestTemplateUsage:
+    """Test suite for template usage in the AI service."""
+
+    @pytest.mark.asyncio
+    async def test_parse_failures_are_recorded(self):
+        """Unparseable model output counts as a parse failure of the template version."""
+        service = GeminiAIService()
+        registry = PromptRegistry()
+        template = registry.register("organize_prompt", 1, "Organize {messy_prompt}")
+
+        with patch("app.ai_service.prompt_registry", registry), \
+             patch.object(service, "_generate_content", return_value="not json at all"):
+            result = await service.organize_into_categories("buy milk, fix bike")
+
+        stats = registry.stats()[0]
+        assert result["prompt_template"] == template.ref()
+        assert stats["calls"] == 1
+        assert stats["parse_failure_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_errored_calls_are_recorded(self):
+        """Calls failing after their retries count as calls, with their latency, and as errors."""
+        service = GeminiAIService()
+        registry = PromptRegistry()
+        registry.register("organize_prompt", 1, "Organize {messy_prompt}")
+
+        with patch("app.ai_service.prompt_registry", registry), \
+             patch.object(service, "_generate_content", side_effect=RuntimeError("quota exceeded")):
+            await service.organize_into_categories("buy milk, fix bike")
+
+        stats = registry.stats()[0]
+        assert stats["calls"] == 1
+        assert stats["error_rate"] == 1.0
+        assert stats["p50_latency_ms"] is not None
+
+    @pytest.mark.asyncio
+    async def test_tokens_reach_the_recorded_interaction(self, db_tables):
+        """Interactions record the tokens of the Gemini calls made for them, and only those."""
+        service = GeminiAIService()
+
+        async def generate(prompt):
+            last_token_count.set(42)
+            return json.dumps({"categories": []})
+
+        with patch.object(service, "_generate_content", side_effect=generate):
+            result = await service.organize_into_categories("buy milk, fix bike")
+        interaction = await service.record_ai_interaction(
+            user_id=str(uuid4()), plan_id=None, interaction_type="categorization", request_data={}, response_data=result
+        )
+        unrelated = await service.record_ai_interaction(
+            user_id=str(uuid4()), plan_id=None, interaction_type="categorization", request_data={}, response_data={}
+        )
+
+        assert interaction.tokens_used == 42
+        assert interaction.cost_estimate > 0
+        assert unrelated.tokens_used == 0
+
+    @pytest.mark.asyncio
+    async def test_template_stats_come_from_stored_interactions(self, db_tables, monkeypatch):
+        """Operators get latency, token and feedback figures of the stored interactions in the window."""
+        monkeypatch.setattr(settings, "profiling_token", "operator")
+        user_id = uuid4()
+        async with async_session() as session:
+            session.add(User(id=user_id, email=f"{user_id}@example.com"))
+            for feedback, latency, tokens, age in [(5, 100, 10, 1), (3, 300, 30, 5), (1, 900, 90, 90)]:
+                session.add(AIInteraction(
+                    user_id=user_id,
+                    interaction_type="categorization",
+                    user_feedback=feedback,
+                    response_time_ms=latency,
+                    tokens_used=tokens,
+                    template_id="organize_prompt",
+                    template_version=1,
+                    created_at=datetime.utcnow() - timedelta(days=age)
+                ))
+            await session.commit()
+
+        async with httpx.AsyncClient(app=app, base_url="http://test") as http_client:
+            assert (await http_client.get("/api/ai/template-stats")).status_code == 403
+            headers = {"X-Profile-Token": "operator"}
+            recent = (await http_client.get("/api/ai/template-stats", headers=headers)).json()
+            latest = (await http_client.get("/api/ai/template-stats", params={"days": 2}, headers=headers)).json()
+
+        organize = lambda stats: next(s for s in stats if s["template_id"] == "organize_prompt" and s["version"] == 1)
+        assert organize(recent)["interactions"] == 2
+        assert (organize(recent)["p50_latency_ms"], organize(recent)["p95_latency_ms"]) == (200, 290)
+        assert (organize(recent)["tokens_total"], organize(recent)["avg_tokens"]) == (40, 20.0)
+        assert (organize(recent)["feedback_avg"], organize(recent)["feedback_count"]) == (4.0, 2)
+        assert (organize(latest)["feedback_avg"], organize(latest)["feedback_count"]) == (5.0, 1)
+        assert "error_rate" in organize(latest)["process"]
@@ -0,0 +1,153 @@
+"""Tests for statement fingerprints, the slow-query log and per-route query budgets."""
+
+import asyncio
+import json
+import logging
+import time
+from uuid import UUID, uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+from jose import jwt
+from sqlalchemy import select
+
+from app import auth_cache, query_log
+from app.auth import get_current_user
+from app.config import settings
+from app.database import AIInteraction, User, async_session
+from app.main import app
+from app.query_log import fingerprint
+
+
+@pytest_asyncio.fixture
+async def client(db_tables):
+    """Create an authenticated client with a plan of ten tasks."""
+    user_id = uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        await session.commit()
+        user = await session.get(User, user_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(app=app, base_url="http://test") as http_client:
+        plan = (await http_client.post("/api/plans", json={"title": "Launch"})).json()
+        tasks = [
+            (await http_client.post("/api/tasks", json={"plan_id": plan["id"], "title": f"Task {i}", "priority": 3})).json()
+            for i in range(10)
+        ]
+        yield http_client, plan, tasks
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+class TestQueryLog:
+    """Test suite for fingerprints and the slow-query log."""
+
+    def test_fingerprints_ignore_values_and_list_lengths(self):
+        """Statements differing only in literals, placeholders or value list lengths share a fingerprint."""
+        first = fingerprint("SELECT * FROM tasks WHERE id IN ($1, $2) AND title = 'a' LIMIT 20")
+        second = fingerprint("SELECT *  FROM tasks\nWHERE id IN ($1, $2, $3) AND title = 'it''s' LIMIT 50")
+        inserts = fingerprint("INSERT INTO tasks (id, title) VALUES (?, ?), (?, ?), (?, ?)")
+
+        assert first == second
+        assert first[1] == "SELECT * FROM tasks WHERE id IN (?) AND title = ? LIMIT ?"
+        assert inserts[1] == "INSERT INTO tasks (id, title) VALUES (?), ..."
+        assert fingerprint("SELECT CAST(x AS TEXT)::text")[1] == "SELECT CAST(x AS TEXT)::text"
+
+    @pytest.mark.asyncio
+    async def test_slow_statements_are_logged_with_their_plan_in_debug_mode(self, db_tables, monkeypatch, caplog):
+        """A statement over the threshold is logged, followed by its EXPLAIN plan."""
+        monkeypatch.setattr(settings, "slow_query_ms", 0.000001)
+        monkeypatch.setattr(settings, "debug", True)
+        query_log._explained.clear()
+
+        with caplog.at_level(logging.WARNING, logger="app.query_log"):
+            async with async_session() as session:
+                await session.execute(select(User).where(User.email == "slow@example.com"))
+            await asyncio.gather(*query_log._explains)
+
+        events = [json.loads(record.getMessage()) for record in caplog.records if record.getMessage().startswith("{")]
+        slow = next(entry for entry in events if entry["event"] == "slow_query" and "FROM users" in entry["statement"])
+        plan = next(entry for entry in events if entry["event"] == "slow_query_plan" and entry["fingerprint"] == slow["fingerprint"])
+        assert any("users" in line for line in plan["plan"])
+        assert any(entry["fingerprint"] == slow["fingerprint"] for entry in query_log.query_stats.top(1000))
+
+
+class TestQueryBudgets:
+    """Per-route statement budgets; an N+1 regression exceeds them."""
+
+    @pytest.mark.asyncio
+    async def test_plan_and_task_reads(self, client, query_budget, monkeypatch):
+        """List and detail reads run a fixed number of statements whatever the task count."""
+        http_client, plan, _ = client
+
+        for url, budget in [
+            ("/api/plans", 2),
+            (f"/api/plans/{plan['id']}", 1),
+            (f"/api/plans/{plan['id']}/detail", 2),
+            ("/api/tasks", 2),
+            (f"/api/plans/{plan['id']}/tasks", 3)
+        ]:
+            with query_budget(budget):
+                assert (await http_client.get(url)).status_code == 200
+
+        monkeypatch.setattr(settings, "profiling_token", "operator")
+        statements = (await http_client.get(
+            "/api/db/query-stats", params={"limit": 200}, headers={"X-Profile-Token": "operator"}
+        )).json()["statements"]
+        assert any("FROM tasks" in entry["statement"] and entry["calls"] >= 1 for entry in statements)
+
+    @pytest.mark.asyncio
+    async def test_task_writes(self, client, query_budget):
+        """Creating, updating and deleting a task run a fixed number of statements."""
+        http_client, plan, tasks = client
+
+        with query_budget(3):
+            await http_client.post("/api/tasks", json={"plan_id": plan["id"], "title": "Another", "priority": 2})
+        with query_budget(4):
+            await http_client.put(f"/api/tasks/{tasks[0]['id']}", json={"status": "doing"})
+        with query_budget(3):
+            await http_client.delete(f"/api/tasks/{tasks[1]['id']}")
+
+    @pytest.mark.asyncio
+    async def test_approving_a_dashboard_does_not_grow_with_its_tasks(self, client, query_budget):
+        """Applying scored tasks is batched, so ten tasks cost as much as one."""
+        http_client, plan, tasks = client
+        interaction_id = uuid4()
+        async with async_session() as session:
+            session.add(AIInteraction(
+                id=interaction_id,
+                user_id=UUID(plan["user_id"]),
+                plan_id=UUID(plan["id"]),
+                interaction_type="dashboard",
+                response_data={"dashboard_data": {}, "priority_analysis": {"scored_tasks": [
+                    {**task, "ai_category": f"Area {i % 3}", "ai_priority_score": 7, "ai_reasoning": "Blocks launch"}
+                    for i, task in enumerate(tasks)
+                ]}}
+            ))
+            await session.commit()
+
+        with query_budget(10):
+            response = await http_client.post(
+                "/api/ai/approve-dashboard", params={"interaction_id": str(interaction_id)}, json={"approved": True}
+            )
+        assert response.json()["applied_tasks"] == 10
+
+    @pytest.mark.asyncio
+    async def test_authentication_reads_the_user_once(self, client, query_budget):
+        """A token's user is looked up on the first request and then served from the cache."""
+        http_client, plan, _ = client
+        app.dependency_overrides.pop(get_current_user, None)
+        auth_cache.claims_cache.clear()
+        auth_cache.user_cache.clear()
+        token = jwt.encode(
+            {"sub": plan["user_id"], "email": "owner@example.com", "exp": int(time.time()) + 3600},
+            settings.supabase_jwt_secret,
+            algorithm="HS256"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with query_budget(2):
+            assert (await http_client.get(f"/api/plans/{plan['id']}", headers=headers)).status_code == 200
+        with query_budget(1):
+            assert (await http_client.get(f"/api/plans/{plan['id']}", headers=headers)).status_code == 200
@@ -0,0 +1,132 @@
+"""Tests for the per-user plan and task list cache."""
+
+from typing import Dict, Optional
+from uuid import uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+from app.auth import get_current_user
+from app.database import User, async_session, engine
+from app.main import app
+from app.read_cache import PLANS, TASKS, ReadCache
+
+
+class LocalRedis:
+    """In-memory stand-in for the get, set and incr commands of a Redis client."""
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self.values: Dict[str, str] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        """Get a value."""
+        return self.values.get(key)
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None) -> None:
+        """Set a value, ignoring the expiry."""
+        self.values[key] = value
+
+    async def incr(self, key: str) -> int:
+        """Increment a counter."""
+        self.values[key] = str(int(self.values.get(key, 0)) + 1)
+        return int(self.values[key])
+
+
+@pytest_asyncio.fixture
+async def client(db_tables):
+    """Create an authenticated client and count the statements it sends."""
+    user_id = uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        await session.commit()
+        user = await session.get(User, user_id)
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(app=app, base_url="http://test") as http_client:
+        yield http_client, statements
+    app.dependency_overrides.pop(get_current_user, None)
+    event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+
+class TestReadCache:
+    """Test suite for cached list reads and their invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_shared_tier_keeps_workers_consistent(self):
+        """A write in one worker makes every worker reload, and loads are shared through the remote tier."""
+        remote = LocalRedis()
+        first, second = ReadCache(100, 60, remote), ReadCache(100, 60, remote)
+        user_id, version = uuid4(), {"value": 1}
+
+        async def load():
+            return [version["value"]]
+
+        assert await first.get_or_load(user_id, TASKS, "list", load) == [1]
+        version["value"] = 2
+        assert await second.get_or_load(user_id, TASKS, "list", load) == [1]  # Served by the shared tier
+
+        await first.invalidate(user_id, TASKS)
+        assert await second.get_or_load(user_id, TASKS, "list", load) == [2]
+        assert await first.get_or_load(user_id, TASKS, "list", load) == [2]
+        assert await first.get_or_load(user_id, PLANS, "list", load) == [2]  # Other scopes are separate
+
+        assert second.stats()["remote_hits"] == 1
+        assert first.stats()["database_loads"] == 2
+
+    @pytest.mark.asyncio
+    async def test_replica_loads_right_after_a_write_are_not_stored(self):
+        """A worker reading a lagging replica after another worker's write does not cache the stale list."""
+        remote = LocalRedis()
+        writer, reader = ReadCache(100, 60, remote, replica_lag_seconds=5), ReadCache(100, 60, remote, replica_lag_seconds=5)
+        user_id, replica = uuid4(), {"value": 1}
+
+        async def load():
+            return [replica["value"]]
+
+        await writer.invalidate(user_id, TASKS)
+        assert await reader.get_or_load(user_id, TASKS, "list", load, from_replica=True) == [1]  # Replica lags
+        replica["value"] = 2
+        assert await reader.get_or_load(user_id, TASKS, "list", load, from_replica=True) == [2]
+        assert reader.stats()["unstored_replica_loads"] == 2
+
+        # Once the lag window has passed, replica loads are cached again
+        remote.values = {key: value for key, value in remote.values.items() if not key.endswith(":bumped")}
+        assert await reader.get_or_load(user_id, TASKS, "list", load, from_replica=True) == [2]
+        replica["value"] = 3
+        assert await reader.get_or_load(user_id, TASKS, "list", load, from_replica=True) == [2]
+
+    @pytest.mark.asyncio
+    async def test_lists_are_served_from_cache_until_a_write(self, client):
+        """Repeated list reads skip the database and every write handler invalidates them."""
+        http_client, statements = client
+        plan = (await http_client.post("/api/plans", json={"title": "Launch"})).json()
+        task = (await http_client.post("/api/tasks", json={"plan_id": plan["id"], "title": "API"})).json()
+
+        first = (await http_client.get(f"/api/plans/{plan['id']}/tasks")).json()
+        statements.clear()
+        assert (await http_client.get(f"/api/plans/{plan['id']}/tasks")).json() == first
+        assert statements == []
+        assert (await http_client.get("/api/plans")).status_code == 200
+        loaded = len(statements)
+        assert (await http_client.get("/api/plans")).status_code == 200
+        assert len(statements) == loaded
+
+        await http_client.put(f"/api/tasks/{task['id']}", json={"title": "Public API"})
+        tasks = (await http_client.get(f"/api/plans/{plan['id']}/tasks")).json()
+        assert [task["title"] for task in tasks] == ["Public API"]
+
+        await http_client.put(f"/api/plans/{plan['id']}", json={"title": "Launch v2"})
+        assert [plan["title"] for plan in (await http_client.get("/api/plans")).json()] == ["Launch v2"]
+
+        await http_client.delete(f"/api/plans/{plan['id']}")
+        assert (await http_client.get("/api/tasks")).json() == []
+        assert (await http_client.get("/api/plans")).json() == []
@@ -0,0 +1,76 @@
+"""Tests for read replica routing."""
+
+from uuid import uuid4
+
+import pytest
+
+from app import replicas
+from app.database import USER_ID_KEY, User, async_session
+from app.replicas import ReplicaRouter
+
+
+def make_router(*urls, sticky_seconds: float = 60) -> ReplicaRouter:
+    """Create a router over the given replica URLs."""
+    return ReplicaRouter(list(urls), sticky_seconds, check_seconds=1)
+
+
+class TestReplicaRouter:
+    """Test suite for replica selection."""
+
+    def test_reads_rotate_over_healthy_replicas(self):
+        """Reads alternate between replicas and skip unhealthy ones."""
+        router = make_router("sqlite+aiosqlite:///:memory:", "sqlite+aiosqlite:///:memory:")
+        first, second = router.replicas
+
+        assert {router.choose(uuid4()), router.choose(uuid4())} == {first, second}
+
+        router.mark_unhealthy(first)
+        assert {router.choose(uuid4()) for _ in range(3)} == {second}
+
+        router.mark_unhealthy(second)
+        assert router.choose(uuid4()) is None
+
+    def test_recent_writer_reads_from_primary(self):
+        """A user's reads stay on the primary within the window after a write."""
+        router = make_router("sqlite+aiosqlite:///:memory:")
+        writer, reader = uuid4(), uuid4()
+
+        router.note_write(writer)
+
+        assert router.choose(writer) is None
+        assert router.choose(reader) is router.replicas[0]
+        assert make_router("sqlite+aiosqlite:///:memory:", sticky_seconds=0).choose(writer) is not None
+
+    def test_replica_sessions_are_recognized(self):
+        """Sessions of a replica are told apart from primary sessions."""
+        router = make_router("sqlite+aiosqlite:///:memory:")
+
+        assert router.is_replica(router.replicas[0].sessionmaker())
+        assert not router.is_replica(async_session())
+
+    @pytest.mark.asyncio
+    async def test_health_check_updates_rotation(self, tmp_path):
+        """Unreachable replicas leave the rotation and reachable ones rejoin it."""
+        router = make_router("sqlite+aiosqlite:///:memory:", f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db")
+        reachable, unreachable = router.replicas
+        router.mark_unhealthy(reachable)
+
+        await router.check()
+        await router.dispose()
+
+        assert reachable.healthy
+        assert not unreachable.healthy
+
+    @pytest.mark.asyncio
+    async def test_committed_session_pins_user(self, db_tables, monkeypatch):
+        """Committing a session acting for a user pins that user to the primary."""
+        router = make_router("sqlite+aiosqlite:///:memory:")
+        monkeypatch.setattr(replicas, "replica_router", router)
+        user_id = uuid4()
+
+        async with async_session() as session:
+            session.info[USER_ID_KEY] = user_id
+            session.add(User(id=user_id, email=f"{user_id}@example.com"))
+            await session.commit()
+
+        assert router.is_sticky(user_id)
@@ -0,0 +1,39 @@
+"""Tests for the orjson-based encoder shared by responses and JSON columns."""
+
+from datetime import datetime
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.database import Plan, User, async_session
+from app.serialization import dumps, loads
+
+
+class TestSerialization:
+    """Test suite for fast JSON encoding."""
+
+    def test_encodes_api_and_calibration_types(self):
+        """UUIDs, datetimes, integer keys and numpy scalars are encoded without converters."""
+        value_id = uuid4()
+        encoded = dumps({"id": value_id, "at": datetime(2026, 1, 2, 3, 4, 5), "histogram": {5: 2}, "score": np.float64(0.5)})
+
+        assert loads(encoded) == {"id": str(value_id), "at": "2026-01-02T03:04:05", "histogram": {"5": 2}, "score": 0.5}
+
+    @pytest.mark.asyncio
+    async def test_json_columns_accept_uuids_and_datetimes(self, db_tables):
+        """AI payloads holding request models' UUIDs and datetimes can be stored in JSON columns."""
+        user_id, plan_id, referenced_id = uuid4(), uuid4(), uuid4()
+        async with async_session() as session:
+            session.add(User(id=user_id, email=f"{user_id}@example.com"))
+            session.add(Plan(
+                id=plan_id,
+                user_id=user_id,
+                title="Launch",
+                ai_generated_data={"plan_id": referenced_id, "generated_at": datetime(2026, 1, 2)}
+            ))
+            await session.commit()
+
+        async with async_session() as session:
+            plan = await session.get(Plan, plan_id)
+            assert plan.ai_generated_data == {"plan_id": str(referenced_id), "generated_at": "2026-01-02T00:00:00"}
@@ -0,0 +1,77 @@
+"""Tests for the Server-Timing request breakdown."""
+
+import json
+import logging
+from uuid import uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.auth import get_current_user
+from app.database import User, async_session
+from app.main import app
+from app.timings import ServerTimingMiddleware, current, timed
+
+
+@pytest_asyncio.fixture
+async def client(db_tables):
+    """Create an authenticated client."""
+    user_id = uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        await session.commit()
+        user = await session.get(User, user_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(app=app, base_url="http://test") as http_client:
+        yield http_client
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+async def timed_app(scope, receive, send):
+    """ASGI app spending time in the ai phase."""
+    with timed("ai"):
+        pass
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def call(middleware):
+    """Run a request through the middleware, returning the response headers."""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware({"type": "http", "method": "GET", "path": "/api/plans", "headers": []}, None, send)
+    return dict(messages[0]["headers"])
+
+
+class TestServerTiming:
+    """Test suite for the Server-Timing middleware."""
+
+    @pytest.mark.asyncio
+    async def test_responses_break_down_database_and_serialization_time(self, client):
+        """Queries and JSON rendering of an endpoint appear as phases of the header."""
+        await client.post("/api/plans", json={"title": "Launch"})
+
+        response = await client.get("/api/plans")
+
+        metrics = {metric.split(";")[0]: metric for metric in response.headers["Server-Timing"].split(", ")}
+        assert {"db", "serialize", "total"} <= set(metrics)
+        assert "dur=" in metrics["db"]
+        assert current() is None
+
+    @pytest.mark.asyncio
+    async def test_unsampled_requests_are_not_timed_and_slow_ones_are_logged(self, caplog):
+        """A sample rate of 0 skips timing; timed requests over the threshold log one JSON line."""
+        assert b"server-timing" not in await call(ServerTimingMiddleware(timed_app, sample_rate=0.0))
+
+        with caplog.at_level(logging.INFO, logger="app.timings"):
+            headers = await call(ServerTimingMiddleware(timed_app, sample_rate=1.0, log_min_ms=0.0))
+
+        assert headers[b"server-timing"].startswith(b'ai;dur=')
+        line = json.loads(caplog.records[-1].getMessage())
+        assert line["path"] == "/api/plans" and line["status"] == 200
+        assert line["phases"]["ai"]["count"] == 1
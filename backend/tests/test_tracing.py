@@ -0,0 +1,135 @@
+"""Tests for tracing spans, exporters and trace ids on AI interactions."""
+
+import json
+from unittest.mock import patch
+from uuid import UUID, uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.ai_service import ai_service
+from app.auth import get_current_user
+from app.database import AIInteraction, User, async_session
+from app.main import app
+from app.tracing import JsonLinesExporter, OTLPHttpExporter, SpanExporter, parse_traceparent, span, start_span, tracer
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture
+def exported(tmp_path):
+    """Export spans to a JSON-lines file; returns a function reading the flushed spans."""
+    path = tmp_path / "traces.jsonl"
+    previous, tracer.exporter = tracer.exporter, JsonLinesExporter(str(path))
+
+    async def read():
+        await tracer.flush()
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    yield read
+    tracer.exporter = previous
+
+
+@pytest_asyncio.fixture
+async def client(db_tables):
+    """Create an authenticated client."""
+    user_id = uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        await session.commit()
+        user = await session.get(User, user_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(app=app, base_url="http://test") as http_client:
+        yield http_client
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+class TestTracing:
+    """Test suite for spans and their export."""
+
+    @pytest.mark.asyncio
+    async def test_nested_spans_share_a_trace_and_record_errors(self, exported):
+        """Child spans point to their parent; an escaping exception marks the span as failed."""
+        with pytest.raises(ValueError):
+            with span("pipeline", plan_id="p1") as pipeline:
+                with span("stage", **{"ai.task_count": 3}):
+                    pass
+                raise ValueError("boom")
+
+        stage, root = await exported()
+        assert stage["trace_id"] == root["trace_id"] == pipeline.trace_id
+        assert stage["parent_id"] == root["span_id"] and root["parent_id"] is None
+        assert stage["attributes"] == {"ai.task_count": 3}
+        assert root["status"] == "error" and root["error"] == "ValueError: boom"
+
+    def test_traceparent_parsing_and_otlp_payload(self):
+        """Valid W3C headers are continued; spans map to OTLP/HTTP JSON fields."""
+        assert parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-01") == (TRACE_ID, "00f067aa0ba902b7", True)
+        assert parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-00") == (TRACE_ID, "00f067aa0ba902b7", False)
+        assert parse_traceparent("00-xyz-00f067aa0ba902b7-01") is None
+        assert parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-x1") is None
+
+        with span("gemini.generate", **{"ai.tokens": 12, "ai.operation": "organize_prompt"}) as call:
+            pass
+        otlp_span = OTLPHttpExporter("http://collector:4318/", "Mindmesh API").payload([call])["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+
+        assert otlp_span["traceId"] == call.trace_id and otlp_span["status"] == {"code": 1}
+        assert {"key": "ai.tokens", "value": {"intValue": "12"}} in otlp_span["attributes"]
+
+    @pytest.mark.asyncio
+    async def test_request_trace_reaches_spans_and_interaction_rows(self, client, exported):
+        """AI stages and queries of a request join its incoming trace, which is stored on the interaction."""
+        response_text = json.dumps({"categories": []})
+        with patch.object(ai_service, "_generate_content", return_value=response_text):
+            response = await client.post(
+                "/api/ai/organize-prompt",
+                json={"prompt": "buy milk, fix bike"},
+                headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"}
+            )
+
+        assert response.status_code == 200
+        async with async_session() as session:
+            interaction = await session.get(AIInteraction, UUID(response.json()["interaction_id"]))
+        assert interaction.trace_id == TRACE_ID
+
+        spans = {exported_span["name"]: exported_span for exported_span in await exported()}
+        request_span = spans["HTTP POST /api/ai/organize-prompt"]
+        assert {exported_span["trace_id"] for exported_span in spans.values()} == {TRACE_ID}
+        assert request_span["parent_id"] == "00f067aa0ba902b7"
+        assert spans["gemini.generate"]["parent_id"] == request_span["span_id"]
+        assert spans["gemini.generate"]["attributes"]["ai.retries"] == 0
+        assert spans["ai.extract_json"]["attributes"]["ai.response_chars"] == len(response_text)
+        assert "db.query" in spans
+
+    def test_remote_sampling_decision_is_kept(self, monkeypatch):
+        """A continued trace follows the caller's sampled flag rather than the local sample rate."""
+        monkeypatch.setattr(tracer, "sample_rate", 0.0)
+        assert start_span("HTTP GET", remote_parent=(TRACE_ID, "00f067aa0ba902b7", True)).sampled
+        monkeypatch.setattr(tracer, "sample_rate", 1.0)
+        assert not start_span("HTTP GET", remote_parent=(TRACE_ID, "00f067aa0ba902b7", False)).sampled
+
+    def test_exporters_must_implement_export(self):
+        """SpanExporter is abstract, so an exporter without export fails when created."""
+        class Incomplete(SpanExporter):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    @pytest.mark.asyncio
+    async def test_dashboard_pipeline_loads_the_plan_in_a_span(self, client, exported):
+        """The dashboard pipeline's plan load succeeds against the database and is traced with its task count."""
+        plan = (await client.post("/api/plans", json={"title": "Launch"})).json()
+        await client.post("/api/tasks", json={"plan_id": plan["id"], "title": "Write docs", "priority": 3})
+
+        with patch.object(ai_service, "_generate_content", return_value=json.dumps({"categories": []})):
+            response = await client.post("/api/ai/generate-dashboard", params={"plan_id": plan["id"]})
+
+        assert response.json()["success"] is True
+        spans = {exported_span["name"]: exported_span for exported_span in await exported()}
+        load = spans["db.load_plan"]
+        assert load["status"] == "ok"
+        assert load["attributes"]["ai.task_count"] == 1
+        assert load["parent_id"] == spans["ai.generate_dashboard"]["span_id"]
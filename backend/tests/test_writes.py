@@ -0,0 +1,146 @@
+"""Tests for single-statement ownership-checked writes."""
+
+from uuid import UUID, uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, select
+
+from app import context_stats
+from app.auth import get_current_user
+from app.database import AIInteraction, Plan, Task, User, UserContextStats, async_session, engine
+from app.main import app
+
+
+@pytest_asyncio.fixture
+async def client(db_tables):
+    """Create an authenticated client and a plan owned by another user."""
+    user_id, other_id, foreign_plan_id = uuid4(), uuid4(), uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com"))
+        session.add(User(id=other_id, email=f"{other_id}@example.com"))
+        session.add(Plan(id=foreign_plan_id, user_id=other_id, title="Not yours"))
+        session.add(Task(plan_id=foreign_plan_id, title="Not yours either", priority=3))
+        await session.commit()
+        user = await session.get(User, user_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(app=app, base_url="http://test") as http_client:
+        yield http_client, user_id, foreign_plan_id
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+async def context_matches_rebuild(user_id) -> bool:
+    """Check the maintained context aggregate against a full rebuild."""
+    async with async_session() as session:
+        maintained = context_stats.to_context(await session.get(UserContextStats, user_id))
+        rebuilt = context_stats.to_context(await context_stats.rebuild(session, user_id))
+        await session.rollback()
+    return maintained == rebuilt
+
+
+class TestOwnedWrites:
+    """Test suite for plan, task and feedback writes."""
+
+    @pytest.mark.asyncio
+    async def test_task_lifecycle_keeps_context_in_sync(self, client):
+        """Creating, updating and deleting tasks returns rows and maintains the aggregate."""
+        http_client, user_id, _ = client
+        plan = (await http_client.post("/api/plans", json={"title": "Launch"})).json()
+
+        task = (await http_client.post("/api/tasks", json={"plan_id": plan["id"], "title": "API", "priority": 2})).json()
+        updated = (await http_client.put(f"/api/tasks/{task['id']}", json={"priority": 5, "status": "completed"})).json()
+
+        assert task["status"] == "pending"
+        assert (updated["priority"], updated["status"], updated["title"]) == (5, "completed", "API")
+        assert await context_matches_rebuild(user_id)
+
+        assert (await http_client.delete(f"/api/tasks/{task['id']}")).status_code == 200
+        assert (await http_client.get(f"/api/tasks/{task['id']}")).status_code == 404
+        assert await context_matches_rebuild(user_id)
+
+    @pytest.mark.asyncio
+    async def test_writes_to_other_users_rows_are_not_found(self, client):
+        """Writes scoped to another user's plan or task change nothing."""
+        http_client, _, foreign_plan_id = client
+        async with async_session() as session:
+            foreign_task_id = await session.scalar(select(Task.id).where(Task.plan_id == foreign_plan_id))
+
+        responses = [
+            await http_client.put(f"/api/plans/{foreign_plan_id}", json={"title": "Mine now"}),
+            await http_client.delete(f"/api/plans/{foreign_plan_id}"),
+            await http_client.post("/api/tasks", json={"plan_id": str(foreign_plan_id), "title": "Sneaky", "priority": 3}),
+            await http_client.put(f"/api/tasks/{foreign_task_id}", json={"title": "Mine now"}),
+            await http_client.delete(f"/api/tasks/{foreign_task_id}"),
+        ]
+
+        async with async_session() as session:
+            plan = await session.get(Plan, foreign_plan_id)
+            task_count = await session.scalar(select(func.count()).select_from(Task).where(Task.plan_id == foreign_plan_id))
+
+        assert [response.status_code for response in responses] == [404] * 5
+        assert plan.title == "Not yours"
+        assert task_count == 1
+
+    @pytest.mark.asyncio
+    async def test_update_ignores_protected_fields(self, client):
+        """Plan updates cannot move a plan to another user."""
+        http_client, user_id, _ = client
+        plan = (await http_client.post("/api/plans", json={"title": "Launch"})).json()
+
+        updated = (await http_client.put(f"/api/plans/{plan['id']}", json={"title": "Ship", "user_id": str(uuid4())})).json()
+
+        assert updated["title"] == "Ship"
+        assert updated["user_id"] == str(user_id)
+
+    @pytest.mark.asyncio
+    async def test_delete_plan_removes_tasks_in_few_statements(self, client):
+        """Deleting a plan removes its tasks without loading them and keeps the aggregate in sync."""
+        http_client, user_id, _ = client
+        plan = (await http_client.post("/api/plans", json={"title": "Launch"})).json()
+        for i in range(5):
+            await http_client.post("/api/tasks", json={"plan_id": plan["id"], "title": f"Task {i}", "priority": 3})
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            response = await http_client.delete(f"/api/plans/{plan['id']}")
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", listener)
+
+        async with async_session() as session:
+            remaining = await session.scalar(select(func.count()).select_from(Task).where(Task.plan_id == UUID(plan["id"])))
+
+        assert response.status_code == 200
+        assert remaining == 0
+        assert not any(statement.lstrip().upper().startswith("SELECT TASKS") for statement in statements)
+        assert await context_matches_rebuild(user_id)
+
+    @pytest.mark.asyncio
+    async def test_organize_result_is_saved_as_one_plan(self, client):
+        """Saving the same organize interaction twice is rejected instead of duplicating the plan."""
+        http_client, user_id, _ = client
+        interaction_id = uuid4()
+        async with async_session() as session:
+            session.add(AIInteraction(
+                id=interaction_id,
+                user_id=user_id,
+                interaction_type="categorization",
+                request_data={"prompt": "Launch the site"},
+                response_data={"categories": [{"name": "Launch", "tasks": {"todo": [{"title": "Ship it", "priority": 8}]}}]}
+            ))
+            await session.commit()
+
+        first = await http_client.post("/api/ai/organize-prompt/plan", json={"interaction_id": str(interaction_id)})
+        second = await http_client.post("/api/ai/organize-prompt/plan", json={"interaction_id": str(interaction_id)})
+
+        async with async_session() as session:
+            plans = await session.scalar(select(func.count()).select_from(Plan).where(Plan.user_id == user_id))
+            interaction = await session.get(AIInteraction, interaction_id)
+
+        assert first.status_code == 200
+        assert second.status_code == 409
+        assert plans == 1
+        assert interaction.plan_id == UUID(first.json()["plan"]["id"])
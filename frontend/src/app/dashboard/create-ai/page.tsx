@@ -4,6 +4,7 @@ import { useState } from 'react'
 import { useRouter } from 'next/navigation'
 import { CategoryThreeRow, CategoryData } from '@/components/dashboard/CategoryThreeRow'
 import toast from 'react-hot-toast'
+import { apiClient } from '@/lib/api'
 
 export default function CreateAIPage() {
   const router = useRouter()
@@ -12,6 +13,8 @@ export default function CreateAIPage() {
   const [result, setResult] = useState<CategoryData[] | null>(null)
   const [summary, setSummary] = useState('')
   const [suggestedSteps, setSuggestedSteps] = useState<string[]>([])
+  const [interactionId, setInteractionId] = useState<string | null>(null)
+  const [isSaving, setIsSaving] = useState(false)
 
   const examplePrompts = [
     "I need to build a website, learn rust, deploy to vercel, design logo, set up database, create REST API, write documentation, test everything, launch marketing campaign",
@@ -48,6 +51,7 @@ export default function CreateAIPage() {
       setResult(data.categories)
       setSummary(data.summary || '')
       setSuggestedSteps(data.suggested_next_steps || [])
+      setInteractionId(data.interaction_id || null)
 
       toast.success('Tasks organized successfully!')
     } catch (error) {
@@ -59,12 +63,22 @@ export default function CreateAIPage() {
   }
 
   const handleSaveToPlan = async () => {
-    if (!result) return
+    if (!result || isSaving) return
 
-    toast.success('Plan saved! Redirecting to dashboard...')
-    setTimeout(() => {
-      router.push('/dashboard')
-    }, 1500)
+    setIsSaving(true)
+    try {
+      // Creates the plan and all of its tasks in one request
+      const { plan } = await apiClient.saveOrganizedPlan(
+        interactionId ? { interaction_id: interactionId } : { result: { categories: result, summary } }
+      )
+      toast.success('Plan saved!')
+      router.push(`/dashboard/plans/${plan.id}`)
+    } catch (error) {
+      console.error('Error saving plan:', error)
+      toast.error(error instanceof Error ? error.message : 'Failed to save plan')
+    } finally {
+      setIsSaving(false)
+    }
   }
 
   const handleExampleClick = (example: string) => {
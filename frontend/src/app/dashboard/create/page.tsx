@@ -79,7 +79,7 @@ export default function CreatePlanPage() {
 
       // Parse AI generated data
       if (updatedPlan.ai_generated_data) {
-        const aiData = JSON.parse(updatedPlan.ai_generated_data)
+        const aiData = updatedPlan.ai_generated_data
 
         // Convert to AITask format
         const tasks: AITask[] = aiData.tasks?.map((task: any, index: number) => ({
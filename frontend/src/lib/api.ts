@@ -18,8 +18,8 @@ export interface Plan {
   description: string
   status: 'draft' | 'accepted' | 'archived' | 'active'
   original_thought?: string
-  ai_generated_data?: string
-  ai_metadata?: string
+  ai_generated_data?: Record<string, any>
+  ai_metadata?: Record<string, any>
   created_at: string
   updated_at: string
 }
@@ -38,6 +38,24 @@ export interface Task {
   updated_at: string
 }
 
+export interface AIInteractionSummary {
+  id: string
+  interaction_type: string
+  model_used?: string
+  tokens_used: number
+  response_time_ms?: number
+  user_feedback?: number
+  template_id?: string
+  template_version?: number
+  created_at: string
+}
+
+export interface PlanDetail {
+  plan?: Plan
+  tasks?: Task[]
+  latest_interaction?: AIInteractionSummary | null
+}
+
 // API Client class
 export class ApiClient {
   private baseURL: string
@@ -75,6 +93,13 @@ export class ApiClient {
     return this.handleResponse<Plan>(response)
   }
 
+  async getPlanDetail(planId: string, fields?: string[]): Promise<PlanDetail> {
+    const headers = await this.getAuthHeaders()
+    const query = fields?.length ? `?fields=${fields.join(',')}` : ''
+    const response = await fetch(`${this.baseURL}/api/plans/${planId}/detail${query}`, { headers })
+    return this.handleResponse<PlanDetail>(response)
+  }
+
   async createPlan(data: { title: string; description: string; original_thought?: string }): Promise<Plan> {
     const headers = await this.getAuthHeaders()
     const response = await fetch(`${this.baseURL}/api/plans`, {
@@ -107,9 +132,21 @@ export class ApiClient {
   // Tasks API
   async getTasks(planId?: string): Promise<Task[]> {
     const headers = await this.getAuthHeaders()
-    const url = planId ? `${this.baseURL}/api/tasks?plan_id=${planId}` : `${this.baseURL}/api/tasks`
-    const response = await fetch(url, { headers })
-    return this.handleResponse<Task[]>(response)
+    const tasks: Task[] = []
+    let cursor: string | null = null
+
+    // Follow the keyset cursors until the last page
+    do {
+      const params = new URLSearchParams()
+      if (planId) params.set('plan_id', planId)
+      if (cursor) params.set('cursor', cursor)
+      const query = params.toString()
+      const response = await fetch(`${this.baseURL}/api/tasks${query ? `?${query}` : ''}`, { headers })
+      tasks.push(...(await this.handleResponse<Task[]>(response)))
+      cursor = response.headers.get('X-Next-Cursor')
+    } while (cursor)
+
+    return tasks
   }
 
   async getTask(taskId: string): Promise<Task> {
@@ -167,6 +204,16 @@ export class ApiClient {
     return this.handleResponse<Record<string, unknown>>(response)
   }
 
+  async saveOrganizedPlan(data: { interaction_id?: string; result?: Record<string, unknown>; title?: string }): Promise<{ plan: Plan; tasks: Task[] }> {
+    const headers = await this.getAuthHeaders()
+    const response = await fetch(`${this.baseURL}/api/ai/organize-prompt/plan`, {
+      method: 'POST',
+      headers,
+      body: JSON.stringify(data),
+    })
+    return this.handleResponse<{ plan: Plan; tasks: Task[] }>(response)
+  }
+
   async getInteractionHistory(planId?: string): Promise<Record<string, unknown>[]> {
     const headers = await this.getAuthHeaders()
     const url = planId ? `${this.baseURL}/api/ai/interaction-history?plan_id=${planId}` : `${this.baseURL}/api/ai/interaction-history`
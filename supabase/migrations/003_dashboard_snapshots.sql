@@ -0,0 +1,20 @@
+-- Last successful dashboard suggestion per plan
+-- Served stale-while-revalidate by /api/ai/generate-dashboard and as a fallback when Gemini fails
+
+CREATE TABLE IF NOT EXISTS public.dashboard_snapshots (
+    plan_id UUID REFERENCES public.plans(id) ON DELETE CASCADE PRIMARY KEY,
+    fingerprint TEXT NOT NULL, -- SHA-256 of the plan content the suggestion was computed from
+    suggestion TEXT NOT NULL, -- JSON dashboard suggestion
+    interaction_id UUID, -- AI interaction that produced the suggestion
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE public.dashboard_snapshots ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own dashboard snapshots" ON public.dashboard_snapshots
+    FOR SELECT USING (EXISTS (
+        SELECT 1 FROM public.plans
+        WHERE plans.id = dashboard_snapshots.plan_id AND plans.user_id = auth.uid()
+    ));
+
+COMMENT ON COLUMN public.dashboard_snapshots.fingerprint IS 'Hash of plan title, description and tasks at computation time';
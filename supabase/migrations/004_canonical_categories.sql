@@ -0,0 +1,17 @@
+-- Per-user canonical task categories
+-- AI output is matched against these on write so tasks.ai_category stays a small, stable set.
+-- Run backend/backfill_categories.py once after applying to normalize existing tasks.
+
+CREATE TABLE IF NOT EXISTS public.canonical_categories (
+    id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+    user_id UUID REFERENCES public.users(id) ON DELETE CASCADE NOT NULL,
+    name TEXT NOT NULL, -- Display name written to tasks.ai_category
+    key TEXT NOT NULL, -- Lowercased, punctuation-free lookup key
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_canonical_categories_user_key UNIQUE (user_id, key)
+);
+
+ALTER TABLE public.canonical_categories ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own categories" ON public.canonical_categories
+    FOR SELECT USING (auth.uid() = user_id);
@@ -0,0 +1,12 @@
+-- Record which prompt template version produced each AI interaction
+-- Used by /api/ai/template-stats to compare feedback between template versions
+
+ALTER TABLE public.ai_interactions
+ADD COLUMN IF NOT EXISTS template_id TEXT,
+ADD COLUMN IF NOT EXISTS template_version INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_ai_interactions_template
+    ON public.ai_interactions(template_id, template_version);
+
+COMMENT ON COLUMN public.ai_interactions.template_id IS 'Prompt template ID (e.g., categorize_tasks)';
+COMMENT ON COLUMN public.ai_interactions.template_version IS 'Prompt template version';
@@ -0,0 +1,18 @@
+-- Per-user context aggregate read by the AI endpoints instead of scanning every plan and task.
+-- Maintained incrementally by the API in the same transaction as plan/task writes.
+-- Rows are built lazily on first read, so no backfill is needed; delete a row to force a rebuild.
+
+CREATE TABLE IF NOT EXISTS public.user_context_stats (
+    user_id UUID REFERENCES public.users(id) ON DELETE CASCADE PRIMARY KEY,
+    category_counts TEXT, -- JSON: {category: task count}
+    priority_histogram TEXT, -- JSON: {priority: task count}
+    status_counts TEXT, -- JSON: {status: task count}
+    total_plans INTEGER DEFAULT 0,
+    recent_plans TEXT, -- JSON: most recent plan summaries, newest first
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE public.user_context_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own context stats" ON public.user_context_stats
+    FOR SELECT USING (auth.uid() = user_id);
@@ -0,0 +1,17 @@
+-- Composite indexes for keyset pagination on (created_at, id)
+-- Each list endpoint filters on the leading column and pages with
+-- (created_at, id) < (:cursor_created_at, :cursor_id), so a page is a single index range scan.
+-- The new indexes cover the single-column ones they replace.
+
+CREATE INDEX IF NOT EXISTS idx_plans_user_created
+    ON public.plans(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_tasks_plan_created
+    ON public.tasks(plan_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_ai_interactions_user_created
+    ON public.ai_interactions(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ai_interactions_plan_created
+    ON public.ai_interactions(plan_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS public.idx_plans_user_id;
+DROP INDEX IF EXISTS public.idx_tasks_plan_id;
+DROP INDEX IF EXISTS public.idx_ai_interactions_user_id;
@@ -0,0 +1,15 @@
+-- Store all AI documents as JSONB
+-- 001/002 declared some of these JSONB, but databases set up with backend/add_ai_columns.py or
+-- backend/fix_columns.py hold them as JSON-encoded TEXT. Casting through text works for both.
+-- List endpoints no longer load these columns; JSONB lets callers that need part of a
+-- document (e.g. the scored tasks of a ranking) extract just those keys server-side.
+
+ALTER TABLE public.plans ADD COLUMN IF NOT EXISTS ai_metadata JSONB;
+
+ALTER TABLE public.plans
+    ALTER COLUMN ai_generated_data TYPE JSONB USING NULLIF(ai_generated_data::text, '')::jsonb,
+    ALTER COLUMN ai_metadata TYPE JSONB USING NULLIF(ai_metadata::text, '')::jsonb;
+
+ALTER TABLE public.ai_interactions
+    ALTER COLUMN request_data TYPE JSONB USING NULLIF(request_data::text, '')::jsonb,
+    ALTER COLUMN response_data TYPE JSONB USING NULLIF(response_data::text, '')::jsonb;
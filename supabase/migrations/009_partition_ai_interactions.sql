@@ -0,0 +1,111 @@
+-- Partition ai_interactions by month and add daily rollups
+-- Raw interactions are range partitioned on created_at so history queries prune to recent
+-- months and retention removes a whole month with DETACH/DROP PARTITION instead of DELETE.
+-- backend/app/interaction_rollups.py creates upcoming partitions, refreshes ai_interaction_daily
+-- and applies AI_INTERACTIONS_RETENTION_MONTHS from the API process.
+
+UPDATE public.ai_interactions SET created_at = NOW() WHERE created_at IS NULL;
+
+-- Partitioned tables need the partition key in the primary key
+CREATE TABLE public.ai_interactions_partitioned (
+    LIKE public.ai_interactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Catches rows outside every monthly partition, e.g. if maintenance has not run for months
+CREATE TABLE public.ai_interactions_default PARTITION OF public.ai_interactions_partitioned DEFAULT;
+
+INSERT INTO public.ai_interactions_partitioned SELECT * FROM public.ai_interactions;
+
+DROP TABLE public.ai_interactions;
+ALTER TABLE public.ai_interactions_partitioned RENAME TO ai_interactions;
+
+ALTER TABLE public.ai_interactions
+    ADD CONSTRAINT ai_interactions_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id) ON DELETE CASCADE,
+    ADD CONSTRAINT ai_interactions_plan_id_fkey FOREIGN KEY (plan_id) REFERENCES public.plans(id) ON DELETE CASCADE;
+
+-- Create the partition of a month, moving rows that landed in the default partition into it
+CREATE OR REPLACE FUNCTION public.create_ai_interactions_partition(month DATE)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    range_start DATE := date_trunc('month', month)::date;
+    range_end DATE := (date_trunc('month', month) + INTERVAL '1 month')::date;
+    partition_name TEXT := format('ai_interactions_p%s', to_char(range_start, 'YYYYMM'));
+BEGIN
+    IF to_regclass(format('public.%I', partition_name)) IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    CREATE TEMP TABLE ai_interactions_moving ON COMMIT DROP AS
+        SELECT * FROM public.ai_interactions_default
+        WHERE created_at >= range_start AND created_at < range_end;
+    DELETE FROM public.ai_interactions_default
+        WHERE created_at >= range_start AND created_at < range_end;
+
+    EXECUTE format(
+        'CREATE TABLE public.%I PARTITION OF public.ai_interactions FOR VALUES FROM (%L) TO (%L)',
+        partition_name, range_start, range_end
+    );
+
+    INSERT INTO public.ai_interactions SELECT * FROM ai_interactions_moving;
+    DROP TABLE ai_interactions_moving;
+END;
+$$;
+
+-- Partitions for every month with data, plus the next two
+DO $$
+DECLARE
+    month DATE := date_trunc('month', COALESCE(
+        (SELECT MIN(created_at) FROM public.ai_interactions), NOW()
+    ))::date;
+BEGIN
+    WHILE month <= date_trunc('month', NOW() + INTERVAL '2 months')::date LOOP
+        PERFORM public.create_ai_interactions_partition(month);
+        month := (month + INTERVAL '1 month')::date;
+    END LOOP;
+END;
+$$;
+
+-- Indexes on the parent are created on every partition
+CREATE INDEX idx_ai_interactions_user_created
+    ON public.ai_interactions(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_ai_interactions_plan_created
+    ON public.ai_interactions(plan_id, created_at DESC, id DESC);
+CREATE INDEX idx_ai_interactions_type ON public.ai_interactions(interaction_type);
+CREATE INDEX idx_ai_interactions_created_at ON public.ai_interactions(created_at DESC);
+CREATE INDEX idx_ai_interactions_template
+    ON public.ai_interactions(template_id, template_version);
+
+ALTER TABLE public.ai_interactions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own AI interactions" ON public.ai_interactions
+    FOR SELECT USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can create own AI interactions" ON public.ai_interactions
+    FOR INSERT WITH CHECK (auth.uid() = user_id);
+
+-- Daily usage per user, interaction type and model, read by /api/ai/usage
+CREATE TABLE IF NOT EXISTS public.ai_interaction_daily (
+    day DATE NOT NULL,
+    user_id UUID REFERENCES public.users(id) ON DELETE CASCADE NOT NULL,
+    interaction_type TEXT NOT NULL,
+    model_used TEXT NOT NULL, -- Empty when the model is unknown
+    interaction_count INTEGER NOT NULL DEFAULT 0,
+    tokens_used INTEGER NOT NULL DEFAULT 0,
+    cost_estimate DOUBLE PRECISION NOT NULL DEFAULT 0,
+    latency_p50_ms INTEGER,
+    latency_p95_ms INTEGER,
+    latency_p99_ms INTEGER,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (day, user_id, interaction_type, model_used)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_interaction_daily_user_day
+    ON public.ai_interaction_daily(user_id, day);
+
+ALTER TABLE public.ai_interaction_daily ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own AI usage" ON public.ai_interaction_daily
+    FOR SELECT USING (auth.uid() = user_id);
@@ -0,0 +1,10 @@
+-- Record the trace of the request that produced each AI interaction
+-- Links interaction rows to the spans exported for the AI pipeline (see backend/app/tracing.py)
+
+ALTER TABLE public.ai_interactions
+ADD COLUMN IF NOT EXISTS trace_id TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_ai_interactions_trace
+    ON public.ai_interactions(trace_id);
+
+COMMENT ON COLUMN public.ai_interactions.trace_id IS 'W3C trace id (32 hex characters) of the producing request';
@@ -0,0 +1,20 @@
+-- Manual priority overrides of AI-scored tasks
+-- The API trains the local priority calibration from them (see backend/app/calibration.py);
+-- keeping them lets every worker replay the same edits at startup.
+
+CREATE TABLE IF NOT EXISTS public.priority_edits (
+    id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+    user_id UUID REFERENCES public.users(id) ON DELETE CASCADE NOT NULL,
+    task_id UUID REFERENCES public.tasks(id) ON DELETE SET NULL,
+    task JSONB NOT NULL, -- title, description, priority, status, ai_category, ai_priority_score before the edit
+    new_priority INTEGER NOT NULL,
+    previous_status TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_priority_edits_created_at ON public.priority_edits(created_at);
+
+ALTER TABLE public.priority_edits ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own priority edits" ON public.priority_edits
+    FOR SELECT USING (auth.uid() = user_id);
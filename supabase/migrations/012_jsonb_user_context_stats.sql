@@ -0,0 +1,8 @@
+-- Store the per-user context aggregate as JSONB, like the AI documents in 008
+-- The counters and recent plan summaries were JSON-encoded TEXT; casting through text keeps them.
+
+ALTER TABLE public.user_context_stats
+    ALTER COLUMN category_counts TYPE JSONB USING NULLIF(category_counts, '')::jsonb,
+    ALTER COLUMN priority_histogram TYPE JSONB USING NULLIF(priority_histogram, '')::jsonb,
+    ALTER COLUMN status_counts TYPE JSONB USING NULLIF(status_counts, '')::jsonb,
+    ALTER COLUMN recent_plans TYPE JSONB USING NULLIF(recent_plans, '')::jsonb;